@@ -2,10 +2,18 @@
 import string
 # Importamos random para generar números aleatorios.
 import random
+# Importamos secrets para elegir las palabras de la frase de paso con un generador criptográfico.
+import secrets
+# Módulos para leer las listas de palabras como archivos mapeados en memoria.
+import hashlib
+import math
+import mmap
+import os
+import struct
 # Importamos la librería de la interfaz web (Streamlit).
 import streamlit as st
 # Tipado
-from typing import List
+from typing import List, Sequence, Set, Tuple
 
 
 # Definición de sets de caracteres necesarios
@@ -44,6 +52,211 @@ def generar_contrasena(longitud: int) -> str:
     return "".join(contraseña)
 
 
+# --- MODO FRASE DE PASO (DICEWARE) ---
+
+# Carpeta del script, donde se buscan por defecto las listas de palabras.
+DIRECTORIO_SCRIPT = os.path.dirname(os.path.abspath(__file__))
+# Lista EFF de 7776 palabras (opcional, no se incluye en el repositorio: https://www.eff.org/dice).
+LISTA_PALABRAS_EFF = os.path.join(DIRECTORIO_SCRIPT, "palabras_eff.txt")
+# Lista en español que acompaña al script, se usa cuando no está la lista EFF.
+LISTA_PALABRAS_INCLUIDA = os.path.join(DIRECTORIO_SCRIPT, "palabras_es.txt")
+LISTA_PALABRAS_DEFECTO = LISTA_PALABRAS_EFF if os.path.exists(
+    LISTA_PALABRAS_EFF) else LISTA_PALABRAS_INCLUIDA
+
+# Cabecera del índice de desplazamientos: formato del índice, tamaño y mtime (ns) de la lista, para detectar si el índice está obsoleto.
+CABECERA_INDICE = struct.Struct("<QQQ")
+# Formato 2: el índice solo guarda la primera aparición de cada palabra.
+VERSION_INDICE = 2
+# Cabecera del índice de una combinación de listas: resumen SHA-256 de la clave (ruta, tamaño, mtime) de cada lista.
+CABECERA_COMBINACION = struct.Struct("<32s")
+
+
+# Extrae la palabra de una línea de la lista: en el formato EFF es el último campo ("11111\tábaco").
+def palabra_de_linea(linea: bytes) -> str:
+    return linea.decode("utf-8").split()[-1]
+
+
+# Escribe un índice (cabecera + enteros de 64 bits) en un temporal y lo renombra, para no dejar nunca un índice a medias.
+def escribir_indice(ruta_indice: str, cabecera: bytes, valores: List[int]):
+    ruta_temporal = ruta_indice + ".tmp"
+    with open(ruta_temporal, "wb") as f:
+        f.write(cabecera)
+        f.write(struct.pack(f"={len(valores)}Q", *valores))
+    os.replace(ruta_temporal, ruta_indice)
+
+
+# Mapea en memoria un índice y devuelve el mapa y una vista de enteros de 64 bits tras la cabecera (sin copiarlo).
+def mapear_indice(ruta_indice: str, tamano_cabecera: int) -> Tuple[mmap.mmap, memoryview]:
+    with open(ruta_indice, "rb") as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapa, memoryview(mapa)[tamano_cabecera:].cast("Q")
+
+
+# Clase que da acceso aleatorio a una lista de palabras (una por línea, con o sin los dados EFF delante, ej. "11111\tábaco") sin parsear el archivo entero al arrancar.
+class ListaPalabras:
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        info = os.stat(ruta)
+        self.clave = (ruta, info.st_size, info.st_mtime_ns)
+        # 1. Construir el índice de desplazamientos solo si no existe o si la lista ha cambiado.
+        self.ruta_indice = ruta + ".idx"
+        if not self._indice_valido():
+            self._construir_indice()
+
+        # 2. Mapear en memoria la lista y su índice, el sistema operativo solo lee las páginas que se tocan.
+        with open(ruta, "rb") as f:
+            self._datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # 3. Cada entrada del índice es el inicio de una línea.
+        self._mapa_indice, self._desplazamientos = mapear_indice(
+            self.ruta_indice, CABECERA_INDICE.size)
+
+    # Número de palabras distintas de la lista (el índice solo guarda la primera aparición de cada una).
+    def __len__(self) -> int:
+        return len(self._desplazamientos)
+
+    def __getitem__(self, posicion: int) -> str:
+        # Lee solo la línea pedida: desde su desplazamiento hasta el siguiente salto de línea.
+        inicio = self._desplazamientos[posicion]
+        fin = self._datos.find(b"\n", inicio)
+        if fin == -1:
+            fin = len(self._datos)
+        return palabra_de_linea(self._datos[inicio:fin])
+
+    # Comprueba que el índice corresponde al tamaño y fecha de modificación actuales de la lista.
+    def _indice_valido(self) -> bool:
+        try:
+            info = os.stat(self.ruta)
+            with open(self.ruta_indice, "rb") as f:
+                cabecera = f.read(CABECERA_INDICE.size)
+        except OSError:
+            return False
+        if len(cabecera) != CABECERA_INDICE.size:
+            return False
+        return CABECERA_INDICE.unpack(cabecera) == (VERSION_INDICE, info.st_size, info.st_mtime_ns)
+
+    # Recorre la lista una sola vez y guarda en el archivo '.idx' el desplazamiento de la primera línea de cada palabra distinta.
+    # Las repetidas se descartan aquí, así al arrancar no hay que leer la lista y todas las palabras del índice son equiprobables.
+    def _construir_indice(self):
+        info = os.stat(self.ruta)
+        desplazamientos: List[int] = []
+        vistas: Set[str] = set()
+        with open(self.ruta, "rb") as f:
+            inicio = 0
+            for linea in f:
+                if linea.strip():
+                    palabra = palabra_de_linea(linea)
+                    if palabra not in vistas:
+                        vistas.add(palabra)
+                        desplazamientos.append(inicio)
+                inicio += len(linea)
+
+        if not desplazamientos:
+            raise ValueError(f"La lista de palabras '{self.ruta}' está vacía.")
+        escribir_indice(self.ruta_indice, CABECERA_INDICE.pack(
+            VERSION_INDICE, info.st_size, info.st_mtime_ns), desplazamientos)
+
+
+# Clase que trata varias listas como una sola sin copiarlas, descontando las palabras repetidas entre listas.
+# Con varias listas guarda junto a la primera un índice de la combinación ('<lista>.<resumen>.idx') con las posiciones globales
+# de la primera aparición de cada palabra: se construye una vez por combinación y al arrancar solo se mapea.
+class CombinacionListas:
+
+    def __init__(self, listas: Sequence[ListaPalabras]):
+        self.listas = list(listas)
+        self._posiciones = None
+        if len(self.listas) > 1:
+            resumen = hashlib.sha256(
+                repr([lista.clave for lista in self.listas]).encode("utf-8")).digest()
+            self.ruta_indice = f"{self.listas[0].ruta}.{resumen.hex()[:16]}.idx"
+            if not self._indice_valido(resumen):
+                self._construir_indice(resumen)
+            self._mapa_indice, self._posiciones = mapear_indice(
+                self.ruta_indice, CABECERA_COMBINACION.size)
+
+    # Número de palabras distintas, que es lo que cuenta para la entropía.
+    def __len__(self) -> int:
+        if self._posiciones is None:
+            return len(self.listas[0])
+        return len(self._posiciones)
+
+    # Elige una palabra al azar con 'secrets' entre las palabras distintas (todas equiprobables, sin repetir sorteos).
+    def elegir(self) -> str:
+        posicion = secrets.randbelow(len(self))
+        if self._posiciones is not None:
+            posicion = self._posiciones[posicion]
+        for lista in self.listas:
+            if posicion < len(lista):
+                return lista[posicion]
+            posicion -= len(lista)
+        raise IndexError(posicion)
+
+    def _indice_valido(self, resumen: bytes) -> bool:
+        try:
+            with open(self.ruta_indice, "rb") as f:
+                cabecera = f.read(CABECERA_COMBINACION.size)
+        except OSError:
+            return False
+        return cabecera == CABECERA_COMBINACION.pack(resumen)
+
+    # Recorre las listas una vez y guarda la posición global de cada palabra que no había salido en una lista anterior.
+    def _construir_indice(self, resumen: bytes):
+        vistas: Set[str] = set()
+        posiciones: List[int] = []
+        posicion = 0
+        for lista in self.listas:
+            for i in range(len(lista)):
+                palabra = lista[i]
+                if palabra not in vistas:
+                    vistas.add(palabra)
+                    posiciones.append(posicion)
+                posicion += 1
+        escribir_indice(self.ruta_indice,
+                        CABECERA_COMBINACION.pack(resumen), posiciones)
+
+
+# Mantiene las listas abiertas entre recargas de Streamlit, así cada ejecución del script no vuelve a mapearlas.
+# El tamaño y la fecha de modificación forman parte de la clave de la caché, si la lista cambia se vuelve a cargar.
+@st.cache_resource(show_spinner=False)
+def cargar_lista_palabras(ruta: str, tamano: int, mtime_ns: int) -> ListaPalabras:
+    return ListaPalabras(ruta)
+
+
+# Carga (o recupera de la caché) la combinación de varias listas, la clave incluye tamaño y fecha de cada una.
+@st.cache_resource(show_spinner=False)
+def cargar_combinacion(claves: Tuple[Tuple[str, int, int], ...]) -> CombinacionListas:
+    return CombinacionListas([cargar_lista_palabras(*clave) for clave in claves])
+
+
+# Devuelve la clave de caché (ruta, tamaño, mtime en ns) de cada lista, lanza OSError si alguna no existe.
+def claves_listas(rutas: Sequence[str]) -> Tuple[Tuple[str, int, int], ...]:
+    claves = []
+    for ruta in rutas:
+        info = os.stat(ruta)
+        claves.append((ruta, info.st_size, info.st_mtime_ns))
+    return tuple(claves)
+
+
+# Calcula la entropía (en bits) de una frase de 'num_palabras' elegidas de un total de 'total_palabras' distintas.
+def calcular_entropia_frase(num_palabras: int, total_palabras: int) -> float:
+    return num_palabras * math.log2(total_palabras)
+
+
+# Genera una frase de paso eligiendo palabras al azar de una combinación de listas (ej. EFF en inglés y una lista en español), devuelve la frase y su entropía en bits.
+def generar_frase_paso(combinacion: CombinacionListas, num_palabras: int, separador: str = "-") -> Tuple[str, float]:
+
+    # 1. Elegir cada palabra con 'secrets' entre las palabras distintas para que la entropía calculada sea real.
+    palabras = [combinacion.elegir() for _ in range(num_palabras)]
+
+    # 2. Unir las palabras y devolver la entropía de la frase, contando solo palabras distintas.
+    return separador.join(palabras), calcular_entropia_frase(num_palabras, len(combinacion))
+
+
+# Genera 'cantidad' frases de paso de una vez (modo masivo), reutilizando la misma combinación de listas mapeadas.
+def generar_frases_paso(combinacion: CombinacionListas, num_palabras: int, cantidad: int, separador: str = "-") -> List[Tuple[str, float]]:
+    return [generar_frase_paso(combinacion, num_palabras, separador) for _ in range(cantidad)]
+
+
 # --- CONFIGURACIÓN DE LA INTERFAZ STREAMLIT ---
 
 # Añadimos un título para la aplicación web
@@ -58,46 +271,91 @@ st.markdown(
 if 'contraseña_actual' not in st.session_state:
     st.session_state.contraseña_actual = ""
 
-# 1. Widget para la longitud de la contraseña (Fuera de cualquier condicional)
-longitud = st.slider(
-    "Longitud de la contraseña",
-    min_value=8,
-    max_value=128,
-    value=16,  # Valor por defecto de 16
-    step=1
-)
-
-# 2. Botón de Generación
-if st.button("Generar Nueva Contraseña", type="primary", use_container_width=True):
-    # Generamos la contraseña
-    nueva_contraseña = generar_contrasena(longitud)
-    # Guardamos la nueva contraseña en el estado de sesión
-    st.session_state.contraseña_actual = nueva_contraseña
-    st.toast("Contraseña generada con éxito.", icon="✅")
-
-
-# 3. Campo de Salida y Copiado, al estar fuera del botón, el widget siempre se renderiza, pero su 'value' viene del estado.
-st.text_input(
-    label="Contraseña Generada",
-    value=st.session_state.contraseña_actual,
-    type="password",  # Opcional: Oculta la contraseña por defecto
-    disabled=True,  # No permitimos la edición manual
-    key="password_output"  # Clave única para el widget
-)
-
-# Creamos un botón de "Mostrar Contraseña"
-if st.session_state.contraseña_actual and st.checkbox("Mostrar Contraseña"):
-    st.code(st.session_state.contraseña_actual, language=None)
-
-# 4. Indicador de Seguridad (Visual extra)
-if st.session_state.contraseña_actual:
-    longitud_str = "Muy débil"
-    if longitud >= 12:
-        longitud_str = "Media"
-    if longitud >= 16:
-        longitud_str = "Fuerte"
-    if longitud >= 20:
-        longitud_str = "Muy Fuerte"
-
-    st.info(
-        f"Nivel de Seguridad: **{longitud_str}** ({longitud} caracteres, con caracteres mixtos garantizados).")
+# Selector del modo de generación: contraseña clásica o frase de paso (diceware).
+modo = st.radio("Modo de generación", [
+                "Contraseña", "Frase de paso"], horizontal=True)
+
+if modo == "Frase de paso":
+
+    # --- MODO FRASE DE PASO ---
+
+    # 1. Rutas de las listas de palabras, una por línea (se pueden combinar varias, ej. EFF + español).
+    rutas_texto = st.text_area(
+        "Listas de palabras (una ruta por línea)", value=LISTA_PALABRAS_DEFECTO)
+    rutas = [ruta.strip() for ruta in rutas_texto.splitlines() if ruta.strip()]
+    if LISTA_PALABRAS_DEFECTO == LISTA_PALABRAS_INCLUIDA:
+        st.caption(
+            f"ℹ️ No se encontró la lista EFF en '{LISTA_PALABRAS_EFF}', se usa la lista en español incluida. "
+            "Descarga la lista EFF (https://www.eff.org/dice) en esa ruta para más entropía por palabra.")
+
+    num_palabras = st.slider("Número de palabras", min_value=4,
+                             max_value=12, value=6, step=1)
+    separador = st.text_input("Separador", value="-")
+    cantidad = st.number_input(
+        "Cantidad de frases a generar", min_value=1, max_value=10000, value=1, step=1)
+
+    # 2. Botón de Generación
+    if st.button("Generar Frases de Paso", type="primary", use_container_width=True):
+        try:
+            combinacion = cargar_combinacion(claves_listas(rutas)) if rutas else None
+        except (OSError, ValueError) as e:
+            st.error(f"❌ No se pudo cargar la lista de palabras: {e}")
+            combinacion = None
+
+        if combinacion is not None:
+            frases = generar_frases_paso(
+                combinacion, num_palabras, int(cantidad), separador)
+            total_palabras = len(combinacion)
+            st.toast(f"{len(frases)} frase(s) generada(s).", icon="✅")
+
+            # 3. Mostrar las frases con la entropía de cada una.
+            st.code("\n".join(
+                f"{frase}  ({entropia:.1f} bits)" for frase, entropia in frases), language=None)
+            st.info(
+                f"Entropía por frase: **{frases[0][1]:.1f} bits** ({num_palabras} palabras de un total de {total_palabras} distintas).")
+
+else:
+
+    # 1. Widget para la longitud de la contraseña (Fuera de cualquier condicional)
+    longitud = st.slider(
+        "Longitud de la contraseña",
+        min_value=8,
+        max_value=128,
+        value=16,  # Valor por defecto de 16
+        step=1
+    )
+
+    # 2. Botón de Generación
+    if st.button("Generar Nueva Contraseña", type="primary", use_container_width=True):
+        # Generamos la contraseña
+        nueva_contraseña = generar_contrasena(longitud)
+        # Guardamos la nueva contraseña en el estado de sesión
+        st.session_state.contraseña_actual = nueva_contraseña
+        st.toast("Contraseña generada con éxito.", icon="✅")
+
+
+    # 3. Campo de Salida y Copiado, al estar fuera del botón, el widget siempre se renderiza, pero su 'value' viene del estado.
+    st.text_input(
+        label="Contraseña Generada",
+        value=st.session_state.contraseña_actual,
+        type="password",  # Opcional: Oculta la contraseña por defecto
+        disabled=True,  # No permitimos la edición manual
+        key="password_output"  # Clave única para el widget
+    )
+
+    # Creamos un botón de "Mostrar Contraseña"
+    if st.session_state.contraseña_actual and st.checkbox("Mostrar Contraseña"):
+        st.code(st.session_state.contraseña_actual, language=None)
+
+    # 4. Indicador de Seguridad (Visual extra)
+    if st.session_state.contraseña_actual:
+        longitud_str = "Muy débil"
+        if longitud >= 12:
+            longitud_str = "Media"
+        if longitud >= 16:
+            longitud_str = "Fuerte"
+        if longitud >= 20:
+            longitud_str = "Muy Fuerte"
+
+        st.info(
+            f"Nivel de Seguridad: **{longitud_str}** ({longitud} caracteres, con caracteres mixtos garantizados).")
@@ -1,9 +1,38 @@
 # Módulo esencial para interactuar con el sistema operativo (archivos, directorios).
 import os
-# Módulo de utilidades de shell, necesario para mover archivos.
+# Para distinguir los errores al mover (EXDEV: origen y destino en dispositivos distintos).
+import errno
+# Módulo de utilidades de shell, necesario para copiar archivos entre dispositivos.
 import shutil
+# Para el índice incremental y el diario de movimientos.
+import sqlite3
+import json
+# Para calcular los hashes BLAKE2 de la detección de duplicados.
+import hashlib
+# Para medir la velocidad del proceso.
+import time
+# Para los argumentos de línea de comandos (modo vigilancia) y la cola de eventos.
+import sys
+import queue
+# Carpeta temporal para el benchmark del clasificador.
+import tempfile
+# Para compilar los patrones de inclusión/exclusión (globs) del escáner.
+import fnmatch
+import re
+# Agrupación de archivos por carpeta de destino.
+from collections import Counter, defaultdict
+# Pool de hilos para ejecutar los movimientos en paralelo.
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed, wait, FIRST_COMPLETED
 # Para tipado.
-from typing import Dict, List, Tuple, Any
+from typing import Dict, FrozenSet, List, NamedTuple, Tuple, Any, Iterable, Iterator, Optional, Pattern, Set, Sized
+
+# watchdog es opcional: si no está instalado, el modo vigilancia recorre la carpeta periódicamente (sondeo).
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_DISPONIBLE = True
+except ImportError:
+    WATCHDOG_DISPONIBLE = False
 
 
 # --- CONSTANTES GLOBALES ---
@@ -35,72 +64,982 @@ TIPOS_ARCHIVOS: Dict[str, str] = {
 # Nombre de la carpeta por defecto si la extensión no está en el diccionario.
 OTRAS_CARPETAS: str = "Otros"
 
+# Archivo de reglas persistente (extensiones añadidas y reglas por patrón, tamaño o firma), junto al script.
+# Es un archivo oculto para que el escáner lo ignore y organizar la carpeta del script no lo mueva a 'Código'.
+ARCHIVO_REGLAS: str = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), ".reglas_organizador.json")
+
+# Bytes del inicio del archivo que se leen para reconocer su tipo por contenido ("magic bytes").
+BYTES_CABECERA: int = 16
+
+# Firmas de contenido conocidas (desplazamiento, bytes, carpeta), si el contenido no coincide con la extensión manda la firma.
+FIRMAS_CONOCIDAS: List[Tuple[int, bytes, str]] = [
+    (0, b"\x89PNG\r\n\x1a\n", "Imágenes"), (0, b"\xff\xd8\xff", "Imágenes"),
+    (0, b"GIF87a", "Imágenes"), (0, b"GIF89a", "Imágenes"), (8, b"WEBP", "Imágenes"),
+    (0, b"%PDF", "Documentos"), (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "Documentos"),
+    (0, b"ID3", "Música"), (0, b"fLaC", "Música"), (0, b"OggS", "Música"), (8, b"WAVE", "Música"),
+    (4, b"ftyp", "Vídeos"), (0, b"\x1a\x45\xdf\xa3", "Vídeos"), (8, b"AVI ", "Vídeos"),
+    (0, b"PK\x03\x04", "Comprimidos"), (0, b"Rar!\x1a\x07", "Comprimidos"),
+    (0, b"7z\xbc\xaf\x27\x1c", "Comprimidos"), (0, b"\x1f\x8b", "Comprimidos"),
+]
+
+# Extensiones cuyo formato va dentro de un contenedor con otra firma (ej. un .docx es un ZIP), para ellas la firma del contenedor no cuenta.
+EXTENSIONES_CONTENEDOR: Dict[str, FrozenSet[str]] = {
+    "Comprimidos": frozenset({"docx", "xlsx", "pptx", "odt", "ods", "odp", "epub", "jar", "apk"}),
+}
+
+# Clasificador compilado y reglas del usuario, se cargan la primera vez que se clasifica (ver obtener_clasificador).
+CLASIFICADOR: Optional["ClasificadorCompilado"] = None
+REGLAS_USUARIO: List[Dict[str, Any]] = []
+
+
+# Número de hilos que ejecutan los movimientos, renombrar es I/O (no CPU), así que usamos más hilos que núcleos.
+HILOS_MOVIMIENTO: int = min(32, (os.cpu_count() or 1) * 4)
+
+# Número de hilos que recorren subcarpetas en paralelo con el escáner.
+HILOS_ESCANEO: int = min(16, (os.cpu_count() or 1) * 2)
+
+# Número de archivos que procesa cada tarea del pool, evita crear una tarea por archivo en carpetas enormes.
+TAMANO_LOTE: int = 256
+
+# Número máximo de errores que se muestran en detalle al final (el resto solo se cuentan).
+MAX_ERRORES_MOSTRADOS: int = 10
+
+# Modo vigilancia: segundos que el tamaño de un archivo debe mantenerse para darlo por terminado, pausa del bucle e intervalo de sondeo sin watchdog.
+ESPERA_ESTABLE: float = 0.25
+PAUSA_VIGILANCIA: float = 0.05
+INTERVALO_SONDEO: float = 0.5
+
+# Número máximo de archivos que se clasifican juntos en el modo vigilancia.
+TAMANO_LOTE_VIGILANCIA: int = 200
+
+# Extensiones de descargas a medias, esos archivos se renombran al terminar y entonces se clasifican.
+EXTENSIONES_TEMPORALES: Tuple[str, ...] = (
+    ".part", ".crdownload", ".download", ".tmp")
+
+# Nombre del índice SQLite que se guarda dentro de cada carpeta organizada (oculto, el escáner lo ignora).
+NOMBRE_INDICE: str = ".indice_organizador.db"
+
+# Bytes que se leen del principio y del final de cada archivo para el hash parcial de duplicados.
+BLOQUE_HASH_PARCIAL: int = 64 * 1024
+
+# Tamaño de bloque para leer archivos completos al calcular su hash.
+TAMANO_BLOQUE_LECTURA: int = 1024 * 1024
+
+# Número de hilos que calculan hashes en paralelo (hashlib libera el GIL con bloques grandes).
+HILOS_HASH: int = os.cpu_count() or 1
+
+# Número máximo de grupos de duplicados que se muestran en el informe.
+MAX_GRUPOS_MOSTRADOS: int = 20
+
+
+# --- MOTOR DE REGLAS DE CLASIFICACIÓN ---
+
+# Regla ya compilada: cada condición es opcional (None = no se comprueba), la primera regla que cumple todas decide la carpeta.
+class ReglaCompilada(NamedTuple):
+    carpeta: str
+    extensiones: Optional[FrozenSet[str]]
+    patron: Optional[Pattern[str]]
+    tamano_min: Optional[int]
+    tamano_max: Optional[int]
+    firma: Optional[bytes]
+    desplazamiento: int
+
+
+# Lee los primeros BYTES_CABECERA bytes de un archivo con una sola llamada (pread donde existe), retorna b"" si no se puede leer.
+def leer_cabecera(ruta: str) -> bytes:
+    try:
+        if hasattr(os, "pread"):
+            descriptor = os.open(ruta, os.O_RDONLY)
+            try:
+                return os.pread(descriptor, BYTES_CABECERA, 0)
+            finally:
+                os.close(descriptor)
+        with open(ruta, 'rb') as f:
+            return f.read(BYTES_CABECERA)
+    except OSError:
+        return b""
+
+
+# Clasificador construido una sola vez a partir de las extensiones y las reglas del archivo de reglas.
+class ClasificadorCompilado:
+
+    def __init__(self, extensiones: Dict[str, str], reglas: List[Dict[str, Any]]):
+        self.extensiones = dict(extensiones)
+        self.reglas = [self.compilar_regla(regla) for regla in reglas]
+
+        # Firmas conocidas agrupadas por (desplazamiento, longitud): cada grupo se resuelve con un solo acceso a diccionario.
+        grupos: Dict[Tuple[int, int], Dict[bytes, str]] = defaultdict(dict)
+        for desplazamiento, firma, carpeta in FIRMAS_CONOCIDAS:
+            grupos[(desplazamiento, len(firma))][firma] = carpeta
+        self.firmas = [(desplazamiento, desplazamiento + longitud, tabla)
+                       for (desplazamiento, longitud), tabla in grupos.items()]
+
+    # Convierte una regla del archivo JSON en una ReglaCompilada (globs a regex, firma hexadecimal a bytes).
+    @staticmethod
+    def compilar_regla(regla: Dict[str, Any]) -> ReglaCompilada:
+        firma = bytes.fromhex(regla["firma"]) if regla.get("firma") else None
+        desplazamiento = int(regla.get("desplazamiento", 0))
+        if desplazamiento < 0:
+            raise ValueError(
+                f"El desplazamiento de la firma de la regla '{regla['carpeta']}' no puede ser negativo ({desplazamiento}).")
+        if firma is not None and desplazamiento + len(firma) > BYTES_CABECERA:
+            raise ValueError(
+                f"La firma de la regla '{regla['carpeta']}' pasa de los primeros {BYTES_CABECERA} bytes.")
+        extensiones = regla.get("extensiones")
+        return ReglaCompilada(
+            carpeta=regla["carpeta"],
+            extensiones=frozenset(e.lower().lstrip('.')
+                                  for e in extensiones) if extensiones else None,
+            patron=compilar_patrones([regla["patron"]]) if regla.get(
+                "patron") else None,
+            tamano_min=regla.get("tamano_min"),
+            tamano_max=regla.get("tamano_max"),
+            firma=firma,
+            desplazamiento=desplazamiento,
+        )
+
+    # Devuelve la carpeta de una firma conocida (PNG, PDF, ZIP...) a partir de la cabecera, o None.
+    def carpeta_por_firma(self, cabecera: bytes) -> Optional[str]:
+        for inicio, fin, tabla in self.firmas:
+            carpeta = tabla.get(cabecera[inicio:fin])
+            if carpeta:
+                return carpeta
+        return None
+
+    # Decide la carpeta de 'archivo' (nombre o ruta relativa), 'ruta' es su ruta completa (None = solo se usa el nombre).
+    # Orden: reglas del usuario, firma del contenido (si hay ruta) y extensión conocida, así un PNG llamado 'foto.txt' va a Imágenes.
+    def clasificar(self, archivo: str, ruta: Optional[str] = None) -> str:
+        nombre = os.path.basename(archivo)
+        extension = os.path.splitext(nombre)[1][1:].lower()
+        # El tamaño y la cabecera solo se leen si alguna regla los necesita, y como mucho una vez.
+        tamano: Optional[int] = None
+        cabecera: Optional[bytes] = None
+
+        # 1. Reglas del usuario, en orden, comprobando primero las condiciones baratas.
+        for regla in self.reglas:
+            if regla.extensiones is not None and extension not in regla.extensiones:
+                continue
+            if regla.patron is not None and not coincide_patron(regla.patron, nombre, archivo):
+                continue
+            if regla.tamano_min is not None or regla.tamano_max is not None:
+                if ruta is None:
+                    continue
+                if tamano is None:
+                    try:
+                        tamano = os.path.getsize(ruta)
+                    except OSError:
+                        tamano = -1
+                if tamano < (regla.tamano_min or 0) or (regla.tamano_max is not None and tamano > regla.tamano_max):
+                    continue
+            if regla.firma is not None:
+                if ruta is None:
+                    continue
+                if cabecera is None:
+                    cabecera = leer_cabecera(ruta)
+                if cabecera[regla.desplazamiento:regla.desplazamiento + len(regla.firma)] != regla.firma:
+                    continue
+            return regla.carpeta
+
+        # 2. Firma del contenido: se lee la cabecera de todos los archivos y, si no coincide con la extensión, manda la firma.
+        carpeta_extension = self.extensiones.get(extension)
+        if ruta is not None:
+            if cabecera is None:
+                cabecera = leer_cabecera(ruta)
+            carpeta = self.carpeta_por_firma(cabecera)
+            if carpeta and carpeta != carpeta_extension and extension not in EXTENSIONES_CONTENEDOR.get(carpeta, ()):
+                return carpeta
+
+        # 3. Extensión conocida (o la firma, si coincide con ella).
+        return carpeta_extension or OTRAS_CARPETAS
+
+
+# Lee el archivo de reglas (extensiones añadidas por el usuario y reglas avanzadas), si no existe devuelve una configuración vacía.
+def cargar_reglas() -> Dict[str, Any]:
+    try:
+        with open(ARCHIVO_REGLAS, 'r', encoding='utf-8') as f:
+            configuracion = json.load(f)
+    except FileNotFoundError:
+        return {"extensiones": {}, "reglas": []}
+    except (json.JSONDecodeError, OSError) as e:
+        print(
+            f"⚠️ No se pudo leer '{ARCHIVO_REGLAS}' ({e}), se usan las extensiones por defecto.")
+        return {"extensiones": {}, "reglas": []}
+    configuracion.setdefault("extensiones", {})
+    configuracion.setdefault("reglas", [])
+    return configuracion
+
+
+# Guarda el archivo de reglas de forma atómica (archivo temporal + renombrado).
+def guardar_reglas(configuracion: Dict[str, Any]):
+    ruta_temporal = ARCHIVO_REGLAS + ".tmp"
+    with open(ruta_temporal, 'w', encoding='utf-8') as f:
+        json.dump(configuracion, f, indent=4, ensure_ascii=False)
+    os.replace(ruta_temporal, ARCHIVO_REGLAS)
+
+
+# Devuelve el clasificador compilado, la primera vez carga el archivo de reglas y aplica sus extensiones sobre TIPOS_ARCHIVOS.
+def obtener_clasificador() -> ClasificadorCompilado:
+    global CLASIFICADOR, REGLAS_USUARIO
+    if CLASIFICADOR is None:
+        configuracion = cargar_reglas()
+        TIPOS_ARCHIVOS.update({ext.lower(): carpeta for ext,
+                              carpeta in configuracion["extensiones"].items()})
+        REGLAS_USUARIO = configuracion["reglas"]
+        try:
+            CLASIFICADOR = ClasificadorCompilado(
+                TIPOS_ARCHIVOS, REGLAS_USUARIO)
+        except (KeyError, ValueError) as e:
+            print(f"⚠️ Reglas no válidas en '{ARCHIVO_REGLAS}' ({e}), se ignoran.")
+            REGLAS_USUARIO = []
+            CLASIFICADOR = ClasificadorCompilado(TIPOS_ARCHIVOS, [])
+    return CLASIFICADOR
+
+
+# Devuelve la carpeta de destino de un archivo, si se indica 'directorio' se pueden usar su tamaño y su contenido (reglas y firmas).
+def obtener_carpeta_destino(archivo: str, directorio: Optional[str] = None) -> str:
+    ruta = os.path.join(directorio, archivo) if directorio else None
+    return obtener_clasificador().clasificar(archivo, ruta)
+
+
+# Devuelve todas las carpetas de destino posibles (no se escanean al organizar).
+def obtener_carpetas_destino() -> Set[str]:
+    obtener_clasificador()
+    return set(TIPOS_ARCHIVOS.values()) | {OTRAS_CARPETAS} | {carpeta for _, _, carpeta in FIRMAS_CONOCIDAS} | {regla["carpeta"] for regla in REGLAS_USUARIO}
+
+
+# Mide la velocidad del clasificador sobre archivos sintéticos: por nombre (extensión y reglas) y con lectura de firma (archivos sin extensión).
+def medir_clasificador(num_archivos: int = 20000):
+
+    print(
+        f"\n--- ⏱️ BENCHMARK DEL CLASIFICADOR ({num_archivos} archivos sintéticos) ---")
+
+    # Reglas de ejemplo para que el benchmark recorra también el motor de reglas.
+    reglas = [{"carpeta": "Facturas", "patron": "factura_*"},
+              {"carpeta": "Grandes", "tamano_min": 10 * 1024 * 1024},
+              {"carpeta": "Imágenes", "extensiones": ["dat"], "firma": "89504e47"}]
+    clasificador = ClasificadorCompilado(TIPOS_ARCHIVOS, reglas)
+    cabeceras = [firma for desplazamiento, firma,
+                 _ in FIRMAS_CONOCIDAS if desplazamiento == 0]
+    extensiones = list(TIPOS_ARCHIVOS)
+
+    with tempfile.TemporaryDirectory() as carpeta_temporal:
+        # 1. Crear los archivos: mitad con extensión conocida, mitad sin extensión (solo se reconocen por su contenido).
+        nombres: List[str] = []
+        for i in range(num_archivos):
+            if i % 2:
+                nombre = f"archivo_{i}.{extensiones[i % len(extensiones)]}"
+                contenido = b"contenido"
+            else:
+                nombre = f"archivo_{i}"
+                contenido = cabeceras[i % len(cabeceras)] + b"\0" * 16
+            with open(os.path.join(carpeta_temporal, nombre), 'wb') as f:
+                f.write(contenido)
+            nombres.append(nombre)
+
+        # 2. Medir solo por nombre y con acceso al contenido.
+        for descripcion, directorio in (("solo nombre", None), ("nombre + tamaño + firma", carpeta_temporal)):
+            inicio = time.perf_counter()
+            resultado = Counter(clasificador.clasificar(nombre, os.path.join(directorio, nombre) if directorio else None)
+                                for nombre in nombres)
+            duracion = max(time.perf_counter() - inicio, 1e-9)
+            print(f"{descripcion:>25}: {num_archivos / duracion:>12,.0f} archivos/s, "
+                  f"{resultado.get(OTRAS_CARPETAS, 0)} a '{OTRAS_CARPETAS}'")
+
+
+# --- ESCÁNER DE DIRECTORIOS ---
+
+# Convierte una lista de patrones glob (ej. '*.tmp', 'fotos/*') en una única expresión regular compilada, o None si no hay patrones.
+def compilar_patrones(patrones: Optional[List[str]]) -> Optional[Pattern[str]]:
+    if not patrones:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patrones))
+
+
+# Comprueba si un nombre o su ruta relativa coinciden con el patrón compilado.
+def coincide_patron(patron: Pattern[str], nombre: str, ruta_relativa: str) -> bool:
+    return bool(patron.match(nombre) or patron.match(ruta_relativa))
+
+
+# Lista UNA carpeta con os.scandir, retorna sus archivos (ruta relativa, DirEntry), las subcarpetas que quedan por recorrer y el mtime de la carpeta.
+# 'conocida' es el (mtime, subcarpetas) guardado en una ejecución anterior: si el mtime no ha cambiado no se lista, solo se baja a sus subcarpetas.
+def listar_carpeta(ruta: str, relativa: str, profundidad: int, profundidad_max: Optional[int],
+                   patron_incluir: Optional[Pattern[str]], patron_excluir: Optional[Pattern[str]],
+                   carpetas_excluidas: Set[str], conocida: Optional[Tuple[int, List[str]]] = None
+                   ) -> Tuple[List[Tuple[str, os.DirEntry]], List[Tuple[str, str, int]], int]:
+    archivos: List[Tuple[str, os.DirEntry]] = []
+    subcarpetas: List[Tuple[str, str, int]] = []
+    mtime_ns = 0
+
+    try:
+        # El mtime se lee ANTES de listar, si algo cambia durante el listado la próxima ejecución lo volverá a listar.
+        mtime_ns = os.stat(ruta).st_mtime_ns
+        if conocida and conocida[0] == mtime_ns:
+            if profundidad_max is None or profundidad < profundidad_max:
+                subcarpetas = [(os.path.join(ruta, os.path.basename(sub)), sub, profundidad + 1)
+                               for sub in conocida[1]]
+            return archivos, subcarpetas, mtime_ns
+
+        with os.scandir(ruta) as entradas:
+            for entrada in entradas:
+
+                # Ignorar archivos y carpetas ocultos (los que empiezan con '.')
+                if entrada.name.startswith('.'):
+                    continue
+
+                ruta_relativa = os.path.join(
+                    relativa, entrada.name) if relativa else entrada.name
+
+                if patron_excluir and coincide_patron(patron_excluir, entrada.name, ruta_relativa):
+                    continue
+
+                # DirEntry guarda el tipo que devuelve el sistema al listar, así que is_dir/is_file no hacen un stat extra.
+                if entrada.is_dir(follow_symlinks=False):
+                    # Las carpetas de destino de la raíz (Imágenes, Documentos...) no se vuelven a organizar.
+                    if profundidad == 0 and entrada.name in carpetas_excluidas:
+                        continue
+                    if profundidad_max is None or profundidad < profundidad_max:
+                        subcarpetas.append(
+                            (entrada.path, ruta_relativa, profundidad + 1))
+
+                elif entrada.is_file():
+                    if patron_incluir and not coincide_patron(patron_incluir, entrada.name, ruta_relativa):
+                        continue
+                    archivos.append((ruta_relativa, entrada))
+
+    except OSError as e:
+        # Si falla la carpeta raíz, el error se propaga, en subcarpetas solo avisamos y seguimos.
+        if profundidad == 0:
+            raise
+        print(f"\n   ⚠️ No se pudo leer la subcarpeta '{relativa}': {e}")
+
+    return archivos, subcarpetas, mtime_ns
+
+
+# Recorre el directorio (y sus subcarpetas hasta 'profundidad_max', None = sin límite) en paralelo, generando los archivos a medida que se encuentran.
+# Para el modo incremental: 'carpetas_conocidas' (ruta relativa -> (mtime, subcarpetas)) evita listar carpetas sin cambios, y 'carpetas_vistas' se rellena con el estado actual.
+def escanear_directorio(directorio: str, profundidad_max: Optional[int] = 0,
+                        incluir: Optional[List[str]] = None, excluir: Optional[List[str]] = None,
+                        carpetas_excluidas: Iterable[str] = (), hilos: int = HILOS_ESCANEO,
+                        carpetas_conocidas: Optional[Dict[str, Tuple[int, List[str]]]] = None,
+                        carpetas_vistas: Optional[Dict[str, Tuple[int, List[str]]]] = None) -> Iterator[Tuple[str, os.DirEntry]]:
 
-# Clasifica los archivos por extensión, crea las carpetas y mueve los archivos, retorna un diccionario con estadísticas de la operación.
-def clasificar_y_mover_archivos(directorio: str, archivos_mover: List[str]) -> Dict[str, Any]:
+    # 1. Compilar los patrones una sola vez para todo el recorrido.
+    patron_incluir = compilar_patrones(incluir)
+    patron_excluir = compilar_patrones(excluir)
+    excluidas = set(carpetas_excluidas)
+    conocidas = carpetas_conocidas or {}
+
+    pool = ThreadPoolExecutor(max_workers=hilos)
+    # Ruta relativa de la carpeta que lista cada tarea.
+    carpeta_de_tarea: Dict[Future, str] = {}
+
+    # Lanza el listado de una carpeta en el pool.
+    def lanzar(ruta: str, relativa: str, profundidad: int) -> Future:
+        tarea = pool.submit(listar_carpeta, ruta, relativa, profundidad, profundidad_max,
+                            patron_incluir, patron_excluir, excluidas, conocidas.get(relativa))
+        carpeta_de_tarea[tarea] = relativa
+        return tarea
+
+    try:
+        # 2. Empezamos por la raíz, cada carpeta listada añade sus subcarpetas como nuevas tareas.
+        pendientes = {lanzar(directorio, "", 0)}
+        while pendientes:
+            terminadas, pendientes = wait(
+                pendientes, return_when=FIRST_COMPLETED)
+            for tarea in terminadas:
+                archivos, subcarpetas, mtime_ns = tarea.result()
+                relativa = carpeta_de_tarea.pop(tarea)
+                if carpetas_vistas is not None and mtime_ns:
+                    carpetas_vistas[relativa] = (
+                        mtime_ns, [sub for _, sub, _ in subcarpetas])
+
+                # 3. Lanzar primero las subcarpetas, para que sigan escaneándose mientras se consumen los archivos.
+                for ruta, relativa_sub, profundidad in subcarpetas:
+                    pendientes.add(lanzar(ruta, relativa_sub, profundidad))
+
+                # 4. Entregar los archivos de forma perezosa (el organizador puede empezar antes de que acabe el escaneo).
+                yield from archivos
+    finally:
+        # Si el consumidor deja de iterar, cancelamos lo que quede pendiente.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# --- DETECCIÓN DE DUPLICADOS ---
+
+# Calcula un hash BLAKE2 del principio y del final del archivo (BLOQUE_HASH_PARCIAL bytes de cada extremo), si el archivo es pequeño cubre el archivo entero.
+def hash_parcial(ruta: str) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, 'rb') as f:
+        tamano = os.fstat(f.fileno()).st_size
+        if tamano <= 2 * BLOQUE_HASH_PARCIAL:
+            h.update(f.read())
+        else:
+            h.update(f.read(BLOQUE_HASH_PARCIAL))
+            f.seek(-BLOQUE_HASH_PARCIAL, os.SEEK_END)
+            h.update(f.read(BLOQUE_HASH_PARCIAL))
+    return h.digest()
+
+
+# Calcula el hash BLAKE2 del contenido completo del archivo, leyendo por bloques para no cargarlo entero en memoria.
+def hash_completo(ruta: str) -> bytes:
+    h = hashlib.blake2b()
+    with open(ruta, 'rb') as f:
+        while bloque := f.read(TAMANO_BLOQUE_LECTURA):
+            h.update(bloque)
+    return h.digest()
+
+
+# Separa cada grupo de candidatos según el resultado de 'funcion_hash' (calculada en el pool), descarta los grupos que quedan con un solo archivo.
+def refinar_grupos(pool: ThreadPoolExecutor, grupos: List[List[str]], funcion_hash) -> List[List[str]]:
+
+    # Los archivos ilegibles (permisos, borrados durante el proceso) dan None y quedan fuera.
+    def hash_seguro(ruta: str) -> Optional[bytes]:
+        try:
+            return funcion_hash(ruta)
+        except OSError:
+            return None
+
+    rutas = [ruta for grupo in grupos for ruta in grupo]
+    hashes = dict(zip(rutas, pool.map(hash_seguro, rutas)))
+
+    refinados: List[List[str]] = []
+    for grupo in grupos:
+        por_hash: Dict[bytes, List[str]] = defaultdict(list)
+        for ruta in grupo:
+            if hashes[ruta] is not None:
+                por_hash[hashes[ruta]].append(ruta)
+        refinados.extend(g for g in por_hash.values() if len(g) > 1)
+    return refinados
+
+
+# Busca archivos con contenido idéntico a partir de pares (ruta, tamaño), retorna grupos de duplicados (el primero de cada grupo se considera el original).
+def buscar_duplicados(archivos: Iterable[Tuple[str, int]], hilos: int = HILOS_HASH) -> List[List[str]]:
+
+    # 1. Agrupar por tamaño: dos archivos de distinto tamaño nunca son iguales, y no hace falta leerlos.
+    # Guardamos el tamaño de cada ruta para no volver a pedirlo (el archivo puede haber desaparecido desde el escaneo).
+    por_tamano: Dict[int, List[str]] = defaultdict(list)
+    tamanos: Dict[str, int] = {}
+    for ruta, tamano in archivos:
+        por_tamano[tamano].append(ruta)
+        tamanos[ruta] = tamano
+
+    candidatos = [sorted(rutas) for rutas in por_tamano.values() if len(rutas) > 1]
+    if not candidatos:
+        return []
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        # 2. Hash parcial (primeros y últimos 64 KB) de los que comparten tamaño.
+        grupos = refinar_grupos(pool, candidatos, hash_parcial)
+
+        # 3. Hash completo solo de los supervivientes grandes, en los pequeños el hash parcial ya cubría todo el contenido.
+        pequenos = [g for g in grupos if tamanos[g[0]]
+                    <= 2 * BLOQUE_HASH_PARCIAL]
+        grandes = [g for g in grupos if tamanos[g[0]]
+                   > 2 * BLOQUE_HASH_PARCIAL]
+        grupos = pequenos + refinar_grupos(pool, grandes, hash_completo)
+
+    return sorted(sorted(g) for g in grupos)
+
+
+# Comprueba si dos archivos tienen el mismo contenido con el mismo embudo (tamaño, hash parcial, hash completo).
+def son_identicos(ruta_a: str, ruta_b: str) -> bool:
+    try:
+        tamano = os.path.getsize(ruta_a)
+        if tamano != os.path.getsize(ruta_b):
+            return False
+        if os.path.samefile(ruta_a, ruta_b):
+            return True
+        if hash_parcial(ruta_a) != hash_parcial(ruta_b):
+            return False
+        return tamano <= 2 * BLOQUE_HASH_PARCIAL or hash_completo(ruta_a) == hash_completo(ruta_b)
+    except OSError:
+        return False
+
+
+# Sustituye cada copia por un enlace duro al original del grupo (mismo contenido, un solo espacio en disco), retorna (enlazados, bytes liberados, errores).
+def enlazar_duplicados(grupos: List[List[str]]) -> Tuple[int, int, int]:
+    enlazados = 0
+    liberados = 0
+    errores = 0
+
+    for original, *copias in grupos:
+        for copia in copias:
+            try:
+                # Ya es un enlace al mismo archivo, no hay nada que hacer.
+                if os.path.samefile(original, copia):
+                    continue
+                tamano = os.path.getsize(copia)
+                # Creamos el enlace con un nombre temporal y lo renombramos encima, así la copia nunca desaparece a medias.
+                ruta_temporal = copia + ".enlace_tmp"
+                os.link(original, ruta_temporal)
+                os.replace(ruta_temporal, copia)
+                enlazados += 1
+                liberados += tamano
+            except OSError as e:
+                print(f"   ❌ No se pudo enlazar '{copia}': {e}")
+                errores += 1
+
+    return enlazados, liberados, errores
+
+
+# Busca duplicados en un directorio (con subcarpetas) y los informa o, con accion='enlazar', los sustituye por enlaces duros.
+def procesar_duplicados(directorio: str, accion: str = "informar", profundidad_max: Optional[int] = None):
+
+    directorio = os.path.abspath(directorio)
+    print(f"\n--- 🔍 BUSCADOR DE DUPLICADOS ---")
+    print(f"📁 Escaneando directorio: {directorio}")
+
+    if not os.path.isdir(directorio):
+        print(
+            f"❌ Error: El directorio '{directorio}' no existe, por favor, revísalo.")
+        return
+
+    # 1. Escanear y agrupar por contenido.
+    inicio = time.perf_counter()
+    grupos = buscar_duplicados((entrada.path, entrada.stat().st_size)
+                               for _, entrada in escanear_directorio(directorio, profundidad_max))
+    duracion = time.perf_counter() - inicio
+
+    if not grupos:
+        print(f"✅ No se encontraron duplicados ({duracion:.2f} s).")
+        return
+
+    # 2. Informe: cada grupo con su original y sus copias.
+    copias = sum(len(g) - 1 for g in grupos)
+    recuperable = sum(os.path.getsize(g[0]) * (len(g) - 1) for g in grupos)
+    print(f"\n--- 📋 {len(grupos)} GRUPOS DE DUPLICADOS ({duracion:.2f} s) ---")
+    for original, *resto in grupos[:MAX_GRUPOS_MOSTRADOS]:
+        print(f"\n📄 {os.path.relpath(original, directorio)}")
+        for copia in resto:
+            print(f"   = {os.path.relpath(copia, directorio)}")
+    if len(grupos) > MAX_GRUPOS_MOSTRADOS:
+        print(f"\n... y {len(grupos) - MAX_GRUPOS_MOSTRADOS} grupos más.")
+    print(
+        f"\nCopias redundantes: {copias} ({recuperable / 1024 / 1024:.1f} MB recuperables)")
+
+    # 3. Acción opcional: sustituir las copias por enlaces duros.
+    if accion == "enlazar":
+        enlazados, liberados, errores = enlazar_duplicados(grupos)
+        print(
+            f"🔗 {enlazados} copias sustituidas por enlaces duros ({liberados / 1024 / 1024:.1f} MB liberados), errores: {errores}")
+
+
+# --- CLASIFICACIÓN Y MOVIMIENTO ---
+
+# Copia un archivo creando el destino en modo exclusivo ('x' = O_EXCL), así nunca se sobrescribe uno existente (lanza FileExistsError).
+def copiar_sin_sobrescribir(ruta_origen: str, ruta_destino: str):
+    with open(ruta_origen, 'rb') as origen:
+        with open(ruta_destino, 'xb') as destino:
+            try:
+                shutil.copyfileobj(origen, destino, TAMANO_BLOQUE_LECTURA)
+            except BaseException:
+                destino.close()
+                os.remove(ruta_destino)
+                raise
+    # Conserva fechas y permisos como copy2.
+    shutil.copystat(ruta_origen, ruta_destino)
+
+
+# Mueve un archivo SIN sobrescribir el destino: os.rename lo pisaría en POSIX, así que antes se comprueba que no exista (lanza FileExistsError).
+# En el mismo dispositivo es un rename (no copia datos), solo entre dispositivos (EXDEV) se copia en modo exclusivo y se borra el original.
+def mover_archivo(ruta_origen: str, ruta_destino: str):
+    if os.path.lexists(ruta_destino):
+        raise FileExistsError(errno.EEXIST, "El destino ya existe", ruta_destino)
+    try:
+        os.rename(ruta_origen, ruta_destino)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        # El original solo se borra si la copia terminó bien.
+        copiar_sin_sobrescribir(ruta_origen, ruta_destino)
+        os.remove(ruta_origen)
+
+
+# Mueve un lote de archivos (rutas relativas a 'directorio') a la misma carpeta de destino, retorna (archivos movidos, archivos con conflicto de nombre, errores como (archivo, mensaje)).
+def mover_lote(directorio: str, ruta_destino: str, lote: List[str]) -> Tuple[List[str], List[str], List[Tuple[str, str]]]:
+    movidos: List[str] = []
+    ignorados: List[str] = []
+    errores: List[Tuple[str, str]] = []
+
+    for archivo in lote:
+        try:
+            mover_archivo(os.path.join(directorio, archivo),
+                          os.path.join(ruta_destino, os.path.basename(archivo)))
+            movidos.append(archivo)
+        # El destino ya existe (aparecido después de listar la carpeta), mover_archivo nunca lo sobrescribe.
+        except FileExistsError:
+            ignorados.append(archivo)
+        except Exception as e:
+            errores.append((archivo, str(e)))
+
+    return movidos, ignorados, errores
+
+
+# Crea la carpeta de destino si no existe y retorna los nombres que ya contiene, o None si no se pudo preparar.
+def preparar_carpeta(directorio: str, nombre_carpeta: str, estadisticas: Dict[str, Any]) -> Optional[Set[str]]:
+    ruta_destino = os.path.join(directorio, nombre_carpeta)
+    try:
+        if os.path.isdir(ruta_destino):
+            # Leemos la carpeta una vez para detectar conflictos sin hacer un stat por archivo.
+            return set(os.listdir(ruta_destino))
+        os.makedirs(ruta_destino)
+        estadisticas["carpetas_creadas"].add(nombre_carpeta)
+        print(f"\n   -> Carpeta '{nombre_carpeta}' creada.")
+        return set()
+
+    # Manejo de errores si, por ejemplo, los permisos fallan.
+    except Exception as e:
+        print(
+            f"\n❌ Error al crear la carpeta '{nombre_carpeta}': {e}, se saltarán sus archivos.")
+        return None
+
+
+# Muestra el progreso en una sola línea que se sobrescribe, en lugar de una línea por archivo ('total' es None si el escaneo sigue en curso).
+def mostrar_progreso(procesados: int, total: Optional[int], inicio: float):
+    transcurrido = max(time.perf_counter() - inicio, 1e-9)
+    progreso = f"{procesados}/{total} archivos ({procesados * 100 / total:.0f}%)" if total else f"{procesados} archivos"
+    print(f"\r   ⏳ {progreso} - {procesados / transcurrido:.0f} archivos/s",
+          end="", flush=True)
+
+
+# Clasifica los archivos por extensión, crea las carpetas y mueve los archivos en paralelo, retorna un diccionario con estadísticas de la operación.
+# En 'movimientos' quedan los pares (origen, destino) relativos a 'directorio' de cada archivo movido, en 'en_conflicto' los pares de los que no se movieron
+# porque el destino ya existía, y en 'fallidos' los archivos que dieron error.
+# 'archivos_mover' son rutas relativas a 'directorio' y puede ser un generador (ej. el escáner), los movimientos empiezan sin esperar a tener la lista completa.
+def clasificar_y_mover_archivos(directorio: str, archivos_mover: Iterable[str]) -> Dict[str, Any]:
 
     # Inicializar estadísticas
     estadisticas: Dict[str, Any] = {
+        "procesados": 0,
         "movidos": 0,
         "ignorados": 0,
         "errores": 0,
-        "carpetas_creadas": set()
+        "duplicados": 0,
+        "carpetas_creadas": set(),
+        "movimientos": [],
+        "en_conflicto": [],
+        "fallidos": []
     }
 
-    print(f"\n🚀 Iniciando clasificación de {len(archivos_mover)} archivos...")
+    total = len(archivos_mover) if isinstance(archivos_mover, Sized) else None
+    print(
+        f"\n🚀 Iniciando clasificación{f' de {total} archivos' if total is not None else ''}...")
 
-    # Itera sobre la lista de nombres de archivo que deben ser movidos.
-    for archivo in archivos_mover:
+    # Nombres ocupados en cada carpeta de destino (None si la carpeta no se pudo crear) y lotes pendientes de enviar al pool.
+    existentes_por_carpeta: Dict[str, Optional[Set[str]]] = {}
+    lotes: Dict[str, List[str]] = defaultdict(list)
+    tareas: Set[Future] = set()
+    # Pares (origen, destino) con conflicto de nombre, se comparan por contenido al final.
+    conflictos: List[Tuple[str, str]] = []
+    terminados = 0
+    inicio = time.perf_counter()
 
-        # 1. Extracción de la extensión y normalización
-        _, extension = os.path.splitext(archivo)
-        extension_limpia = extension[1:].lower()
+    # Carpeta de destino del lote de cada tarea, para anotar los movimientos.
+    carpeta_de_tarea: Dict[Future, str] = {}
 
-        # 2. Determinar la carpeta de destino
-        nombre_carpeta = TIPOS_ARCHIVOS.get(extension_limpia, OTRAS_CARPETAS)
+    # Acumula el resultado de las tareas terminadas y actualiza la línea de progreso.
+    def recoger(completadas: Iterable[Future]):
+        nonlocal terminados
+        for tarea in completadas:
+            movidos, ignorados, errores = tarea.result()
+            nombre_carpeta = carpeta_de_tarea.pop(tarea)
+            estadisticas["movimientos"].extend(
+                (archivo, os.path.join(nombre_carpeta, os.path.basename(archivo))) for archivo in movidos)
+            estadisticas["en_conflicto"].extend(
+                (archivo, os.path.join(nombre_carpeta, os.path.basename(archivo))) for archivo in ignorados)
+            estadisticas["movidos"] += len(movidos)
+            estadisticas["ignorados"] += len(ignorados)
+            estadisticas["errores"] += len(errores)
+            estadisticas["fallidos"].extend(errores)
+            terminados += len(movidos) + len(ignorados) + len(errores)
+            mostrar_progreso(terminados, total, inicio)
 
-        # 3. Construir rutas de Origen y Destino
-        ruta_origen = os.path.join(directorio, archivo)
-        ruta_destino = os.path.join(directorio, nombre_carpeta)
-        ruta_destino_final = os.path.join(ruta_destino, archivo)
+    with ThreadPoolExecutor(max_workers=HILOS_MOVIMIENTO) as pool:
 
-        # 4. Asegurar la existencia de la carpeta de destino.
-        try:
-            # Crea la carpeta, exist_ok=True evita el error si la carpeta ya existe.
-            if not os.path.exists(ruta_destino):
-                os.makedirs(ruta_destino)
-                estadisticas["carpetas_creadas"].add(nombre_carpeta)
-                print(f"   -> Carpeta '{nombre_carpeta}' creada.")
+        # Envía el lote acumulado de una carpeta al pool.
+        def enviar_lote(nombre_carpeta: str):
+            lote = lotes.pop(nombre_carpeta)
+            tarea = pool.submit(mover_lote, directorio,
+                                os.path.join(directorio, nombre_carpeta), lote)
+            carpeta_de_tarea[tarea] = nombre_carpeta
+            tareas.add(tarea)
 
-        # Manejo de errores si, por ejemplo, los permisos fallan.
-        except Exception as e:
-            print(
-                f"❌ Error al crear la carpeta '{nombre_carpeta}': {e}, saltando archivo.")
-            estadisticas["errores"] += 1
-            continue
+        for archivo in archivos_mover:
+            estadisticas["procesados"] += 1
 
-        # 5. Mover el archivo
-        try:
-            # shutil.move(origen, destino) mueve el archivo.
-            shutil.move(ruta_origen, ruta_destino_final)
-            estadisticas["movidos"] += 1
-            print(f"   ✅ Movido: '{archivo}' -> '{nombre_carpeta}'")
-
-        # Maneja el caso común de que el archivo ya exista en el destino (shutil.Error).
-        except shutil.Error as e:
-            # Podría ser un error de "mismo archivo", lo ignoramos y contamos como ignorado.
-            print(
-                f"   ⚠️ Archivo ya existe o no se pudo mover: '{archivo}'. Ignorado.")
-            estadisticas["ignorados"] += 1
-        except Exception as e:
-            print(f"   ❌ Error desconocido al mover '{archivo}': {e}")
-            estadisticas["errores"] += 1
+            # 1. Determinar la carpeta de destino y prepararla solo la primera vez que aparece.
+            nombre_carpeta = obtener_carpeta_destino(archivo, directorio)
+            if nombre_carpeta not in existentes_por_carpeta:
+                existentes_por_carpeta[nombre_carpeta] = preparar_carpeta(
+                    directorio, nombre_carpeta, estadisticas)
+            existentes = existentes_por_carpeta[nombre_carpeta]
+
+            if existentes is None:
+                estadisticas["errores"] += 1
+                estadisticas["fallidos"].append(
+                    (archivo, f"no se pudo crear la carpeta '{nombre_carpeta}'"))
+                terminados += 1
+                continue
+
+            # 2. Conflicto de nombre: ya existe en el destino (o lo ocupa otro archivo de este mismo plan).
+            nombre = os.path.basename(archivo)
+            if nombre in existentes:
+                estadisticas["ignorados"] += 1
+                estadisticas["en_conflicto"].append(
+                    (archivo, os.path.join(nombre_carpeta, nombre)))
+                terminados += 1
+                conflictos.append((os.path.join(directorio, archivo),
+                                   os.path.join(directorio, nombre_carpeta, nombre)))
+                continue
+            existentes.add(nombre)
+
+            # 3. Acumular en el lote de su carpeta y enviarlo al pool cuando está lleno.
+            lotes[nombre_carpeta].append(archivo)
+            if len(lotes[nombre_carpeta]) >= TAMANO_LOTE:
+                enviar_lote(nombre_carpeta)
+
+                # Si hay demasiadas tareas en cola, esperamos a que terminen algunas (memoria acotada).
+                if len(tareas) >= HILOS_MOVIMIENTO * 4:
+                    completadas, pendientes = wait(
+                        tareas, return_when=FIRST_COMPLETED)
+                    tareas.intersection_update(pendientes)
+                    recoger(completadas)
+
+        # 4. Enviar los lotes incompletos y esperar a todas las tareas.
+        for nombre_carpeta in list(lotes):
+            enviar_lote(nombre_carpeta)
+        recoger(as_completed(tareas))
+
+    print()
+
+    # 5. Comprobar si los archivos ignorados son duplicados idénticos del que ya está en el destino o solo comparten nombre.
+    if conflictos:
+        with ThreadPoolExecutor(max_workers=HILOS_HASH) as pool:
+            estadisticas["duplicados"] = sum(
+                pool.map(lambda par: son_identicos(*par), conflictos))
+
+    # 6. Resumen de errores (solo los primeros, para no inundar la consola).
+    for archivo, mensaje in estadisticas["fallidos"][:MAX_ERRORES_MOSTRADOS]:
+        print(f"   ❌ Error al mover '{archivo}': {mensaje}")
+    if len(estadisticas["fallidos"]) > MAX_ERRORES_MOSTRADOS:
+        print(
+            f"   ... y {len(estadisticas['fallidos']) - MAX_ERRORES_MOSTRADOS} errores más.")
 
     return estadisticas
 
 
-# Función principal que escanea el directorio y prepara la lista de archivos.
-def organizar_archivos(directorio: str):
+# --- ÍNDICE INCREMENTAL Y DIARIO PARA DESHACER ---
+
+# Índice SQLite (guardado dentro de la carpeta organizada) con el estado de carpetas y archivos de la última ejecución y el diario de movimientos.
+class IndiceArchivos:
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        self.conn = sqlite3.connect(os.path.join(directorio, NOMBRE_INDICE))
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS META (
+            clave TEXT PRIMARY KEY,
+            valor TEXT
+        );
+        -- mtime de cada carpeta escaneada y sus subcarpetas (JSON), para no volver a listar las que no cambian.
+        CREATE TABLE IF NOT EXISTS CARPETAS (
+            ruta TEXT PRIMARY KEY,
+            mtime_ns INTEGER,
+            subcarpetas TEXT
+        );
+        -- Estado de cada archivo procesado (en su ruta final) y la categoría elegida.
+        CREATE TABLE IF NOT EXISTS ARCHIVOS (
+            ruta TEXT PRIMARY KEY,
+            tamano INTEGER,
+            mtime_ns INTEGER,
+            inodo INTEGER,
+            categoria TEXT
+        );
+        -- Archivos que no se movieron porque su destino ya existía: no cuentan como procesados y se reintentan en la próxima ejecución.
+        CREATE TABLE IF NOT EXISTS CONFLICTOS (
+            ruta TEXT PRIMARY KEY,
+            destino TEXT,
+            fecha TEXT
+        );
+        CREATE TABLE IF NOT EXISTS EJECUCIONES (
+            id INTEGER PRIMARY KEY,
+            fecha TEXT,
+            carpetas_creadas TEXT,
+            deshecha INTEGER DEFAULT 0
+        );
+        -- Diario de movimientos de cada ejecución, en orden, para poder deshacerla.
+        CREATE TABLE IF NOT EXISTS DIARIO (
+            ejecucion_id INTEGER,
+            orden INTEGER,
+            origen TEXT,
+            destino TEXT,
+            FOREIGN KEY (ejecucion_id) REFERENCES EJECUCIONES(id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS idx_diario_ejecucion ON DIARIO(ejecucion_id);
+        """)
+
+    def cerrar(self):
+        self.conn.close()
+
+    # Devuelve las carpetas conocidas, si la configuración (firma) cambió desde la última ejecución se olvidan para forzar un escaneo completo.
+    def cargar_carpetas(self, firma: str) -> Dict[str, Tuple[int, List[str]]]:
+        fila = self.conn.execute(
+            "SELECT valor FROM META WHERE clave = 'firma'").fetchone()
+        if not fila or fila[0] != firma:
+            with self.conn:
+                self.conn.execute("DELETE FROM CARPETAS")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO META (clave, valor) VALUES ('firma', ?)", (firma,))
+            return {}
+        return {ruta: (mtime_ns, json.loads(subcarpetas))
+                for ruta, mtime_ns, subcarpetas in self.conn.execute("SELECT ruta, mtime_ns, subcarpetas FROM CARPETAS")}
+
+    # Comprueba si un archivo ya fue procesado y no ha cambiado (mismo tamaño, mtime e inodo).
+    def archivo_sin_cambios(self, ruta: str, estado: os.stat_result) -> bool:
+        fila = self.conn.execute(
+            "SELECT tamano, mtime_ns, inodo FROM ARCHIVOS WHERE ruta = ?", (ruta,)).fetchone()
+        return fila == (estado.st_size, estado.st_mtime_ns, estado.st_ino)
+
+    # Devuelve los conflictos (origen, destino) pendientes de ejecuciones anteriores.
+    def conflictos_pendientes(self) -> List[Tuple[str, str]]:
+        return self.conn.execute("SELECT ruta, destino FROM CONFLICTOS ORDER BY ruta").fetchall()
+
+    # Guarda el resultado de una ejecución en UNA transacción: diario de movimientos, estado de los archivos y mtime de las carpetas.
+    # Los archivos 'fallidos' no se guardan y sus carpetas quedan sin mtime, para reintentarlos en la próxima ejecución.
+    # Los 'conflictos' (origen, destino) tampoco cuentan como procesados: se anotan aparte y se reintentan igual que los fallidos.
+    def registrar_ejecucion(self, movimientos: List[Tuple[str, str]], estados: Dict[str, os.stat_result],
+                            carpetas_vistas: Dict[str, Tuple[int, List[str]]], carpetas_creadas: Set[str],
+                            fallidos: Iterable[str] = (), conflictos: Iterable[Tuple[str, str]] = ()):
+        with self.conn:
+            # 1. Diario de la ejecución (solo si se movió algo).
+            if movimientos:
+                cursor = self.conn.execute("INSERT INTO EJECUCIONES (fecha, carpetas_creadas) VALUES (datetime('now'), ?)",
+                                           (json.dumps(sorted(carpetas_creadas)),))
+                self.conn.executemany("INSERT INTO DIARIO (ejecucion_id, orden, origen, destino) VALUES (?, ?, ?, ?)",
+                                      ((cursor.lastrowid, orden, origen, destino) for orden, (origen, destino) in enumerate(movimientos)))
+
+            # 2. Estado de los archivos: los movidos en su ruta de destino, el resto (conflictos, errores) donde están.
+            destinos = dict(movimientos)
+            fallidos = set(fallidos)
+            conflictos = dict(conflictos)
+            # La categoría de los movidos es la primera carpeta de su destino, la de los demás se vuelve a calcular.
+            self.conn.executemany("INSERT OR REPLACE INTO ARCHIVOS (ruta, tamano, mtime_ns, inodo, categoria) VALUES (?, ?, ?, ?, ?)",
+                                  ((destinos.get(ruta, ruta), estado.st_size, estado.st_mtime_ns, estado.st_ino,
+                                    destinos[ruta].split(os.sep)[0] if ruta in destinos else obtener_carpeta_destino(ruta, self.directorio))
+                                   for ruta, estado in estados.items() if ruta not in fallidos and ruta not in conflictos))
+
+            # 3. Conflictos: se guardan los nuevos y se olvidan los que ya se resolvieron (movidos, procesados sin conflicto o desaparecidos).
+            self.conn.executemany("INSERT OR REPLACE INTO CONFLICTOS (ruta, destino, fecha) VALUES (?, ?, datetime('now'))",
+                                  conflictos.items())
+            resueltos = {origen for origen, _ in movimientos} | (
+                estados.keys() - conflictos.keys())
+            resueltos.update(ruta for ruta, _ in self.conflictos_pendientes()
+                             if ruta not in conflictos and not os.path.exists(os.path.join(self.directorio, ruta)))
+            self.conn.executemany("DELETE FROM CONFLICTOS WHERE ruta = ?",
+                                  ((ruta,) for ruta in resueltos))
+
+            # 4. mtime de las carpetas: las que perdieron archivos (y la raíz, donde se crean las carpetas) cambiaron por nuestros propios movimientos, así que se vuelven a leer.
+            # Limitación: un archivo que llegue a esas carpetas justo durante la ejecución no se verá hasta que la carpeta vuelva a cambiar.
+            tocadas = {os.path.dirname(origen)
+                       for origen, _ in movimientos} | {""}
+            for relativa in tocadas & carpetas_vistas.keys():
+                try:
+                    mtime_ns = os.stat(os.path.join(
+                        self.directorio, relativa)).st_mtime_ns
+                except OSError:
+                    continue
+                carpetas_vistas[relativa] = (
+                    mtime_ns, carpetas_vistas[relativa][1])
+            for relativa in {os.path.dirname(ruta) for ruta in fallidos | conflictos.keys()} & carpetas_vistas.keys():
+                carpetas_vistas[relativa] = (0, carpetas_vistas[relativa][1])
+            self.conn.executemany("INSERT OR REPLACE INTO CARPETAS (ruta, mtime_ns, subcarpetas) VALUES (?, ?, ?)",
+                                  ((ruta, mtime_ns, json.dumps(subcarpetas)) for ruta, (mtime_ns, subcarpetas) in carpetas_vistas.items()))
+
+    # Devuelve (id, carpetas creadas, movimientos) de la última ejecución que no se ha deshecho, o None.
+    def ultima_ejecucion(self) -> Optional[Tuple[int, List[str], List[Tuple[str, str]]]]:
+        fila = self.conn.execute(
+            "SELECT id, carpetas_creadas FROM EJECUCIONES WHERE deshecha = 0 ORDER BY id DESC LIMIT 1").fetchone()
+        if not fila:
+            return None
+        movimientos = self.conn.execute(
+            "SELECT origen, destino FROM DIARIO WHERE ejecucion_id = ? ORDER BY orden", (fila[0],)).fetchall()
+        return fila[0], json.loads(fila[1]), movimientos
+
+    # Marca una ejecución como deshecha y olvida el estado de los archivos devueltos a su sitio (se volverán a procesar).
+    def marcar_deshecha(self, ejecucion_id: int, devueltos: List[Tuple[str, str]]):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE EJECUCIONES SET deshecha = 1 WHERE id = ?", (ejecucion_id,))
+            self.conn.executemany("DELETE FROM ARCHIVOS WHERE ruta = ?",
+                                  ((destino,) for _, destino in devueltos))
+            self.conn.execute("DELETE FROM CARPETAS")
+
+
+# Calcula una firma de la configuración que afecta al escaneo y la clasificación, si cambia el índice de carpetas deja de ser válido.
+def firma_configuracion(profundidad_max: Optional[int], incluir: Optional[List[str]], excluir: Optional[List[str]]) -> str:
+    obtener_clasificador()
+    configuracion = [profundidad_max, incluir, excluir,
+                     sorted(TIPOS_ARCHIVOS.items()), OTRAS_CARPETAS, REGLAS_USUARIO]
+    return hashlib.blake2b(json.dumps(configuracion).encode("utf-8"), digest_size=16).hexdigest()
+
+
+# Deshace la última organización registrada en el índice de la carpeta: devuelve cada archivo a su origen (en orden inverso) y borra las carpetas creadas si quedan vacías.
+def deshacer_ultima_organizacion(directorio: str):
+
+    directorio = os.path.abspath(directorio)
+    if not os.path.exists(os.path.join(directorio, NOMBRE_INDICE)):
+        print(f"ℹ️ La carpeta '{directorio}' no tiene un índice de organización.")
+        return
+
+    indice = IndiceArchivos(directorio)
+    try:
+        ejecucion = indice.ultima_ejecucion()
+        if not ejecucion:
+            print("ℹ️ No hay ninguna organización que deshacer.")
+            return
+        ejecucion_id, carpetas_creadas, movimientos = ejecucion
+        print(
+            f"\n↩️ Deshaciendo la organización {ejecucion_id} ({len(movimientos)} archivos)...")
+
+        devueltos: List[Tuple[str, str]] = []
+        errores = 0
+        for origen, destino in reversed(movimientos):
+            ruta_origen = os.path.join(directorio, origen)
+            ruta_destino = os.path.join(directorio, destino)
+            try:
+                # No pisamos nada que haya aparecido en el origen después de organizar.
+                if os.path.exists(ruta_origen):
+                    raise FileExistsError(f"'{origen}' ya existe")
+                os.makedirs(os.path.dirname(ruta_origen), exist_ok=True)
+                mover_archivo(ruta_destino, ruta_origen)
+                devueltos.append((origen, destino))
+            except OSError as e:
+                errores += 1
+                if errores <= MAX_ERRORES_MOSTRADOS:
+                    print(f"   ❌ No se pudo devolver '{destino}': {e}")
+
+        # Las carpetas creadas por la ejecución se borran solo si han quedado vacías.
+        for carpeta in carpetas_creadas:
+            try:
+                os.rmdir(os.path.join(directorio, carpeta))
+            except OSError:
+                pass
+
+        indice.marcar_deshecha(ejecucion_id, devueltos)
+        print(
+            f"✅ {len(devueltos)} archivos devueltos a su ubicación original, errores: {errores}")
+    finally:
+        indice.cerrar()
+
+
+# Función principal que escanea el directorio y mueve los archivos a medida que el escáner los encuentra.
+# 'profundidad_max' = 0 organiza solo el nivel superior, None recorre todas las subcarpetas, 'incluir'/'excluir' son patrones glob.
+# Con 'omitir_duplicados' se hace antes una pasada de duplicados y solo se mueve el original de cada grupo (las copias se quedan donde están).
+# Con 'incremental' se usa el índice de la carpeta: solo se listan las carpetas que cambiaron y solo se procesan archivos nuevos o modificados.
+def organizar_archivos(directorio: str, profundidad_max: Optional[int] = 0,
+                       incluir: Optional[List[str]] = None, excluir: Optional[List[str]] = None,
+                       omitir_duplicados: bool = False, incremental: bool = False):
 
     # Convierte la ruta a un formato absoluto para evitar ambigüedades.
     directorio = os.path.abspath(directorio)
@@ -108,48 +1047,91 @@ def organizar_archivos(directorio: str):
     print(f"\n--- 🗂️ ORGANIZADOR DE ARCHIVOS ---")
     print(f"📁 Escaneando directorio: {directorio}")
 
-    try:
-        # Obtiene una lista de todos los elementos (archivos y carpetas) del directorio.
-        elementos: List[str] = os.listdir(directorio)
-    except FileNotFoundError:
+    if not os.path.isdir(directorio):
         print(
             f"❌ Error: El directorio '{directorio}' no existe, por favor, revísalo.")
         return
-    except Exception as e:
-        print(f"❌ Error al acceder al directorio: {e}")
-        return
 
-    archivos_mover: List[str] = []
+    # Estado del modo incremental: carpetas del índice, carpetas vistas en este escaneo y stat de cada archivo a procesar.
+    indice = IndiceArchivos(directorio) if incremental else None
+    carpetas_conocidas = indice.cargar_carpetas(firma_configuracion(
+        profundidad_max, incluir, excluir)) if indice else None
+    if indice:
+        pendientes = indice.conflictos_pendientes()
+        if pendientes:
+            print(
+                f"🔁 Se reintentarán {len(pendientes)} archivos que quedaron en conflicto en la ejecución anterior.")
+    carpetas_vistas: Dict[str, Tuple[int, List[str]]] = {}
+    estados: Dict[str, os.stat_result] = {}
 
-    for elemento in elementos:
+    # Las carpetas de destino no se escanean, y el propio script nunca se mueve.
+    carpetas_destino = obtener_carpetas_destino()
+    ruta_script = os.path.abspath(__file__)
 
-        # Filtro adicional: Ignorar archivos ocultos (los que empiezan con '.')
-        if elemento.startswith('.'):
-            continue
+    # Filtra lo que entrega el escáner, en modo incremental descarta los archivos que ya están en el índice sin cambios.
+    def archivos_a_procesar() -> Iterator[str]:
+        for ruta_relativa, entrada in escanear_directorio(directorio, profundidad_max, incluir, excluir, carpetas_destino,
+                                                          carpetas_conocidas=carpetas_conocidas, carpetas_vistas=carpetas_vistas):
+            if entrada.path == ruta_script:
+                continue
+            # El stat del DirEntry se guarda para el índice y para la pasada de duplicados, así cada archivo se consulta una sola vez.
+            if indice or omitir_duplicados:
+                try:
+                    estado = entrada.stat()
+                except OSError:
+                    continue
+                if indice and indice.archivo_sin_cambios(ruta_relativa, estado):
+                    continue
+                estados[ruta_relativa] = estado
+            yield ruta_relativa
 
-        # Genera la ruta completa para verificar si es un archivo.
-        ruta_completa = os.path.join(directorio, elemento)
+    archivos_mover: Iterable[str] = archivos_a_procesar()
+    inicio = time.perf_counter()
 
-        # Filtra: solo queremos los que son archivos (no carpetas).
-        if os.path.isfile(ruta_completa):
-            # Filtro adicional: Ignorar el script de Python si está en la carpeta
-            if elemento != os.path.basename(__file__):
-                archivos_mover.append(elemento)
+    try:
+        # La pasada de duplicados necesita conocer todos los tamaños, así que aquí el escaneo se completa antes de mover.
+        if omitir_duplicados:
+            archivos_mover = list(archivos_mover)
+            grupos = buscar_duplicados(
+                (os.path.join(directorio, ruta), estados[ruta].st_size) for ruta in archivos_mover)
+            copias = {ruta for grupo in grupos for ruta in grupo[1:]}
+            archivos_mover = [ruta for ruta in archivos_mover if os.path.join(
+                directorio, ruta) not in copias]
+            print(
+                f"🔍 {len(copias)} copias duplicadas se dejarán sin mover.")
 
-    if not archivos_mover:
-        print("ℹ️ No se encontraron archivos para mover en este directorio.")
+        # Llama a la función que ejecuta la clasificación y el movimiento mientras el escaneo continúa.
+        stats = clasificar_y_mover_archivos(directorio, archivos_mover)
+        # Guardar el estado y el diario de la ejecución en el índice.
+        if indice:
+            indice.registrar_ejecucion(stats["movimientos"], estados, carpetas_vistas, stats["carpetas_creadas"],
+                                       (archivo for archivo, _ in stats["fallidos"]), stats["en_conflicto"])
+    except Exception as e:
+        print(f"\n❌ Error al acceder al directorio: {e}")
         return
+    finally:
+        if indice:
+            indice.cerrar()
 
-    # Llama a la función que ejecuta la clasificación y el movimiento con los archivos filtrados.
-    stats = clasificar_y_mover_archivos(directorio, archivos_mover)
+    if not stats["procesados"]:
+        mensaje = "nuevos o modificados " if incremental else ""
+        print(
+            f"ℹ️ No se encontraron archivos {mensaje}para mover en este directorio ({time.perf_counter() - inicio:.2f} s).")
+        return
 
     # --- Reporte Final ---
     print("\n------------------------------")
     print("🎉 ¡Organización completada! 🎉")
     print("------------------------------")
-    print(f"Total de archivos procesados: {len(archivos_mover)}")
+    print(
+        f"Total de archivos procesados: {stats['procesados']} en {time.perf_counter() - inicio:.2f} s")
     print(f"Archivos movidos con éxito: {stats['movidos']}")
     print(f"Archivos ignorados (ya existían): {stats['ignorados']}")
+    if stats["ignorados"]:
+        print(
+            f"   - Con contenido idéntico al del destino: {stats['duplicados']}")
+        print(
+            f"   - Mismo nombre pero contenido distinto: {stats['ignorados'] - stats['duplicados']}")
     print(f"Errores encontrados (permisos, etc.): {stats['errores']}")
     if stats["carpetas_creadas"]:
         print("Nuevas carpetas creadas:")
@@ -158,6 +1140,414 @@ def organizar_archivos(directorio: str):
     print("------------------------------")
 
 
+# --- SIMULACIÓN (PLAN SIN MOVER NADA) Y MEDICIÓN POR FASES ---
+
+# Calcula el plan completo de organización de 'directorio' sin tocar ningún archivo, retorna un diccionario exportable a JSON.
+def planificar_organizacion(directorio: str, profundidad_max: Optional[int] = 0,
+                            incluir: Optional[List[str]] = None, excluir: Optional[List[str]] = None) -> Dict[str, Any]:
+
+    directorio = os.path.abspath(directorio)
+    ruta_script = os.path.abspath(__file__)
+    fases: Dict[str, Dict[str, float]] = {}
+
+    # 1. FASE DE ESCANEO: rutas, tamaños y dispositivo de cada archivo.
+    inicio = time.perf_counter()
+    archivos: List[Tuple[str, os.stat_result]] = [
+        (ruta_relativa, entrada.stat())
+        for ruta_relativa, entrada in escanear_directorio(directorio, profundidad_max, incluir, excluir, obtener_carpetas_destino())
+        if entrada.path != ruta_script]
+    total_bytes = sum(estado.st_size for _, estado in archivos)
+    fases["escaneo"] = {"segundos": time.perf_counter() - inicio,
+                        "archivos": len(archivos), "bytes": total_bytes}
+
+    # 2. FASE DE PLAN: carpeta de destino, conflictos y movimientos entre dispositivos.
+    inicio = time.perf_counter()
+    dispositivo_raiz = os.stat(directorio).st_dev
+    # Por cada carpeta de destino: nombres ya ocupados y dispositivo (None si habría que crearla).
+    destinos: Dict[str, Tuple[Set[str], Optional[int]]] = {}
+    movimientos: List[Dict[str, Any]] = []
+
+    for ruta_relativa, estado in archivos:
+        nombre_carpeta = obtener_carpeta_destino(ruta_relativa, directorio)
+        if nombre_carpeta not in destinos:
+            ruta_destino = os.path.join(directorio, nombre_carpeta)
+            if os.path.isdir(ruta_destino):
+                destinos[nombre_carpeta] = (
+                    set(os.listdir(ruta_destino)), os.stat(ruta_destino).st_dev)
+            else:
+                destinos[nombre_carpeta] = (set(), None)
+        ocupados, dispositivo = destinos[nombre_carpeta]
+
+        nombre = os.path.basename(ruta_relativa)
+        conflicto = nombre in ocupados
+        ocupados.add(nombre)
+        movimientos.append({
+            "origen": ruta_relativa,
+            "destino": os.path.join(nombre_carpeta, nombre),
+            "carpeta": nombre_carpeta,
+            "tamano": estado.st_size,
+            "conflicto": conflicto,
+            # Una carpeta nueva se crea en la raíz, así que hereda su dispositivo.
+            "entre_dispositivos": estado.st_dev != (dispositivo if dispositivo is not None else dispositivo_raiz),
+        })
+    fases["plan"] = {"segundos": time.perf_counter() - inicio,
+                     "archivos": len(archivos), "bytes": total_bytes}
+
+    # 3. Resumen del plan.
+    bytes_por_categoria: Dict[str, int] = defaultdict(int)
+    archivos_por_categoria: Dict[str, int] = defaultdict(int)
+    for movimiento in movimientos:
+        bytes_por_categoria[movimiento["carpeta"]] += movimiento["tamano"]
+        archivos_por_categoria[movimiento["carpeta"]] += 1
+
+    return {
+        "directorio": directorio,
+        "generado": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "resumen": {
+            "archivos": len(movimientos),
+            "bytes": total_bytes,
+            "archivos_por_categoria": dict(sorted(archivos_por_categoria.items())),
+            "bytes_por_categoria": dict(sorted(bytes_por_categoria.items())),
+            "carpetas_a_crear": sorted(c for c, (_, dispositivo) in destinos.items() if dispositivo is None),
+            "conflictos": sum(1 for m in movimientos if m["conflicto"]),
+            "bytes_entre_dispositivos": sum(m["tamano"] for m in movimientos if m["entre_dispositivos"] and not m["conflicto"]),
+        },
+        "fases": fases,
+        "movimientos": movimientos,
+    }
+
+
+# Muestra el resumen de un plan en consola.
+def mostrar_plan(plan: Dict[str, Any]):
+    resumen = plan["resumen"]
+    print("\n------------------------------")
+    print("📋 PLAN DE ORGANIZACIÓN (simulación, no se ha movido nada)")
+    print("------------------------------")
+    print(f"Directorio: {plan['directorio']}")
+    print(
+        f"Archivos a procesar: {resumen['archivos']} ({resumen['bytes'] / 1024 / 1024:.1f} MB)")
+    for carpeta, cantidad in resumen["archivos_por_categoria"].items():
+        megas = resumen["bytes_por_categoria"][carpeta] / 1024 / 1024
+        print(f"  - {carpeta}: {cantidad} archivos, {megas:.1f} MB")
+    print(f"Carpetas que se crearían: {len(resumen['carpetas_a_crear'])}"
+          f"{' (' + ', '.join(resumen['carpetas_a_crear']) + ')' if resumen['carpetas_a_crear'] else ''}")
+    print(f"Conflictos de nombre (se ignorarían): {resumen['conflictos']}")
+    print(
+        f"Copia entre dispositivos prevista: {resumen['bytes_entre_dispositivos'] / 1024 / 1024:.1f} MB")
+    print("------------------------------")
+
+
+# Guarda el plan en un archivo JSON para revisarlo.
+def exportar_plan(plan: Dict[str, Any], ruta_json: str):
+    with open(ruta_json, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, indent=4, ensure_ascii=False)
+    print(f"💾 Plan exportado a '{os.path.abspath(ruta_json)}'.")
+
+
+# Muestra la velocidad de cada fase (archivos/s y MB/s).
+def mostrar_fases(fases: Dict[str, Dict[str, float]]):
+    print(f"\n{'Fase':<10}{'Tiempo (s)':>12}{'Archivos':>10}{'Archivos/s':>14}{'MB/s':>10}")
+    for fase, datos in fases.items():
+        segundos = max(datos["segundos"], 1e-9)
+        print(f"{fase:<10}{datos['segundos']:>12.3f}{int(datos['archivos']):>10}"
+              f"{datos['archivos'] / segundos:>14,.0f}{datos['bytes'] / 1024 / 1024 / segundos:>10,.1f}")
+
+
+# Ejecuta un plan (creado por planificar_organizacion): crea las carpetas, mueve en paralelo lo que no tiene conflicto y lo anota en el diario para poder deshacerlo.
+# El plan puede haberse quedado viejo (ej. exportado a JSON), así que antes de mover se comprueba que el origen sigue ahí y que el destino está libre.
+def ejecutar_plan(plan: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+
+    directorio = plan["directorio"]
+    fases = dict(plan["fases"])
+    # Conflictos (origen, destino): los previstos por el plan más los que aparezcan ahora, se anotan en el índice para reintentarlos.
+    conflictos: List[Tuple[str, str]] = []
+    desaparecidos = 0
+    pendientes: List[Dict[str, Any]] = []
+    for movimiento in plan["movimientos"]:
+        if not os.path.lexists(os.path.join(directorio, movimiento["origen"])):
+            desaparecidos += 1
+        elif movimiento["conflicto"] or os.path.lexists(os.path.join(directorio, movimiento["destino"])):
+            conflictos.append((movimiento["origen"], movimiento["destino"]))
+        else:
+            pendientes.append(movimiento)
+
+    # 1. FASE MKDIR: cada carpeta de destino se crea una sola vez.
+    inicio = time.perf_counter()
+    carpetas_creadas: Set[str] = set()
+    carpetas_fallidas: Set[str] = set()
+    for nombre_carpeta in {m["carpeta"] for m in pendientes}:
+        ruta_destino = os.path.join(directorio, nombre_carpeta)
+        try:
+            if not os.path.isdir(ruta_destino):
+                os.makedirs(ruta_destino)
+                carpetas_creadas.add(nombre_carpeta)
+        except OSError as e:
+            print(f"❌ Error al crear la carpeta '{nombre_carpeta}': {e}")
+            carpetas_fallidas.add(nombre_carpeta)
+    fases["mkdir"] = {"segundos": time.perf_counter() - inicio,
+                      "archivos": len(carpetas_creadas), "bytes": 0}
+
+    # 2. FASE DE MOVIMIENTO: lotes por carpeta en el pool de hilos.
+    inicio = time.perf_counter()
+    por_carpeta: Dict[str, List[str]] = defaultdict(list)
+    tamanos: Dict[str, int] = {}
+    for movimiento in pendientes:
+        if movimiento["carpeta"] not in carpetas_fallidas:
+            por_carpeta[movimiento["carpeta"]].append(movimiento["origen"])
+            tamanos[movimiento["origen"]] = movimiento["tamano"]
+
+    movimientos: List[Tuple[str, str]] = []
+    errores: List[Tuple[str, str]] = []
+    with ThreadPoolExecutor(max_workers=HILOS_MOVIMIENTO) as pool:
+        tareas = {pool.submit(mover_lote, directorio, os.path.join(directorio, nombre_carpeta), archivos[i:i + TAMANO_LOTE]): nombre_carpeta
+                  for nombre_carpeta, archivos in por_carpeta.items()
+                  for i in range(0, len(archivos), TAMANO_LOTE)}
+        for tarea in as_completed(tareas):
+            # mover_archivo no sobrescribe: un destino ocupado entre la comprobación y el movimiento vuelve como conflicto.
+            movidos, en_conflicto, errores_lote = tarea.result()
+            movimientos.extend((archivo, os.path.join(
+                tareas[tarea], os.path.basename(archivo))) for archivo in movidos)
+            conflictos.extend((archivo, os.path.join(
+                tareas[tarea], os.path.basename(archivo))) for archivo in en_conflicto)
+            errores.extend(errores_lote)
+    fases["movimiento"] = {"segundos": time.perf_counter() - inicio, "archivos": len(movimientos),
+                           "bytes": sum(tamanos[origen] for origen, _ in movimientos)}
+
+    # 3. Diario en el índice de la carpeta, así 'Deshacer la última organización' también revierte los planes ejecutados.
+    indice = IndiceArchivos(directorio)
+    try:
+        indice.registrar_ejecucion(
+            movimientos, {}, {}, carpetas_creadas, conflictos=conflictos)
+    finally:
+        indice.cerrar()
+
+    print(
+        f"\n✅ Plan ejecutado: {len(movimientos)} movidos, {len(conflictos)} conflictos ignorados, "
+        f"{desaparecidos} ya no estaban en su origen, {len(errores)} errores.")
+    for archivo, mensaje in errores[:MAX_ERRORES_MOSTRADOS]:
+        print(f"   ❌ Error al mover '{archivo}': {mensaje}")
+    mostrar_fases(fases)
+    return fases
+
+
+# Flujo del menú: simula la organización, muestra el plan y permite exportarlo a JSON y ejecutarlo.
+def simular_organizacion(directorio: str, profundidad_max: Optional[int] = 0,
+                         incluir: Optional[List[str]] = None, excluir: Optional[List[str]] = None):
+    if not os.path.isdir(directorio):
+        print(
+            f"❌ Error: El directorio '{directorio}' no existe, por favor, revísalo.")
+        return
+
+    plan = planificar_organizacion(
+        directorio, profundidad_max, incluir, excluir)
+    if not plan["movimientos"]:
+        print("ℹ️ No se encontraron archivos para mover en este directorio.")
+        return
+    mostrar_plan(plan)
+    mostrar_fases(plan["fases"])
+
+    ruta_json = input(
+        "\nRuta para exportar el plan en JSON (vacío = no exportar): ").strip()
+    if ruta_json:
+        exportar_plan(plan, ruta_json)
+
+    if input("¿Ejecutar este plan ahora? (s/n): ").strip().lower() == 's':
+        ejecutar_plan(plan)
+
+
+# --- MODO VIGILANCIA (DEMONIO) ---
+
+# Arranca un observador de watchdog (inotify en Linux) que deja en 'avisos' la ruta de cada archivo creado, modificado o movido a la carpeta.
+def crear_observador(directorio: str, avisos: "queue.Queue[str]"):
+
+    class ManejadorEventos(FileSystemEventHandler):
+        def on_created(self, evento):
+            if not evento.is_directory:
+                avisos.put(evento.src_path)
+
+        def on_modified(self, evento):
+            if not evento.is_directory:
+                avisos.put(evento.src_path)
+
+        def on_moved(self, evento):
+            if not evento.is_directory:
+                avisos.put(evento.dest_path)
+
+    observador = Observer()
+    observador.schedule(ManejadorEventos(), directorio, recursive=False)
+    observador.start()
+    return observador
+
+
+# Indica si un nombre de archivo debe esperar (ocultos y descargas a medias, que el navegador renombra al terminar).
+def es_archivo_temporal(nombre: str) -> bool:
+    return nombre.startswith('.') or nombre.lower().endswith(EXTENSIONES_TEMPORALES)
+
+
+# Clasifica un lote pequeño de archivos ya estables (nombres en la raíz de 'directorio'), retorna (movidos como (nombre, carpeta), dejados en su sitio).
+def procesar_llegadas(directorio: str, nombres: List[str]) -> Tuple[List[Tuple[str, str]], List[str]]:
+    por_carpeta: Dict[str, List[str]] = defaultdict(list)
+    for nombre in nombres:
+        por_carpeta[obtener_carpeta_destino(nombre, directorio)].append(nombre)
+
+    movidos: List[Tuple[str, str]] = []
+    dejados: List[str] = []
+    for nombre_carpeta, lote in por_carpeta.items():
+        ruta_destino = os.path.join(directorio, nombre_carpeta)
+        try:
+            os.makedirs(ruta_destino, exist_ok=True)
+        except OSError as e:
+            print(f"   ❌ Error al crear la carpeta '{nombre_carpeta}': {e}")
+            dejados.extend(lote)
+            continue
+
+        # En lotes pequeños basta con comprobar el destino archivo a archivo, no sobrescribimos nada.
+        libres = [n for n in lote if not os.path.exists(
+            os.path.join(ruta_destino, n))]
+        dejados.extend(n for n in lote if n not in libres)
+
+        lote_movido, _, errores = mover_lote(directorio, ruta_destino, libres)
+        movidos.extend((nombre, nombre_carpeta) for nombre in lote_movido)
+        dejados.extend(set(libres) - set(lote_movido))
+        for archivo, mensaje in errores:
+            print(f"   ❌ Error al mover '{archivo}': {mensaje}")
+
+    return movidos, dejados
+
+
+# Nombres de los archivos de la carpeta que pueden ser llegadas (sin el propio script ni los dejados cuyo mtime no ha cambiado).
+# Un archivo que desaparece entre el listado y su stat se salta, y si la carpeta no se puede listar se avisa y se reintenta en el siguiente sondeo.
+def listar_llegadas(directorio: str, ruta_script: str, dejados: Dict[str, int]) -> List[str]:
+    nombres: List[str] = []
+    try:
+        with os.scandir(directorio) as entradas:
+            for entrada in entradas:
+                try:
+                    if not entrada.is_file() or entrada.path == ruta_script:
+                        continue
+                    if dejados.get(entrada.name) == entrada.stat().st_mtime_ns:
+                        continue
+                except OSError:
+                    continue
+                nombres.append(entrada.name)
+    except OSError as e:
+        print(
+            f"⚠️ No se pudo listar '{directorio}' ({e}), se reintenta en el siguiente sondeo.")
+    return nombres
+
+
+# Vigila una carpeta y clasifica cada archivo nuevo en cuanto termina de escribirse, hasta pulsar Ctrl+C.
+# Usa watchdog si está instalado (o 'sondeo' para forzar el recorrido periódico con os.scandir).
+def vigilar_carpeta(directorio: str, sondeo: bool = False):
+
+    directorio = os.path.abspath(directorio)
+    if not os.path.isdir(directorio):
+        print(
+            f"❌ Error: El directorio '{directorio}' no existe, por favor, revísalo.")
+        return
+
+    ruta_script = os.path.abspath(__file__)
+    avisos: "queue.Queue[str]" = queue.Queue()
+    observador = None
+    if WATCHDOG_DISPONIBLE and not sondeo:
+        observador = crear_observador(directorio, avisos)
+        print(f"\n👀 Vigilando '{directorio}' con eventos del sistema (watchdog).")
+    else:
+        print(
+            f"\n👀 Vigilando '{directorio}' por sondeo cada {INTERVALO_SONDEO} s (instala 'watchdog' para usar eventos).")
+    print("   Pulsa Ctrl+C para detener la vigilancia.")
+
+    # Candidatos: nombre -> (último tamaño visto, instante desde el que no cambia, instante en que se detectó).
+    candidatos: Dict[str, Tuple[int, float, float]] = {}
+    # Archivos que no se pudieron mover (conflicto o error) con su mtime, no se reintentan mientras no cambien.
+    dejados: Dict[str, int] = {}
+    ultimo_sondeo = 0.0
+    total_movidos = 0
+
+    # Registra un nombre como candidato, si no lo es ya.
+    def anotar(nombre: str, ahora: float):
+        if nombre not in candidatos and not es_archivo_temporal(nombre):
+            candidatos[nombre] = (-1, ahora, ahora)
+
+    try:
+        while True:
+            ahora = time.monotonic()
+
+            # 1. Recoger llegadas: eventos de watchdog, o un listado de la carpeta en modo sondeo (también al arrancar, para los archivos que ya estaban).
+            if not ultimo_sondeo or (not observador and ahora - ultimo_sondeo >= INTERVALO_SONDEO):
+                ultimo_sondeo = ahora
+                for nombre in listar_llegadas(directorio, ruta_script, dejados):
+                    anotar(nombre, ahora)
+            while not avisos.empty():
+                ruta = avisos.get_nowait()
+                if os.path.dirname(ruta) == directorio and ruta != ruta_script:
+                    dejados.pop(os.path.basename(ruta), None)
+                    anotar(os.path.basename(ruta), ahora)
+
+            # 2. Antirrebote: un archivo está listo cuando su tamaño no cambia durante ESPERA_ESTABLE segundos.
+            listos: List[str] = []
+            for nombre, (tamano_anterior, estable_desde, llegada) in list(candidatos.items()):
+                try:
+                    tamano = os.stat(os.path.join(directorio, nombre)).st_size
+                except OSError:
+                    # Desapareció (renombrado o borrado) antes de estabilizarse.
+                    del candidatos[nombre]
+                    continue
+                if tamano != tamano_anterior:
+                    candidatos[nombre] = (tamano, ahora, llegada)
+                elif ahora - estable_desde >= ESPERA_ESTABLE:
+                    listos.append(nombre)
+
+            # 3. Clasificar los archivos listos en lotes pequeños, con un resumen por lote.
+            for i in range(0, len(listos), TAMANO_LOTE_VIGILANCIA):
+                lote = listos[i:i + TAMANO_LOTE_VIGILANCIA]
+                movidos, no_movidos = procesar_llegadas(directorio, lote)
+                latencia = time.monotonic() - min(candidatos[n][2] for n in lote)
+                for nombre in lote:
+                    del candidatos[nombre]
+                for nombre in no_movidos:
+                    try:
+                        dejados[nombre] = os.stat(os.path.join(
+                            directorio, nombre)).st_mtime_ns
+                    except OSError:
+                        pass
+
+                total_movidos += len(movidos)
+                resumen = ", ".join(f"{carpeta} ({cantidad})" for carpeta, cantidad in sorted(
+                    Counter(carpeta for _, carpeta in movidos).items()))
+                print(f"   📥 {time.strftime('%H:%M:%S')} {len(movidos)} archivo(s) clasificados{': ' + resumen if resumen else ''}"
+                      f"{f', {len(no_movidos)} dejados en su sitio' if no_movidos else ''} - latencia máx. {latencia:.2f} s")
+
+            time.sleep(PAUSA_VIGILANCIA)
+
+    except KeyboardInterrupt:
+        print(
+            f"\n⏹️ Vigilancia detenida, {total_movidos} archivos clasificados en total.")
+    finally:
+        if observador:
+            observador.stop()
+            observador.join()
+
+
+# Pide al usuario las opciones del escáner (subcarpetas y filtros), retorna (profundidad_max, incluir, excluir).
+def pedir_opciones_escaneo() -> Tuple[Optional[int], Optional[List[str]], Optional[List[str]]]:
+    texto = input(
+        "Profundidad de subcarpetas (0 = solo la carpeta, vacío = todas): ").strip()
+    try:
+        profundidad_max = int(texto) if texto else None
+    except ValueError:
+        print("⚠️ Profundidad no válida, se usará solo la carpeta principal.")
+        profundidad_max = 0
+
+    incluir = input(
+        "Patrones a incluir separados por comas (ej. *.pdf,*.jpg, vacío = todos): ").split(",")
+    excluir = input(
+        "Patrones a excluir separados por comas (ej. *.tmp,cache/*, vacío = ninguno): ").split(",")
+    return (profundidad_max,
+            [p.strip() for p in incluir if p.strip()] or None,
+            [p.strip() for p in excluir if p.strip()] or None)
+
+
 def main():
     # Obtener el directorio absoluto del script. Esto es crucial para que la opción 1 funcione correctamente, independientemente de cómo se ejecute el script.
     directorio_script = os.path.dirname(os.path.abspath(__file__))
@@ -167,23 +1557,55 @@ def main():
         print("\n--- MENÚ ORGANIZADOR ---")
         print("1. Organizar la carpeta actual (donde está este script)")
         print("2. Organizar una carpeta específica (ej. C:\\Users\\...\\Downloads)")
-        print("3. Configurar extensiones (Mostrar / Añadir)")
-        print("4. Salir")
+        print("3. Organizar una carpeta con subcarpetas y filtros")
+        print("4. Buscar archivos duplicados (Informar / Enlazar)")
+        print("5. Deshacer la última organización de una carpeta")
+        print("6. Vigilar una carpeta y clasificar lo que llegue (Ctrl+C para parar)")
+        print("7. Simular la organización de una carpeta (plan, exportar JSON, ejecutar)")
+        print("8. Configurar extensiones (Mostrar / Añadir)")
+        print("9. Salir")
 
-        opcion = input("\nElige una opción (1, 2, 3 o 4): ")
+        opcion = input("\nElige una opción (1-9): ")
 
-        if opcion == '4':
+        if opcion == '9':
             print("👋 ¡Hasta pronto!")
             # Sale del bucle y termina la aplicación.
             break
         elif opcion == '1':
-            # Ahora pasamos el directorio ABSOLUTO del script, que es infalible.
-            organizar_archivos(directorio_script)
+            # Ahora pasamos el directorio ABSOLUTO del script, que es infalible, el índice evita reprocesar lo ya organizado.
+            organizar_archivos(directorio_script, incremental=True)
         elif opcion == '2':
             ruta = input(
                 "Ingresa la RUTA ABSOLUTA de la carpeta a organizar: ")
-            organizar_archivos(ruta)
+            organizar_archivos(ruta, incremental=True)
         elif opcion == '3':
+            ruta = input(
+                "Ingresa la RUTA ABSOLUTA de la carpeta a organizar: ")
+            profundidad_max, incluir, excluir = pedir_opciones_escaneo()
+            omitir = input(
+                "¿Dejar sin mover las copias duplicadas? (s/n): ").strip().lower() == 's'
+            organizar_archivos(ruta, profundidad_max,
+                               incluir, excluir, omitir)
+        elif opcion == '4':
+            ruta = input(
+                "Ingresa la RUTA ABSOLUTA de la carpeta a revisar: ")
+            enlazar = input(
+                "¿Sustituir las copias por enlaces duros? (s/n): ").strip().lower() == 's'
+            procesar_duplicados(ruta, "enlazar" if enlazar else "informar")
+        elif opcion == '5':
+            ruta = input(
+                "Ingresa la RUTA ABSOLUTA de la carpeta organizada: ")
+            deshacer_ultima_organizacion(ruta)
+        elif opcion == '6':
+            ruta = input(
+                "Ingresa la RUTA ABSOLUTA de la carpeta a vigilar: ")
+            vigilar_carpeta(ruta)
+        elif opcion == '7':
+            ruta = input(
+                "Ingresa la RUTA ABSOLUTA de la carpeta a simular: ")
+            profundidad_max, incluir, excluir = pedir_opciones_escaneo()
+            simular_organizacion(ruta, profundidad_max, incluir, excluir)
+        elif opcion == '8':
             configurar_extensiones()
         else:
             print("❌ Opción no válida.")
@@ -192,15 +1614,21 @@ def main():
 
 
 def configurar_extensiones():
+    global CLASIFICADOR
+    # Carga las extensiones guardadas sobre TIPOS_ARCHIVOS antes de mostrarlas.
+    obtener_clasificador()
+
     while True:
         print("\n--- CONFIGURACIÓN DE EXTENSIONES ---")
-        print("1. Mostrar lista de extensiones actuales")
+        print("1. Mostrar lista de extensiones y reglas actuales")
         print("2. Añadir nueva extensión y carpeta")
-        print("3. Volver al menú principal")
+        print("3. Añadir regla avanzada (patrón, tamaño, firma de contenido)")
+        print("4. Medir la velocidad del clasificador (benchmark)")
+        print("5. Volver al menú principal")
 
-        opcion_config = input("\nElige una opción (1, 2 o 3): ")
+        opcion_config = input("\nElige una opción (1-5): ")
 
-        if opcion_config == '3':
+        if opcion_config == '5':
             break
 
         elif opcion_config == '1':
@@ -218,6 +1646,13 @@ def configurar_extensiones():
                 print(f"[{carpeta}]: {extensiones}")
             print(f"\nExtensiones sin clasificar van a: [{OTRAS_CARPETAS}]")
 
+            if REGLAS_USUARIO:
+                print("\n--- REGLAS AVANZADAS (se aplican antes que las extensiones) ---")
+                for numero, regla in enumerate(REGLAS_USUARIO, start=1):
+                    condiciones = ", ".join(
+                        f"{clave}={valor}" for clave, valor in regla.items() if clave != "carpeta")
+                    print(f"{numero}. [{regla['carpeta']}] si {condiciones}")
+
         elif opcion_config == '2':
             print("\n--- AÑADIR NUEVA CLASIFICACIÓN ---")
             ext = input(
@@ -238,10 +1673,63 @@ def configurar_extensiones():
                 if confirma != 's':
                     continue
 
-            # Nota: Esto solo afecta a la ejecución actual, no se persiste en disco, pero cumple la función de demostración.
+            # Se guarda en el archivo de reglas, así el cambio se mantiene en las próximas ejecuciones.
             TIPOS_ARCHIVOS[ext] = carpeta
+            configuracion = cargar_reglas()
+            configuracion["extensiones"][ext] = carpeta
+            guardar_reglas(configuracion)
+            CLASIFICADOR = None
             print(
-                f"✅ Extensión '.{ext}' añadida/actualizada a la carpeta '{carpeta}'.")
+                f"✅ Extensión '.{ext}' añadida/actualizada a la carpeta '{carpeta}' y guardada en '{ARCHIVO_REGLAS}'.")
+
+        elif opcion_config == '3':
+            print("\n--- AÑADIR REGLA AVANZADA ---")
+            print("Deja vacío lo que no quieras comprobar, la regla se cumple si se cumplen TODAS sus condiciones.")
+            regla: Dict[str, Any] = {"carpeta": input(
+                "Carpeta de destino (ej. 'Facturas'): ").strip()}
+            patron = input("Patrón del nombre (ej. 'factura_*.pdf'): ").strip()
+            extensiones = input(
+                "Extensiones separadas por comas (ej. 'jpg,png'): ").strip()
+            tamano_min = input("Tamaño mínimo en bytes: ").strip()
+            tamano_max = input("Tamaño máximo en bytes: ").strip()
+            firma = input(
+                "Firma hexadecimal de los primeros bytes (ej. '25504446' para PDF): ").strip()
+            desplazamiento = input(
+                f"Posición de la firma (0-{BYTES_CABECERA - 1}, vacío = 0): ").strip()
+
+            try:
+                if patron:
+                    regla["patron"] = patron
+                if extensiones:
+                    regla["extensiones"] = [e.strip()
+                                            for e in extensiones.split(",") if e.strip()]
+                if tamano_min:
+                    regla["tamano_min"] = int(tamano_min)
+                if tamano_max:
+                    regla["tamano_max"] = int(tamano_max)
+                if firma:
+                    regla["firma"] = firma
+                if desplazamiento:
+                    regla["desplazamiento"] = int(desplazamiento)
+                # Compilarla aquí valida la firma y el desplazamiento antes de guardarla.
+                ClasificadorCompilado.compilar_regla(regla)
+            except ValueError as e:
+                print(f"❌ Regla no válida: {e}")
+                continue
+
+            if not regla["carpeta"] or len(regla) == 1:
+                print("❌ La regla necesita una carpeta y al menos una condición.")
+                continue
+
+            configuracion = cargar_reglas()
+            configuracion["reglas"].append(regla)
+            guardar_reglas(configuracion)
+            CLASIFICADOR = None
+            obtener_clasificador()
+            print(f"✅ Regla añadida y guardada en '{ARCHIVO_REGLAS}'.")
+
+        elif opcion_config == '4':
+            medir_clasificador()
 
         else:
             print("❌ Opción no válida.")
@@ -249,4 +1737,8 @@ def configurar_extensiones():
 
 # Punto de entrada del programa.
 if __name__ == "__main__":
-    main()
+    # Modo demonio sin menú: python gestor_archivos.py --vigilar RUTA [--sondeo]
+    if len(sys.argv) >= 3 and sys.argv[1] == "--vigilar":
+        vigilar_carpeta(sys.argv[2], sondeo="--sondeo" in sys.argv[3:])
+    else:
+        main()
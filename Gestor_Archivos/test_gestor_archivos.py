@@ -0,0 +1,200 @@
+# Pruebas del organizador de archivos (se ejecutan con: python -m pytest).
+import errno
+import os
+
+import pytest
+
+import gestor_archivos
+
+
+# Crea un archivo con el contenido indicado dentro de 'directorio' y retorna su ruta.
+def crear_archivo(directorio, nombre: str, contenido: bytes = b"contenido") -> str:
+    ruta = os.path.join(str(directorio), nombre)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'wb') as f:
+        f.write(contenido)
+    return ruta
+
+
+# --- CLASIFICADOR ---
+
+def test_la_firma_manda_sobre_la_extension(tmp_path):
+    clasificador = gestor_archivos.ClasificadorCompilado(
+        gestor_archivos.TIPOS_ARCHIVOS, [])
+    ruta = crear_archivo(tmp_path, "foto.txt", b"\x89PNG\r\n\x1a\n" + b"\0" * 8)
+
+    assert clasificador.clasificar("foto.txt", ruta) == "Imágenes"
+    # Sin ruta solo se puede usar el nombre.
+    assert clasificador.clasificar("foto.txt") == "Documentos"
+
+
+def test_contenedor_conserva_su_extension(tmp_path):
+    clasificador = gestor_archivos.ClasificadorCompilado(
+        gestor_archivos.TIPOS_ARCHIVOS, [])
+    ruta = crear_archivo(tmp_path, "informe.docx", b"PK\x03\x04" + b"\0" * 12)
+
+    assert clasificador.clasificar("informe.docx", ruta) == "Documentos"
+
+
+def test_desplazamiento_negativo_no_valido():
+    with pytest.raises(ValueError):
+        gestor_archivos.ClasificadorCompilado.compilar_regla(
+            {"carpeta": "Imágenes", "firma": "89504e47", "desplazamiento": -1})
+
+
+# --- DUPLICADOS ---
+
+def test_buscar_duplicados_agrupa_por_contenido(tmp_path):
+    a = crear_archivo(tmp_path, "a.txt", b"igual")
+    b = crear_archivo(tmp_path, "sub/b.txt", b"igual")
+    c = crear_archivo(tmp_path, "c.txt", b"otro!")
+
+    grupos = gestor_archivos.buscar_duplicados(
+        (ruta, os.path.getsize(ruta)) for ruta in (a, b, c))
+
+    assert grupos == [sorted([a, b])]
+
+
+def test_buscar_duplicados_ignora_archivos_desaparecidos(tmp_path):
+    a = crear_archivo(tmp_path, "a.txt", b"igual")
+    b = crear_archivo(tmp_path, "b.txt", b"igual")
+    desaparecido = os.path.join(str(tmp_path), "borrado.txt")
+
+    grupos = gestor_archivos.buscar_duplicados(
+        [(a, 5), (b, 5), (desaparecido, 5)])
+
+    assert grupos == [sorted([a, b])]
+
+
+# --- ÍNDICE INCREMENTAL ---
+
+def test_conflicto_se_reintenta_en_la_siguiente_ejecucion(tmp_path):
+    crear_archivo(tmp_path, "nota.txt", b"nueva")
+    bloqueo = crear_archivo(tmp_path, "Documentos/nota.txt", b"antigua")
+
+    gestor_archivos.organizar_archivos(str(tmp_path), incremental=True)
+    assert os.path.exists(os.path.join(str(tmp_path), "nota.txt"))
+    indice = gestor_archivos.IndiceArchivos(str(tmp_path))
+    try:
+        assert indice.conflictos_pendientes() == [
+            ("nota.txt", os.path.join("Documentos", "nota.txt"))]
+    finally:
+        indice.cerrar()
+
+    # Al quitar el archivo que ocupaba el destino, la siguiente ejecución lo mueve.
+    os.remove(bloqueo)
+    gestor_archivos.organizar_archivos(str(tmp_path), incremental=True)
+    with open(os.path.join(str(tmp_path), "Documentos", "nota.txt"), 'rb') as f:
+        assert f.read() == b"nueva"
+    indice = gestor_archivos.IndiceArchivos(str(tmp_path))
+    try:
+        assert indice.conflictos_pendientes() == []
+    finally:
+        indice.cerrar()
+
+
+def test_deshacer_devuelve_los_archivos(tmp_path):
+    crear_archivo(tmp_path, "a.txt")
+    crear_archivo(tmp_path, "b.py")
+
+    gestor_archivos.organizar_archivos(str(tmp_path), incremental=True)
+    assert sorted(os.listdir(str(tmp_path))) == [
+        ".indice_organizador.db", "Código", "Documentos"]
+
+    gestor_archivos.deshacer_ultima_organizacion(str(tmp_path))
+    assert sorted(os.listdir(str(tmp_path))) == [
+        ".indice_organizador.db", "a.txt", "b.py"]
+
+
+# --- MOVIMIENTOS Y PLANES ---
+
+def test_mover_archivo_no_sobrescribe(tmp_path):
+    origen = crear_archivo(tmp_path, "a.txt", b"origen")
+    destino = crear_archivo(tmp_path, "b.txt", b"destino")
+
+    with pytest.raises(FileExistsError):
+        gestor_archivos.mover_archivo(origen, destino)
+    with open(destino, 'rb') as f:
+        assert f.read() == b"destino"
+    assert os.path.exists(origen)
+
+
+# En el mismo dispositivo se renombra, solo si el rename falla con EXDEV se copia y se borra el original.
+def test_mover_archivo_solo_copia_entre_dispositivos(tmp_path, monkeypatch):
+    origen = crear_archivo(tmp_path, "a.txt", b"origen")
+    copias = []
+    copiar = gestor_archivos.copiar_sin_sobrescribir
+    monkeypatch.setattr(gestor_archivos, "copiar_sin_sobrescribir",
+                        lambda *rutas: copias.append(rutas) or copiar(*rutas))
+
+    gestor_archivos.mover_archivo(origen, os.path.join(str(tmp_path), "b.txt"))
+    assert copias == []
+
+    def rename_entre_dispositivos(ruta_origen, ruta_destino):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    monkeypatch.setattr(os, "rename", rename_entre_dispositivos)
+    gestor_archivos.mover_archivo(os.path.join(str(tmp_path), "b.txt"), os.path.join(str(tmp_path), "c.txt"))
+    assert len(copias) == 1
+    assert sorted(os.listdir(str(tmp_path))) == ["c.txt"]
+
+    # Cualquier otro error (p. ej. EPERM) se propaga sin copiar nada.
+    def rename_sin_permiso(ruta_origen, ruta_destino):
+        raise PermissionError(errno.EPERM, "Operation not permitted")
+    monkeypatch.setattr(os, "rename", rename_sin_permiso)
+    with pytest.raises(PermissionError):
+        gestor_archivos.mover_archivo(os.path.join(str(tmp_path), "c.txt"), os.path.join(str(tmp_path), "d.txt"))
+    assert len(copias) == 1
+
+
+def test_plan_viejo_no_pisa_destinos_nuevos(tmp_path):
+    crear_archivo(tmp_path, "a.txt", b"del plan")
+    crear_archivo(tmp_path, "b.txt", b"se borra")
+    plan = gestor_archivos.planificar_organizacion(str(tmp_path))
+
+    # Después de planificar aparece un archivo en el destino de 'a.txt' y 'b.txt' desaparece.
+    crear_archivo(tmp_path, "Documentos/a.txt", b"nuevo")
+    os.remove(os.path.join(str(tmp_path), "b.txt"))
+    gestor_archivos.ejecutar_plan(plan)
+
+    with open(os.path.join(str(tmp_path), "Documentos", "a.txt"), 'rb') as f:
+        assert f.read() == b"nuevo"
+    assert os.path.exists(os.path.join(str(tmp_path), "a.txt"))
+    indice = gestor_archivos.IndiceArchivos(str(tmp_path))
+    try:
+        assert indice.conflictos_pendientes() == [
+            ("a.txt", os.path.join("Documentos", "a.txt"))]
+    finally:
+        indice.cerrar()
+
+
+# --- VIGILANCIA ---
+
+# Un archivo que desaparece entre el listado y su stat se salta, y una carpeta que no se puede listar no detiene la vigilancia.
+def test_listar_llegadas_tolera_archivos_desaparecidos(tmp_path, monkeypatch):
+    crear_archivo(tmp_path, "a.txt")
+    crear_archivo(tmp_path, "b.txt")
+    scandir = os.scandir
+
+    class EntradaDesaparecida:
+        name, path = "fantasma.txt", os.path.join(str(tmp_path), "fantasma.txt")
+
+        def is_file(self):
+            return True
+
+        def stat(self):
+            raise FileNotFoundError(errno.ENOENT, "No such file or directory", self.path)
+
+    class ListadoConFantasma:
+        def __enter__(self):
+            self.entradas = scandir(str(tmp_path))
+            return [*self.entradas, EntradaDesaparecida()]
+
+        def __exit__(self, *error):
+            self.entradas.close()
+
+    monkeypatch.setattr(os, "scandir", lambda directorio: ListadoConFantasma())
+    dejados = {"b.txt": os.stat(os.path.join(str(tmp_path), "b.txt")).st_mtime_ns, "fantasma.txt": 0}
+    assert gestor_archivos.listar_llegadas(str(tmp_path), "", dejados) == ["a.txt"]
+
+    monkeypatch.setattr(os, "scandir", lambda directorio: scandir(os.path.join(directorio, "no_existe")))
+    assert gestor_archivos.listar_llegadas(str(tmp_path), "", {}) == []
@@ -4,49 +4,1035 @@
 import json
 # Módulo para interactuar con el sistema operativo (lo usamos para comprobar si un archivo existe).
 import os
+# Módulo para compactar el registro de operaciones en segundo plano sin bloquear el menú.
+import threading
+# Para el bloqueo entre procesos del almacén JSON (with ...).
+import contextlib
+# Para cerrar el almacén ordenadamente al salir del programa.
+import atexit
+# Backend alternativo en SQLite (con búsqueda FTS5) y lectura de argumentos de la línea de comandos.
+import sqlite3
+import sys
+# Módulos para el índice de búsqueda: expresiones regulares, quitar tildes, logaritmos (BM25), búsqueda binaria y los mejores resultados.
+import re
+import unicodedata
+import math
+import bisect
+import heapq
+# Para el banco de pruebas de los serializadores.
+import time
+import tempfile
+# Servicio HTTP asíncrono y su prueba de carga (proceso aparte, puerto libre, peticiones aleatorias).
+import asyncio
+import urllib.parse
+import subprocess
+import socket
+import signal
+import random
+from collections import Counter
+# Tipado
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Serializadores JSON rápidos opcionales (pip install orjson / msgspec), si no están se usa el módulo json.
+try:
+    import orjson
+    ORJSON_DISPONIBLE = True
+except ImportError:
+    ORJSON_DISPONIBLE = False
+try:
+    import msgspec
+    MSGSPEC_DISPONIBLE = True
+except ImportError:
+    MSGSPEC_DISPONIBLE = False
+
+# Bloqueo de archivos entre procesos (solo existe en POSIX). Sin él (Windows) el backend JSON es para UN solo proceso a la vez,
+# para usar las notas desde varios programas a la vez hay que elegir el backend SQLite ('--sqlite').
+try:
+    import fcntl
+    FCNTL_DISPONIBLE = True
+except ImportError:
+    FCNTL_DISPONIBLE = False
 
 # Creamos una variable con el ombre del archivo donde se guardarán todas las notas.
 nombre_archivo = "notas.json"
+# Base de datos del backend SQLite.
+nombre_base_datos = "notas.db"
+# PRAGMA user_version de una base de datos SQLite que ya importó (una sola vez) las notas de 'notas.json'.
+VERSION_MIGRADA_JSON = 1
+# Backend de almacenamiento: "json" (instantánea + log) o "sqlite" (se elige también con 'python gestor_notas.py --sqlite').
+BACKEND = "json"
+
+# Número de operaciones en el registro (log) a partir del cual se compacta en segundo plano sobre 'notas.json'.
+UMBRAL_COMPACTACION = 1000
+# Política de guardado de la sesión (RepositorioNotas): cada cuántos cambios y cada cuántos segundos se escriben los pendientes.
+MAX_CAMBIOS_SIN_GUARDAR = 20
+INTERVALO_GUARDADO = 5.0
+# Serializador del almacén: "orjson", "msgspec" o "json" (None = el más rápido instalado).
+SERIALIZADOR: Optional[str] = None
+# Número de notas del banco de pruebas de los serializadores.
+NOTAS_BANCO_PRUEBAS = 100000
+# Número máximo de resultados que muestra la búsqueda del menú (los más relevantes).
+MAX_RESULTADOS_BUSQUEDA = 20
+# Intentos de guardado de la sesión cuando otro proceso escribe a la vez (cada intento vuelve a sincronizar).
+INTENTOS_GUARDADO = 3
+
+# Servicio HTTP: dirección, puerto y tamaño máximo del cuerpo de una petición.
+HOST_SERVICIO = "127.0.0.1"
+PUERTO_SERVICIO = 8080
+MAX_CUERPO_PETICION = 1024 * 1024
+ESTADOS_HTTP = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+                405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 428: "Precondition Required",
+                501: "Not Implemented"}
+
+# Prueba de carga: duración de cada mezcla, clientes simultáneos, notas creadas y proporción de cada operación.
+DURACION_PRUEBA_CARGA = 5.0
+CONCURRENCIA_PRUEBA_CARGA = 32
+NOTAS_PRUEBA_CARGA = 1000
+TEMAS_PRUEBA_CARGA = ["compras", "trabajo", "viaje", "receta", "reunion", "libro", "deporte", "musica"]
+MEZCLAS_PRUEBA_CARGA: Dict[str, Dict[str, float]] = {
+    "lectura": {"leer": 1.0},
+    "busqueda": {"buscar": 1.0},
+    "escritura": {"escribir": 1.0},
+    "mixta": {"leer": 0.8, "buscar": 0.1, "escribir": 0.1},
+}
+
+# Error al guardar: otro proceso cambió las notas desde que se leyeron (o alguna ya no está en la versión esperada), no se ha escrito nada.
+class ConflictoVersiones(Exception):
+
+    def __init__(self, ids: List[int]):
+        super().__init__(
+            f"Notas modificadas por otro proceso: {', '.join(map(str, ids)) or 'el archivo cambió'}")
+        self.ids = ids
+
+
+# --- SERIALIZADORES ---
+# Convierten las notas a bytes y de vuelta. Se guarda en JSON compacto (sin sangría), la versión legible se obtiene con 'Exportar notas'.
+
+# JSON de la biblioteca estándar, siempre disponible.
+class SerializadorJSON:
+    nombre = "json"
+    # Errores que indican datos incompletos o corruptos al decodificar.
+    errores: Tuple = (ValueError,)
+
+    def codificar(self, datos) -> bytes:
+        return json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def decodificar(self, datos: bytes):
+        return json.loads(datos)
+
+
+# orjson: codifica y decodifica directamente a bytes, varias veces más rápido que json.
+class SerializadorOrjson:
+    nombre = "orjson"
+    errores: Tuple = (ValueError,)
+
+    def codificar(self, datos) -> bytes:
+        return orjson.dumps(datos)
+
+    def decodificar(self, datos: bytes):
+        return orjson.loads(datos)
+
+
+# msgspec: codificador reutilizable, también trabaja con bytes.
+class SerializadorMsgspec:
+    nombre = "msgspec"
+
+    def __init__(self):
+        self.codificador = msgspec.json.Encoder()
+        self.decodificador = msgspec.json.Decoder()
+        self.errores = (ValueError, msgspec.DecodeError)
+
+    def codificar(self, datos) -> bytes:
+        return self.codificador.encode(datos)
+
+    def decodificar(self, datos: bytes):
+        return self.decodificador.decode(datos)
+
+
+# Serializadores instalados, del más rápido al más lento.
+def serializadores_disponibles() -> List:
+    disponibles: List = []
+    if ORJSON_DISPONIBLE:
+        disponibles.append(SerializadorOrjson())
+    if MSGSPEC_DISPONIBLE:
+        disponibles.append(SerializadorMsgspec())
+    disponibles.append(SerializadorJSON())
+    return disponibles
+
+
+# Devuelve el serializador llamado 'nombre' o, si no se indica (o no está instalado), el más rápido disponible.
+def elegir_serializador(nombre: Optional[str] = None):
+    disponibles = serializadores_disponibles()
+    for serializador in disponibles:
+        if serializador.nombre == nombre:
+            return serializador
+    return disponibles[0]
+
+
+# Parámetros de la puntuación BM25: k1 controla cuánto pesa repetir una palabra y b cuánto se penalizan las notas largas.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Palabras de la consulta que separan alternativas (OR), el resto de palabras deben aparecer todas (AND).
+SEPARADORES_OR = re.compile(r"\s+OR\s+|\s*\|\s*")
+# Una palabra es una secuencia de letras o números.
+PATRON_PALABRA = re.compile(r"\w+")
+# Marcas diacríticas (tildes, diéresis, la virgulilla de la ñ) que quedan sueltas al descomponer el texto con NFD.
+PATRON_DIACRITICOS = re.compile(r"[\u0300-\u036f]")
+
+
+# Convierte el texto a minúsculas y quita las tildes ("Canción" -> "cancion"), así la búsqueda no depende de cómo se escribió.
+def normalizar_texto(texto: str) -> str:
+    texto = texto.lower()
+    # El texto sin caracteres especiales no tiene tildes que quitar (caso más común y mucho más rápido).
+    if texto.isascii():
+        return texto
+    return PATRON_DIACRITICOS.sub("", unicodedata.normalize("NFD", texto))
 
 
-# Creamos la funcion que cargara la lista de notas desde el archivo JSON, si no existe o está vacío, devuelve una lista vacía."""
-def cargar_notas():
+# Divide el texto normalizado en palabras (tokens).
+def tokenizar(texto: str) -> List[str]:
+    return PATRON_PALABRA.findall(normalizar_texto(texto))
 
-    # Comprueba si el archivo 'notas.json' existe en el directorio actual.
-    if os.path.exists(nombre_archivo):
 
-        # El bloque 'try' intenta ejecutar el código, es crucial para el manejo de archivos.
-        try:
-            # Abre el archivo en modo lectura (r) con 'with open', lo que asegura que el archivo se cierre automáticamente.
-            with open(nombre_archivo, 'r') as f:
+# Índice invertido: por cada palabra guarda las notas que la contienen y cuántas veces (palabra -> {id: frecuencia}).
+# Buscar ya no recorre todas las notas, solo las listas de las palabras de la consulta.
+class IndiceInvertido:
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = {}
+        # Número de palabras de cada nota (para BM25) y las palabras distintas de cada nota (para quitarla del índice).
+        self.longitudes: Dict[int, int] = {}
+        self.terminos: Dict[int, List[str]] = {}
+        self.total_palabras = 0
+        # Vocabulario ordenado para las búsquedas por prefijo, se construye la primera vez que hace falta.
+        self.vocabulario: Optional[List[str]] = None
 
-                # json.load(f) deserializa y convierte los datos JSON (texto) del archivo de nuevo a objetos de Python (lista de diccionarios) y devuelve el resultado.
-                return json.load(f)
+    # Construye el índice completo a partir de una lista de notas.
+    @classmethod
+    def desde_notas(cls, notas: Iterable[dict]) -> "IndiceInvertido":
+        indice = cls()
+        for nota in notas:
+            indice.agregar(nota['id'], nota['contenido'])
+        return indice
+
+    # Añade (o reemplaza) una nota en el índice.
+    def agregar(self, id_nota: int, contenido: str):
+        if id_nota in self.longitudes:
+            self.quitar(id_nota)
+
+        palabras = tokenizar(contenido)
+        frecuencias: Dict[str, int] = {}
+        for palabra in palabras:
+            frecuencias[palabra] = frecuencias.get(palabra, 0) + 1
+        for palabra, frecuencia in frecuencias.items():
+            lista = self.postings.get(palabra)
+            if lista is None:
+                lista = self.postings[palabra] = {}
+                if self.vocabulario is not None:
+                    bisect.insort(self.vocabulario, palabra)
+            lista[id_nota] = frecuencia
+
+        self.longitudes[id_nota] = len(palabras)
+        self.terminos[id_nota] = list(frecuencias)
+        self.total_palabras += len(palabras)
+
+    # Quita una nota del índice (solo toca las listas de sus propias palabras).
+    def quitar(self, id_nota: int):
+        if id_nota not in self.longitudes:
+            return
+        for palabra in self.terminos.pop(id_nota):
+            lista = self.postings[palabra]
+            del lista[id_nota]
+            if not lista:
+                del self.postings[palabra]
+                if self.vocabulario is not None:
+                    del self.vocabulario[bisect.bisect_left(
+                        self.vocabulario, palabra)]
+        self.total_palabras -= self.longitudes.pop(id_nota)
+
+    # Palabras del índice que empiezan por 'prefijo', usando búsqueda binaria en el vocabulario ordenado.
+    def expandir_prefijo(self, prefijo: str) -> List[str]:
+        if self.vocabulario is None:
+            self.vocabulario = sorted(self.postings)
+        inicio = bisect.bisect_left(self.vocabulario, prefijo)
+        fin = bisect.bisect_left(self.vocabulario, prefijo + "\U0010ffff")
+        return self.vocabulario[inicio:fin]
+
+    # Notas que contienen un término de la consulta ('termino*' = cualquier palabra que empiece así) y las palabras del índice que le corresponden.
+    def notas_del_termino(self, palabra: str, prefijo: bool) -> Tuple[Set[int], List[str]]:
+        palabras = self.expandir_prefijo(palabra) if prefijo else (
+            [palabra] if palabra in self.postings else [])
+        if len(palabras) == 1:
+            return set(self.postings[palabras[0]]), palabras
+        ids: Set[int] = set()
+        for p in palabras:
+            ids.update(self.postings[p])
+        return ids, palabras
+
+    # Busca 'consulta' y devuelve [(id, puntuación)] ordenado de más a menos relevante.
+    # Sintaxis: las palabras separadas por espacios deben aparecer TODAS, 'OR' o '|' separa alternativas y 'palabra*' busca por prefijo.
+    def buscar(self, consulta: str, limite: Optional[int] = None) -> List[Tuple[int, float]]:
+
+        # 1. Cada alternativa (OR) es un grupo de términos que deben cumplirse a la vez (AND).
+        encontrados: Set[int] = set()
+        palabras_puntuables: Set[str] = set()
+        for grupo in SEPARADORES_OR.split(consulta.strip()):
+            conjuntos: List[Set[int]] = []
+            for termino in grupo.split():
+                prefijo = termino.endswith("*")
+                palabras = tokenizar(termino)
+                # "año-nuevo" da dos palabras, el prefijo solo se aplica a la última.
+                for i, palabra in enumerate(palabras):
+                    ids, expandidas = self.notas_del_termino(
+                        palabra, prefijo and i == len(palabras) - 1)
+                    conjuntos.append(ids)
+                    palabras_puntuables.update(expandidas)
+            if not conjuntos:
+                continue
+
+            # 2. Intersección empezando por la lista más corta, así el trabajo depende de la palabra más rara.
+            conjuntos.sort(key=len)
+            resultado = conjuntos[0]
+            for conjunto in conjuntos[1:]:
+                if not resultado:
+                    break
+                resultado = resultado & conjunto
+            encontrados |= resultado
+
+        if not encontrados:
+            return []
+
+        # 3. Puntuación BM25 de cada nota encontrada.
+        total_notas = len(self.longitudes)
+        longitud_media = self.total_palabras / total_notas if total_notas else 0
+        puntuaciones: Dict[int, float] = dict.fromkeys(encontrados, 0.0)
+        for palabra in palabras_puntuables:
+            lista = self.postings[palabra]
+            idf = math.log(1 + (total_notas - len(lista) + 0.5) /
+                           (len(lista) + 0.5))
+            # Recorremos la lista más corta: la de la palabra o las notas encontradas.
+            if len(lista) < len(puntuaciones):
+                pares = ((id_nota, frecuencia) for id_nota, frecuencia in lista.items()
+                         if id_nota in puntuaciones)
+            else:
+                pares = ((id_nota, lista[id_nota])
+                         for id_nota in puntuaciones if id_nota in lista)
+            for id_nota, frecuencia in pares:
+                norma = BM25_K1 * (1 - BM25_B + BM25_B *
+                                   self.longitudes[id_nota] / (longitud_media or 1))
+                puntuaciones[id_nota] += idf * \
+                    frecuencia * (BM25_K1 + 1) / (frecuencia + norma)
+
+        if limite is not None:
+            return heapq.nlargest(limite, puntuaciones.items(), key=lambda par: par[1])
+        return sorted(puntuaciones.items(), key=lambda par: par[1], reverse=True)
+
+    # Guarda el índice en 'ruta' junto con la firma (tamaño, fecha) de la instantánea de notas que representa.
+    # Se guarda como JSON (nunca pickle: cargar un pickle ajeno puede ejecutar código), las listas de cada palabra van planas [id, frecuencia, id, frecuencia...].
+    def guardar(self, ruta: str, firma: List[int], serializador=None):
+        serializador = serializador or elegir_serializador(SERIALIZADOR)
+        datos = {"firma": firma, "notas": list(self.longitudes), "longitudes": list(self.longitudes.values()),
+                 "postings": {palabra: [valor for par in lista.items() for valor in par]
+                              for palabra, lista in self.postings.items()}}
+        ruta_temporal = ruta + ".tmp"
+        with open(ruta_temporal, 'wb') as f:
+            f.write(serializador.codificar(datos))
+        os.replace(ruta_temporal, ruta)
+
+    # Carga el índice de 'ruta' si corresponde a la instantánea con esa firma, si no devuelve None (hay que reconstruirlo).
+    @classmethod
+    def cargar(cls, ruta: str, firma: List[int], serializador=None) -> Optional["IndiceInvertido"]:
+        serializador = serializador or elegir_serializador(SERIALIZADOR)
+        # Un índice de otra versión o dañado no es un error: se reconstruye a partir de las notas.
+        errores = (OSError, KeyError, TypeError, AttributeError) + \
+            tuple(serializador.errores)
+        try:
+            with open(ruta, 'rb') as f:
+                datos = serializador.decodificar(f.read())
+            if datos["firma"] != firma:
+                return None
+            indice = cls()
+            indice.longitudes = dict(zip(datos["notas"], datos["longitudes"]))
+            terminos: Dict[int, List[str]] = {id_nota: [] for id_nota in indice.longitudes}
+            for palabra, plana in datos["postings"].items():
+                lista = indice.postings[palabra] = dict(zip(plana[0::2], plana[1::2]))
+                for id_nota in lista:
+                    terminos[id_nota].append(palabra)
+        except errores:
+            return None
+        indice.terminos = terminos
+        indice.total_palabras = sum(indice.longitudes.values())
+        return indice
+
+
+# Motor de almacenamiento: 'notas.json' es una instantánea completa y cada cambio posterior se AÑADE como una línea JSON a 'notas.json.log'.
+# Así crear, actualizar o borrar una nota escribe una sola línea (O(1)) en lugar de reescribir el archivo entero.
+class AlmacenNotas:
+
+    def __init__(self, ruta: str = nombre_archivo, serializador=None):
+        self.ruta = ruta
+        self.serializador = serializador or elegir_serializador(SERIALIZADOR)
+        self.ruta_log = ruta + ".log"
+        # Log que se está volcando a la instantánea durante una compactación.
+        self.ruta_log_antiguo = ruta + ".log.old"
+        # Índice de búsqueda guardado junto a la instantánea.
+        self.ruta_indice = ruta + ".idx"
+        # Archivo que se bloquea (fcntl) mientras un proceso lee el disco o escribe en él.
+        self.ruta_bloqueo = ruta + ".lock"
+        self.cerrojo = threading.Lock()
+        self.hilo_compactacion: Optional[threading.Thread] = None
+
+        # Diccionario en memoria id -> nota, acceso directo por ID sin recorrer la lista.
+        self.notas: Dict[int, dict] = {}
+        self.indice = IndiceInvertido()
+        self.ultimo_id = 0
+        self.operaciones_log = 0
+        # Tamaño y fecha de 'notas.json' y del log tras nuestra última escritura, para detectar cambios de otro proceso.
+        self.firma_disco: Tuple = ()
+
+        with self.bloqueo_entre_procesos():
+            self.abrir()
+
+    # Bloqueo exclusivo entre procesos sobre 'notas.json.lock', siempre se toma ANTES que 'cerrojo' (sin fcntl no hace nada).
+    @contextlib.contextmanager
+    def bloqueo_entre_procesos(self):
+        if not FCNTL_DISPONIBLE:
+            yield
+            return
+        with open(self.ruta_bloqueo, 'ab') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    # Carga las notas del disco y deja el log abierto para añadir operaciones (con el bloqueo entre procesos tomado).
+    def abrir(self):
+
+        # 1. Cargar la instantánea y volver a aplicar las operaciones pendientes de los logs.
+        self.cargar()
+
+        # 2. Si quedó una compactación a medias (el programa se cerró durante ella), la terminamos ahora.
+        if os.path.exists(self.ruta_log_antiguo):
+            self.escribir_instantanea(
+                list(self.notas.values()), self.indice)
+            self.truncar_log()
+            os.remove(self.ruta_log_antiguo)
+
+        # 3. Abrimos el log en modo añadir (a), cada operación nueva va al final (antes se corta una última línea incompleta).
+        self.reparar_log()
+        self.log = open(self.ruta_log, 'ab')
+        self.firma_disco = self.firma_archivos()
+
+    # Lee 'notas.json' (y su índice) y aplica encima las operaciones de los logs (primero el antiguo, luego el actual).
+    def cargar(self):
+        self.notas = {}
+        self.operaciones_log = 0
+        if os.path.exists(self.ruta):
+            try:
+                # Lectura en bytes: el serializador decodifica directamente sin pasar por texto.
+                with open(self.ruta, 'rb') as f:
+                    for nota in self.serializador.decodificar(f.read()):
+                        # Las notas guardadas antes de existir las versiones empiezan en la 1.
+                        nota.setdefault('version', 1)
+                        self.notas[nota['id']] = nota
+            except self.serializador.errores:
+                print(
+                    "Advertencia: Archivo de notas vacío o corrupto, iniciando con lista vacía.")
+                self.notas = {}
+
+        # El índice guardado solo sirve si corresponde a esta misma instantánea, si no se reconstruye y se guarda para la próxima vez.
+        firma = self.firma_instantanea()
+        indice = IndiceInvertido.cargar(
+            self.ruta_indice, firma, self.serializador) if firma else None
+        if indice is None:
+            indice = IndiceInvertido.desde_notas(self.notas.values())
+            if firma:
+                indice.guardar(self.ruta_indice, firma, self.serializador)
+        self.indice = indice
+
+        self.ultimo_id = max(self.notas, default=0)
+        for ruta_log in (self.ruta_log_antiguo, self.ruta_log):
+            if not os.path.exists(ruta_log):
+                continue
+            with open(ruta_log, 'rb') as f:
+                for linea in f:
+                    try:
+                        operacion = self.serializador.decodificar(linea)
+                    except self.serializador.errores:
+                        # Una línea incompleta solo puede ser la última escritura antes de un corte, se descarta.
+                        print("Advertencia: Operación incompleta en el registro, se ignora.")
+                        continue
+                    self.aplicar(operacion)
+                    if ruta_log == self.ruta_log:
+                        self.operaciones_log += 1
+
+    # Aplica una operación del log al diccionario en memoria (volver a aplicarla no cambia el resultado).
+    def aplicar(self, operacion: dict):
+        id_nota = operacion['id']
+        if operacion['op'] == 'borrar':
+            self.notas.pop(id_nota, None)
+            self.indice.quitar(id_nota)
+        else:
+            self.notas[id_nota] = {"id": id_nota, "contenido": operacion['contenido'],
+                                   "version": operacion.get('version', 1)}
+            # El índice se actualiza solo para esta nota, no se reconstruye.
+            self.indice.agregar(id_nota, operacion['contenido'])
+        self.ultimo_id = max(self.ultimo_id, id_nota)
+
+    # Añade varias operaciones con una sola escritura al log.
+    # Con 'versiones' {id: versión esperada, None = no existía} la comprobación y la escritura son atómicas (bloqueo entre procesos + cerrojo):
+    # si otro proceso escribió desde nuestra última lectura o alguna nota no está en la versión esperada, lanza ConflictoVersiones sin escribir nada.
+    def registrar_lote(self, operaciones: List[dict], versiones: Optional[Dict[int, Optional[int]]] = None):
+        if not operaciones:
+            return
+        with self.bloqueo_entre_procesos(), self.cerrojo:
+            if versiones is not None:
+                if self.firma_archivos() != self.firma_disco:
+                    raise ConflictoVersiones([])
+                distintas = [id_nota for id_nota, version in versiones.items()
+                             if (self.notas[id_nota]['version'] if id_nota in self.notas else None) != version]
+                if distintas:
+                    raise ConflictoVersiones(distintas)
+            self.log.write(b"".join(self.serializador.codificar(operacion) + b"\n"
+                                    for operacion in operaciones))
+            # flush entrega las líneas al sistema operativo, si el programa se cae las operaciones ya están en disco.
+            self.log.flush()
+            for operacion in operaciones:
+                self.aplicar(operacion)
+            self.operaciones_log += len(operaciones)
+            self.firma_disco = self.firma_archivos()
+            compactar = self.operaciones_log >= UMBRAL_COMPACTACION
+        if compactar:
+            self.compactar_en_segundo_plano()
+
+    # Guarda de una vez los cambios pendientes de RepositorioNotas: {id: nota nueva, o None si se borró}.
+    # 'originales' es la versión que tenía cada nota en el disco antes del cambio (None si no existía), si alguna cambió lanza ConflictoVersiones.
+    def guardar_cambios(self, cambios: Dict[int, Optional[dict]], originales: Dict[int, Optional[int]]):
+        operaciones: List[dict] = []
+        versiones: Dict[int, Optional[int]] = {}
+        for id_nota, nota in cambios.items():
+            if nota is None:
+                # Creada y borrada antes de llegar al disco, no hay nada que escribir.
+                if originales[id_nota] is None:
+                    continue
+                operaciones.append({"op": "borrar", "id": id_nota})
+            else:
+                operaciones.append({"op": "crear" if originales[id_nota] is None else "actualizar",
+                                    "id": id_nota, "contenido": nota['contenido'], "version": nota['version']})
+            versiones[id_nota] = originales[id_nota]
+        self.registrar_lote(operaciones, versiones)
+
+    def ultimo_id_usado(self) -> int:
+        return self.ultimo_id
+
+    # Tamaño y fecha de modificación de 'notas.json' y del log (None si no existen).
+    def firma_archivos(self) -> Tuple:
+        firma = []
+        for ruta in (self.ruta, self.ruta_log):
+            try:
+                estado = os.stat(ruta)
+                firma.append((estado.st_size, estado.st_mtime_ns))
+            except FileNotFoundError:
+                firma.append(None)
+        return tuple(firma)
+
+    # True si otro proceso escribió 'notas.json' o el log desde nuestra última escritura.
+    def modificado_externamente(self) -> bool:
+        with self.cerrojo:
+            # Durante nuestra propia compactación los archivos cambian, se comprueba al terminar.
+            if self.hilo_compactacion and self.hilo_compactacion.is_alive():
+                return False
+            return self.firma_archivos() != self.firma_disco
+
+    # Vuelve a leer las notas del disco (después de un cambio externo).
+    def recargar(self):
+        self.esperar_compactacion()
+        with self.bloqueo_entre_procesos(), self.cerrojo:
+            self.log.close()
+            self.abrir()
+
+    def obtener(self, id_nota: int) -> Optional[dict]:
+        return self.notas.get(id_nota)
+
+    def listar(self) -> List[dict]:
+        return list(self.notas.values())
+
+    # Busca en el índice invertido y devuelve [(nota, puntuación)] de la más a la menos relevante.
+    def buscar(self, consulta: str, limite: Optional[int] = None) -> List[Tuple[dict, float]]:
+        return [(self.notas[id_nota], puntuacion) for id_nota, puntuacion in self.indice.buscar(consulta, limite)]
+
+    # Escribe la lista completa de forma atómica: archivo temporal + renombrado, si algo falla 'notas.json' anterior sigue intacto.
+    def escribir_instantanea(self, notas: List[dict], indice: Optional[IndiceInvertido] = None):
+        ruta_temporal = self.ruta + ".tmp"
+        with open(ruta_temporal, 'wb') as f:
+            f.write(self.serializador.codificar(notas))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(ruta_temporal, self.ruta)
+        # El índice se guarda después, con la firma de la instantánea recién escrita.
+        if indice is not None:
+            indice.guardar(self.ruta_indice,
+                           self.firma_instantanea(), self.serializador)
+
+    # Tamaño y fecha de modificación de 'notas.json', identifican la instantánea a la que corresponde el índice guardado.
+    def firma_instantanea(self) -> Optional[List[int]]:
+        try:
+            estado = os.stat(self.ruta)
+        except FileNotFoundError:
+            return None
+        return [estado.st_size, estado.st_mtime_ns]
+
+    # Si el programa se cortó a mitad de una escritura, elimina la línea incompleta del final para que la siguiente operación empiece en una línea nueva.
+    def reparar_log(self):
+        if not os.path.exists(self.ruta_log):
+            return
+        with open(self.ruta_log, 'rb+') as f:
+            contenido = f.read()
+            if contenido and not contenido.endswith(b"\n"):
+                f.truncate(contenido.rfind(b"\n") + 1)
+
+    # Vacía el log actual (su contenido ya está en la instantánea).
+    def truncar_log(self):
+        open(self.ruta_log, 'w').close()
+
+    # Rota el log y vuelca una copia de las notas a 'notas.json' en otro hilo, el menú sigue funcionando mientras tanto.
+    def compactar_en_segundo_plano(self):
+        with self.bloqueo_entre_procesos(), self.cerrojo:
+            # Solo una compactación a la vez, y nunca sobre un log antiguo que aún no está en la instantánea.
+            if (self.hilo_compactacion and self.hilo_compactacion.is_alive()) or os.path.exists(self.ruta_log_antiguo):
+                return
+            # Las operaciones nuevas van a un log vacío, las anteriores quedan en el log antiguo hasta que la instantánea esté escrita.
+            self.log.close()
+            os.replace(self.ruta_log, self.ruta_log_antiguo)
+            self.log = open(self.ruta_log, 'ab')
+            self.operaciones_log = 0
+            self.firma_disco = self.firma_archivos()
+            copia = [dict(nota) for nota in self.notas.values()]
+
+        self.hilo_compactacion = threading.Thread(
+            target=self.terminar_compactacion, args=(copia,), daemon=True)
+        self.hilo_compactacion.start()
+
+    # El índice de la copia se construye en este hilo, así no hace falta copiar el índice en memoria.
+    # La instantánea se escribe con el bloqueo entre procesos tomado, así otro proceso no la lee a medias ni termina él la misma compactación.
+    def terminar_compactacion(self, copia: List[dict]):
+        indice = IndiceInvertido.desde_notas(copia)
+        with self.bloqueo_entre_procesos():
+            self.escribir_instantanea(copia, indice)
+            with self.cerrojo:
+                os.remove(self.ruta_log_antiguo)
+                self.firma_disco = self.firma_archivos()
+
+    # Sustituye todas las notas por 'notas' (lo usa guardar_notas), escribe la instantánea y vacía el log.
+    def reemplazar(self, notas: List[dict]):
+        notas = [{**nota, "version": nota.get('version', 1)} for nota in notas]
+        self.esperar_compactacion()
+        with self.bloqueo_entre_procesos(), self.cerrojo:
+            self.notas = {nota['id']: nota for nota in notas}
+            self.indice = IndiceInvertido.desde_notas(notas)
+            self.ultimo_id = max(self.ultimo_id, max(self.notas, default=0))
+            self.escribir_instantanea(notas, self.indice)
+            self.log.close()
+            self.truncar_log()
+            self.log = open(self.ruta_log, 'ab')
+            self.operaciones_log = 0
+            self.firma_disco = self.firma_archivos()
+
+    def esperar_compactacion(self):
+        if self.hilo_compactacion:
+            self.hilo_compactacion.join()
+
+    # Espera a que termine una compactación en curso y cierra el log.
+    def cerrar(self):
+        self.esperar_compactacion()
+        self.log.close()
+
+
+# Convierte una consulta con la sintaxis del buscador ('OR'/'|', 'palabra*') en una consulta MATCH de FTS5.
+# Cada palabra va entre comillas, así los caracteres especiales de FTS5 que escriba el usuario no dan error de sintaxis.
+def consulta_fts5(consulta: str) -> str:
+    grupos: List[str] = []
+    for grupo in SEPARADORES_OR.split(consulta.strip()):
+        terminos: List[str] = []
+        for termino in grupo.split():
+            palabras = tokenizar(termino)
+            for i, palabra in enumerate(palabras):
+                prefijo = termino.endswith("*") and i == len(palabras) - 1
+                terminos.append(f'"{palabra}"' + ("*" if prefijo else ""))
+        if terminos:
+            grupos.append("(" + " AND ".join(terminos) + ")")
+    return " OR ".join(grupos)
+
+
+# Almacén alternativo sobre SQLite: la tabla NOTAS guarda las notas con ID autoincremental y la tabla virtual NOTAS_FTS (FTS5) indexa su contenido.
+# Tiene los mismos métodos que AlmacenNotas, así el resto del programa no cambia al elegir un backend u otro.
+class AlmacenNotasSQLite:
+
+    def __init__(self, ruta: str = nombre_base_datos, ruta_json: str = nombre_archivo):
+        self.ruta = ruta
+        # RepositorioNotas puede guardar desde su hilo de guardado periódico (siempre con su cerrojo).
+        self.conn = sqlite3.connect(ruta, check_same_thread=False)
+        # WAL + synchronous=NORMAL: cada cambio es un commit pequeño que no obliga a sincronizar todo el archivo.
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.crear_tablas()
+        self.migrar_desde_json(ruta_json)
+        # data_version cambia cuando OTRA conexión modifica la base de datos.
+        self.version_datos = self.leer_version_datos()
+
+    def leer_version_datos(self) -> int:
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # Crea las tablas y los triggers que mantienen NOTAS_FTS sincronizada con NOTAS.
+    def crear_tablas(self):
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS NOTAS (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            contenido TEXT NOT NULL,
+            -- Aumenta con cada cambio de la nota (control de concurrencia optimista).
+            version INTEGER NOT NULL DEFAULT 1
+        );
+
+        -- remove_diacritics 2: 'canción' y 'cancion' son la misma palabra, igual que en el índice invertido.
+        CREATE VIRTUAL TABLE IF NOT EXISTS NOTAS_FTS USING fts5(
+            contenido, content='NOTAS', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS NOTAS_AI AFTER INSERT ON NOTAS BEGIN
+            INSERT INTO NOTAS_FTS(rowid, contenido) VALUES (new.id, new.contenido);
+        END;
+        CREATE TRIGGER IF NOT EXISTS NOTAS_AD AFTER DELETE ON NOTAS BEGIN
+            INSERT INTO NOTAS_FTS(NOTAS_FTS, rowid, contenido) VALUES ('delete', old.id, old.contenido);
+        END;
+        CREATE TRIGGER IF NOT EXISTS NOTAS_AU AFTER UPDATE ON NOTAS BEGIN
+            INSERT INTO NOTAS_FTS(NOTAS_FTS, rowid, contenido) VALUES ('delete', old.id, old.contenido);
+            INSERT INTO NOTAS_FTS(rowid, contenido) VALUES (new.id, new.contenido);
+        END;
+        """)
+
+        # Las bases de datos creadas antes de existir las versiones reciben la columna (todas las notas empiezan en la 1).
+        columnas = [fila[1] for fila in self.conn.execute("PRAGMA table_info(NOTAS)")]
+        if "version" not in columnas:
+            with self.conn:
+                self.conn.execute(
+                    "ALTER TABLE NOTAS ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+    # La primera vez que se abre la base de datos copia las notas de 'notas.json' (con su log) conservando sus IDs.
+    # La migración se anota en PRAGMA user_version en la misma transacción, así borrar después todas las notas no hace que vuelvan las del JSON.
+    def migrar_desde_json(self, ruta_json: str):
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= VERSION_MIGRADA_JSON:
+            return
 
-        # El bloque 'except' se ejecuta si 'json.load()' falla (Si el archivo existe pero está vacío o corrupto).
-        except json.JSONDecodeError:
+        # Las bases de datos que ya tenían notas antes de anotar la migración solo se marcan como migradas.
+        notas: List[dict] = []
+        ultimo_id = 0
+        if (not self.conn.execute("SELECT 1 FROM NOTAS LIMIT 1").fetchone()
+                and (os.path.exists(ruta_json) or os.path.exists(ruta_json + ".log"))):
+            almacen_json = AlmacenNotas(ruta_json)
+            try:
+                notas = almacen_json.listar()
+                ultimo_id = almacen_json.ultimo_id
+            finally:
+                almacen_json.cerrar()
+
+        with self.conn:
+            if notas:
+                self.conn.executemany("INSERT INTO NOTAS (id, contenido, version) VALUES (?, ?, ?)",
+                                      ((nota['id'], nota['contenido'], nota.get('version', 1)) for nota in notas))
+                # Los IDs de notas ya borradas tampoco se reutilizan después de migrar.
+                self.conn.execute(
+                    "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'NOTAS'", (ultimo_id,))
+            self.conn.execute(f"PRAGMA user_version = {VERSION_MIGRADA_JSON}")
+        if notas:
             print(
-                "Advertencia: Archivo de notas vacío o corrupto, iniciando con lista vacía.")
+                f"✅ {len(notas)} notas migradas de '{ruta_json}' a '{self.ruta}'.")
 
-            # Devuelve una lista vacía para que el programa pueda continuar sin errores.
-            return []
+    def obtener(self, id_nota: int) -> Optional[dict]:
+        fila = self.conn.execute(
+            "SELECT id, contenido, version FROM NOTAS WHERE id = ?", (id_nota,)).fetchone()
+        return {"id": fila[0], "contenido": fila[1], "version": fila[2]} if fila else None
 
-    # Si el archivo NO existe (primera ejecución), simplemente devuelve una lista vacía para empezar de cero.
-    else:
-        return []
+    def listar(self) -> List[dict]:
+        return [{"id": id_nota, "contenido": contenido, "version": version}
+                for id_nota, contenido, version in self.conn.execute("SELECT id, contenido, version FROM NOTAS ORDER BY id")]
+
+    # Búsqueda con FTS5 ordenada por bm25(), que es menor cuanto más relevante (se devuelve cambiada de signo).
+    def buscar(self, consulta: str, limite: Optional[int] = None) -> List[Tuple[dict, float]]:
+        expresion = consulta_fts5(consulta)
+        if not expresion:
+            return []
+        filas = self.conn.execute("""
+            SELECT NOTAS.id, NOTAS.contenido, NOTAS.version, bm25(NOTAS_FTS)
+            FROM NOTAS_FTS JOIN NOTAS ON NOTAS.id = NOTAS_FTS.rowid
+            WHERE NOTAS_FTS MATCH ?
+            ORDER BY bm25(NOTAS_FTS)
+            LIMIT ?""", (expresion, -1 if limite is None else limite))
+        return [({"id": id_nota, "contenido": contenido, "version": version}, -puntuacion)
+                for id_nota, contenido, version, puntuacion in filas]
+
+    # Guarda los cambios pendientes de RepositorioNotas en una sola transacción: {id: nota nueva, o None si se borró}.
+    # BEGIN IMMEDIATE toma el bloqueo de escritura antes de comprobar nada, y cada UPDATE/DELETE solo afecta a la nota si sigue en la versión
+    # de 'originales': si alguna fila no cambia (rowcount 0) otro proceso se adelantó, se deshace todo y se lanza ConflictoVersiones.
+    def guardar_cambios(self, cambios: Dict[int, Optional[dict]], originales: Dict[int, Optional[int]]):
+        conflictos: List[int] = []
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for id_nota, nota in cambios.items():
+                version = originales[id_nota]
+                if nota is None:
+                    # Creada y borrada antes de llegar al disco, no hay nada que escribir.
+                    if version is None:
+                        continue
+                    cursor = self.conn.execute(
+                        "DELETE FROM NOTAS WHERE id = ? AND version = ?", (id_nota, version))
+                elif version is None:
+                    cursor = self.conn.execute("INSERT OR IGNORE INTO NOTAS (id, contenido, version) VALUES (?, ?, ?)",
+                                               (id_nota, nota['contenido'], nota['version']))
+                else:
+                    cursor = self.conn.execute("UPDATE NOTAS SET contenido = ?, version = ? WHERE id = ? AND version = ?",
+                                               (nota['contenido'], nota['version'], id_nota, version))
+                if cursor.rowcount == 0:
+                    conflictos.append(id_nota)
+            if conflictos:
+                raise ConflictoVersiones(conflictos)
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    # Mayor ID asignado alguna vez (también los de notas ya borradas).
+    def ultimo_id_usado(self) -> int:
+        fila = self.conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'NOTAS'").fetchone()
+        return fila[0] if fila else 0
+
+    def modificado_externamente(self) -> bool:
+        return self.leer_version_datos() != self.version_datos
+
+    # Las consultas ya leen la base de datos, solo se anota la versión vista.
+    def recargar(self):
+        self.version_datos = self.leer_version_datos()
+
+    # Sustituye todas las notas en una sola transacción (lo usa guardar_notas).
+    def reemplazar(self, notas: List[dict]):
+        with self.conn:
+            self.conn.execute("DELETE FROM NOTAS")
+            self.conn.executemany("INSERT INTO NOTAS (id, contenido, version) VALUES (?, ?, ?)",
+                                  ((nota['id'], nota['contenido'], nota.get('version', 1)) for nota in notas))
+
+    def cerrar(self):
+        self.conn.close()
+
+
+# Sesión en memoria sobre un almacén (JSON o SQLite): carga las notas una vez, anota qué notas cambiaron (sucias) y las guarda juntas
+# cada MAX_CAMBIOS_SIN_GUARDAR cambios, cada INTERVALO_GUARDADO segundos y al salir. Antes de guardar comprueba si otro proceso modificó
+# los archivos, en ese caso recarga y solo vuelve a aplicar nuestros cambios sobre las notas que el otro proceso no tocó.
+class RepositorioNotas:
+
+    def __init__(self, almacen_base, max_cambios: int = MAX_CAMBIOS_SIN_GUARDAR, intervalo: float = INTERVALO_GUARDADO):
+        self.almacen = almacen_base
+        self.max_cambios = max_cambios
+        self.cerrojo = threading.RLock()
+
+        # 1. Carga única: diccionario id -> nota.
+        self.notas: Dict[int, dict] = {nota['id']: nota for nota in almacen_base.listar()}
+        self.ultimo_id = max(almacen_base.ultimo_id_usado(),
+                             max(self.notas, default=0))
+
+        # 2. Cambios pendientes {id: nota nueva o None si se borró} y la versión que tenía cada nota en el disco antes de cambiarla (None si no existía).
+        self.sucias: Dict[int, Optional[dict]] = {}
+        self.originales: Dict[int, Optional[int]] = {}
+
+        # 3. Hilo que guarda los cambios pendientes cada 'intervalo' segundos.
+        self.detener = threading.Event()
+        self.hilo_guardado: Optional[threading.Thread] = None
+        if intervalo > 0:
+            self.hilo_guardado = threading.Thread(
+                target=self.guardar_periodicamente, args=(intervalo,), daemon=True)
+            self.hilo_guardado.start()
+
+    def guardar_periodicamente(self, intervalo: float):
+        while not self.detener.wait(intervalo):
+            self.guardar()
+
+    # Aplica el cambio de una nota en memoria, lo anota como pendiente y guarda si ya hay demasiados.
+    def marcar(self, id_nota: int, nota: Optional[dict]):
+        if id_nota not in self.originales:
+            anterior = self.notas.get(id_nota)
+            self.originales[id_nota] = anterior['version'] if anterior else None
+        self.sucias[id_nota] = nota
+        if nota is None:
+            self.notas.pop(id_nota, None)
+        else:
+            self.notas[id_nota] = nota
+        if len(self.sucias) >= self.max_cambios:
+            self.guardar()
+
+    # Si otro proceso cambió el disco, recarga las notas y vuelve a aplicar los cambios pendientes que no chocan con los suyos.
+    # 'forzar' recarga aunque no se detecte el cambio (lo usa guardar después de un ConflictoVersiones).
+    def sincronizar(self, forzar: bool = False):
+        with self.cerrojo:
+            if not forzar and not self.almacen.modificado_externamente():
+                return
+            self.almacen.recargar()
+            actuales = {nota['id']: nota for nota in self.almacen.listar()}
+            self.ultimo_id = max(self.ultimo_id, self.almacen.ultimo_id_usado(),
+                                 max(actuales, default=0))
+
+            pendientes, originales = self.sucias, self.originales
+            self.sucias, self.originales = {}, {}
+            descartadas: List[int] = []
+            for id_nota, nota in pendientes.items():
+                externa = actuales.get(id_nota)
+                version_externa = externa['version'] if externa else None
+                if version_externa == originales[id_nota]:
+                    # El otro proceso no tocó esta nota, nuestro cambio sigue siendo válido.
+                    self.sucias[id_nota], self.originales[id_nota] = nota, version_externa
+                elif originales[id_nota] is None and nota is not None:
+                    # Ambos crearon una nota con el mismo ID: la nuestra recibe un ID nuevo.
+                    self.ultimo_id += 1
+                    self.sucias[self.ultimo_id] = {**nota, "id": self.ultimo_id}
+                    self.originales[self.ultimo_id] = None
+                    print(
+                        f"⚠️ La nota {id_nota} también la creó otro proceso, la tuya se guardará con el ID {self.ultimo_id}.")
+                else:
+                    descartadas.append(id_nota)
+
+            self.notas = actuales
+            for id_nota, nota in self.sucias.items():
+                if nota is None:
+                    self.notas.pop(id_nota, None)
+                else:
+                    self.notas[id_nota] = nota
+            print("ℹ️ Las notas se modificaron desde otro programa, se han recargado.")
+            if descartadas:
+                print(
+                    f"⚠️ Cambios descartados porque otro proceso modificó las mismas notas: {', '.join(map(str, descartadas))}.")
+
+    # Escribe los cambios pendientes en el almacén (una sola escritura o transacción para todos).
+    # El almacén comprueba las versiones al escribir, si otro proceso se adelantó se sincroniza y se reintenta solo lo que no choca.
+    def guardar(self):
+        with self.cerrojo:
+            for intento in range(INTENTOS_GUARDADO):
+                if not self.sucias:
+                    return
+                # Nunca escribimos sobre datos que no hemos visto.
+                self.sincronizar(forzar=intento > 0)
+                if not self.sucias:
+                    return
+                try:
+                    self.almacen.guardar_cambios(self.sucias, self.originales)
+                except ConflictoVersiones:
+                    continue
+                self.sucias, self.originales = {}, {}
+                return
+            print("⚠️ Otro proceso está guardando a la vez, los cambios pendientes se guardarán en el próximo intento.")
+
+    def obtener(self, id_nota: int) -> Optional[dict]:
+        with self.cerrojo:
+            self.sincronizar()
+            return self.notas.get(id_nota)
+
+    def listar(self) -> List[dict]:
+        with self.cerrojo:
+            self.sincronizar()
+            return list(self.notas.values())
+
+    # La búsqueda la resuelve el índice del almacén, así que antes se guardan los cambios pendientes.
+    def buscar(self, consulta: str, limite: Optional[int] = None) -> List[Tuple[dict, float]]:
+        with self.cerrojo:
+            self.guardar()
+            self.sincronizar()
+            return self.almacen.buscar(consulta, limite)
+
+    def crear(self, contenido: str) -> dict:
+        with self.cerrojo:
+            self.sincronizar()
+            self.ultimo_id += 1
+            nota = {"id": self.ultimo_id, "contenido": contenido, "version": 1}
+            self.marcar(nota['id'], nota)
+            return nota
+
+    # Cambia el contenido solo si la nota sigue en la 'version' que vio quien la edita (None = sin comprobar).
+    # Devuelve ("ok", nota nueva), ("no_existe", None) o ("conflicto", nota actual).
+    def actualizar_si_version(self, id_nota: int, contenido: str, version: Optional[int] = None) -> Tuple[str, Optional[dict]]:
+        with self.cerrojo:
+            self.sincronizar()
+            actual = self.notas.get(id_nota)
+            if actual is None:
+                return "no_existe", None
+            if version is not None and actual['version'] != version:
+                return "conflicto", actual
+            nota = {"id": id_nota, "contenido": contenido,
+                    "version": actual['version'] + 1}
+            self.marcar(id_nota, nota)
+            return "ok", nota
+
+    # Igual que actualizar_si_version pero borrando la nota.
+    def borrar_si_version(self, id_nota: int, version: Optional[int] = None) -> Tuple[str, Optional[dict]]:
+        with self.cerrojo:
+            self.sincronizar()
+            actual = self.notas.get(id_nota)
+            if actual is None:
+                return "no_existe", None
+            if version is not None and actual['version'] != version:
+                return "conflicto", actual
+            self.marcar(id_nota, None)
+            return "ok", None
+
+    # Sustituye todas las notas (lo usa guardar_notas), los cambios pendientes quedan incluidos en la lista nueva.
+    def reemplazar(self, notas: List[dict]):
+        with self.cerrojo:
+            self.sucias, self.originales = {}, {}
+            self.almacen.reemplazar(notas)
+            self.notas = {nota['id']: nota for nota in self.almacen.listar()}
+            self.ultimo_id = max(self.ultimo_id, max(self.notas, default=0))
+
+    # Guarda lo pendiente, detiene el hilo de guardado y cierra el almacén.
+    def cerrar(self):
+        self.detener.set()
+        if self.hilo_guardado:
+            self.hilo_guardado.join()
+        self.guardar()
+        self.almacen.cerrar()
+
+
+# Sesión compartida por todas las funciones, se abre la primera vez que se usa.
+repositorio: Optional[RepositorioNotas] = None
+
+
+# Abre el almacén del backend elegido en BACKEND (la primera vez con SQLite migra 'notas.json' si existe).
+def obtener_almacen():
+    if BACKEND == "sqlite":
+        return AlmacenNotasSQLite(nombre_base_datos, nombre_archivo)
+    return AlmacenNotas(nombre_archivo)
+
+
+def obtener_repositorio() -> RepositorioNotas:
+    global repositorio
+    if repositorio is None:
+        repositorio = RepositorioNotas(obtener_almacen())
+        # Los cambios pendientes se guardan también si el programa termina sin pasar por 'Salir'.
+        atexit.register(repositorio.cerrar)
+    return repositorio
+
+
+# Creamos la funcion que cargara la lista de notas, ahora viene de la sesión en memoria (el disco se lee una sola vez), si no hay notas devuelve una lista vacía.
+def cargar_notas():
+    return obtener_repositorio().listar()
 
 
-# Creamos la funcion que guardara la lista de notas de Python en el archivo JSON.
+# Creamos la funcion que guardara la lista completa de notas de Python, reescribe la instantánea de forma atómica y vacía el log.
 def guardar_notas(notas):
 
-    # Abre el archivo en modo escritura (w)m esto sobrescribe completamente cualquier contenido anterior.
-    with open(nombre_archivo, 'w') as f:
+    # Para cambios de una sola nota es mejor usar el almacén (crear/actualizar/borrar), que solo añade una línea al log.
+    obtener_repositorio().reemplazar(notas)
 
-        # json.dump(datos, archivo) serializa y convierte la lista de Python ('notas') a formato JSON y la escribe en el archivo (f), podemos usar 'json.dump(notas, f, indent=4)' para que el archivo JSON sea más legible.
-        json.dump(notas, f, indent=4)
-
-        # Y podemos imprimir un mensaje de confirmacion.
-        print("Notas guardadas correctamente.")
+    # Y podemos imprimir un mensaje de confirmacion.
+    print("Notas guardadas correctamente.")
 
 
 # Funciones CRUD (Crear, Leer, Actualizar, Borrar) y Búsqueda.
@@ -72,38 +1058,16 @@ def leer_notas():
         print("\nTodavía no tienes ninguna nota.")
 
 
-# Esta pide el contenido al usuario, crea una ID única y añade la nueva nota a la lista.
+# Esta pide el contenido al usuario, crea una ID única y añade la nueva nota al almacén.
 def crear_nota():
 
-    # Carga la lista actual para poder añadirle algo.
-    notas = cargar_notas()
-
-    # Lógica de ID, garantiza que el nuevo ID sea el más alto + 1.
-    if notas:
-
-        # Comprensión de lista, crea una lista temporal con solo los IDs de todas las notas existentes.
-        todos_ids = [nota['id'] for nota in notas]
-
-        # Encuentra el ID más grande y le suma 1 para el nuevo ID.
-        id_nota = max(todos_ids) + 1
-
-    # Si la lista está vacía, el primer ID es 1.
-    else:
-        id_nota = 1
-
     contenido = input("Escribe el contenido de la nueva nota: ")
 
-    # Construye la nueva nota como un diccionario.
-    nueva_nota = {"id": id_nota, "contenido": contenido}
-
-    # Añade el nuevo diccionario a la lista de notas.
-    notas.append(nueva_nota)
-
-    # Guarda la lista completa (con la nueva nota) en el archivo JSON.
-    guardar_notas(notas)
+    # La sesión asigna el ID (el más alto usado + 1, sin recorrer todas las notas), el guardado se hace según la política de guardado.
+    nueva_nota = obtener_repositorio().crear(contenido)
 
     # Imprimimos un mensaje confirmando que se han guardado los datos.
-    print(f"\n✅ Nota con ID {id_nota} creada y guardada.")
+    print(f"\n✅ Nota con ID {nueva_nota['id']} creada y guardada.")
 
 
 # Esta funcion pide un ID y un nuevo contenido, y reemplaza el contenido de la nota correspondiente.
@@ -111,7 +1075,7 @@ def actualizar_nota():
 
     # Muestra las notas existentes para que el usuario sepa qué ID elegir.
     leer_notas()
-    notas = cargar_notas()
+    repositorio_notas = obtener_repositorio()
 
     # El bloque 'try' intenta ejecutar el código.
     try:
@@ -124,33 +1088,31 @@ def actualizar_nota():
         print("❌ Error: Por favor, ingresa un número válido para el ID.")
         return
 
-    # Bucle para buscar la nota con el ID proporcionado.
-    for nota in notas:
-        if nota['id'] == id_actualizar:
-
-            # Si se encuentra la nota se pide el nuevo contenido.
-            nuevo_contenido = input(
-                f"Nota ID {id_actualizar} (Antiguo: '{nota['contenido']}'). Ingresa nuevo contenido: ")
-
-            # Actualiza el diccionario en la lista, al modificar 'nota', esta modificando directamente el diccionario dentro de la lista 'notas'.
-            nota['contenido'] = nuevo_contenido
-
-            # Guarda la lista modificada.
-            guardar_notas(notas)
-            print(f"✅ Nota con ID {id_actualizar} actualizada correctamente.")
-
-            # Detiene la función (ya no es necesario seguir buscando).
-            return
+    # Búsqueda directa por ID en el diccionario, sin recorrer la lista.
+    nota = repositorio_notas.obtener(id_actualizar)
+    if nota is None:
+        print(f"❌ Error: No se encontró ninguna nota con el ID {id_actualizar}.")
+        return
 
-    # Este código se ejecuta si el bucle termina sin encontrar la nota (sin ejecutar 'return').
-    print(f"❌ Error: No se encontró ninguna nota con el ID {id_actualizar}.")
+    # Si se encuentra la nota se pide el nuevo contenido.
+    nuevo_contenido = input(
+        f"Nota ID {id_actualizar} (Antiguo: '{nota['contenido']}'). Ingresa nuevo contenido: ")
+
+    # Marca solo esta nota como cambiada, si sigue en la versión que se mostró (otro proceso pudo cambiarla mientras tanto).
+    resultado, actual = repositorio_notas.actualizar_si_version(
+        id_actualizar, nuevo_contenido, nota['version'])
+    if resultado == "ok":
+        print(f"✅ Nota con ID {id_actualizar} actualizada correctamente.")
+    elif resultado == "conflicto":
+        print(f"❌ Error: La nota con ID {id_actualizar} cambió mientras la editabas (ahora: '{actual['contenido']}'), vuelve a intentarlo.")
+    else:
+        print(f"❌ Error: La nota con ID {id_actualizar} se borró mientras la editabas.")
 
 
-# Esta funcion pide un ID y lo elimina de la lista de notas.
+# Esta funcion pide un ID y lo elimina del almacén de notas.
 def borrar_nota():
 
     leer_notas()
-    notas = cargar_notas()
 
     # El bloque 'try' intenta ejecutar el código.
     try:
@@ -162,44 +1124,30 @@ def borrar_nota():
         print("❌ Error: Por favor, ingresa un número válido para el ID.")
         return
 
-    # Guarda la cantidad original de notas.
-    longitud_inicial = len(notas)
-
-    # Comprensión de lista, crea una NUEVA lista ('notas_filtradas') que incluye SÓLO las notas cuyo ID NO coincide con 'id_borrar', si encuentra el ID, simplemente se salta esa nota, es una forma limpia de "borrar".
-    notas_filtradas = [nota for nota in notas if nota['id'] != id_borrar]
-
-    # Si la nueva lista es más corta, significa que se eliminó una nota, reemplaza la lista vieja por la nueva (filtrada).
-    if len(notas_filtradas) < longitud_inicial:
-        notas = notas_filtradas
-
-        # Guarda la lista más corta.
-        guardar_notas(notas)
+    # borrar_si_version devuelve "no_existe" si el ID no existía.
+    if obtener_repositorio().borrar_si_version(id_borrar)[0] == "ok":
         print(f"\n✅ Nota con ID {id_borrar} eliminada correctamente.")
 
-    # Las longitudes son iguales, lo que significa que el ID no existía.
     else:
         print(f"\n❌ Error: No se encontró la nota con ID {id_borrar}.")
 
 
-# Definimos una funcion para la busqueda de notas, pide una palabra clave y muestra todas las notas que la contienen (sin distinguir mayúsculas/minúsculas).
+# Definimos una funcion para la busqueda de notas, pide una consulta y muestra las notas que la cumplen ordenadas por relevancia (sin distinguir mayúsculas/minúsculas ni tildes).
 def buscar_notas():
 
-    notas = cargar_notas()
-
-    termino_busqueda = input("\nIngresa la palabra clave para buscar: ")
-
-    # Normaliza el término de búsqueda a minúsculas.
-    termino_busqueda = termino_busqueda.lower()
+    print("\nVarias palabras = deben aparecer todas, 'OR' o '|' = cualquiera de ellas, 'palabra*' = palabras que empiezan así.")
+    termino_busqueda = input("Ingresa la palabra clave para buscar: ")
 
-    # Comprensión de lista, filtra las notas donde la palabra clave (en minúsculas) está dentro del contenido de la nota (también en minúsculas).
-    notas_encontradas = [
-        nota for nota in notas if termino_busqueda in nota['contenido'].lower()]
+    # El índice invertido solo mira las notas que contienen las palabras buscadas y las puntúa con BM25, nos quedamos con las más relevantes (heapq.nlargest).
+    notas_encontradas = obtener_repositorio().buscar(
+        termino_busqueda, MAX_RESULTADOS_BUSQUEDA)
 
     # Ponemos un condicional, si la nota es encontrada imprimimos estos mensajes.
     if notas_encontradas:
-        print("\n--- RESULTADOS DE BÚSQUEDA ---")
-        for nota in notas_encontradas:
-            print(f"\nID: {nota['id']}")
+        print(
+            f"\n--- RESULTADOS DE BÚSQUEDA ({len(notas_encontradas)}, como mucho {MAX_RESULTADOS_BUSQUEDA}) ---")
+        for nota, puntuacion in notas_encontradas:
+            print(f"\nID: {nota['id']} (relevancia {puntuacion:.2f})")
             print(f"Contenido: {nota['contenido']}")
 
     # Mensaje al usuario cuando la búsqueda no produce resultados.
@@ -207,11 +1155,348 @@ def buscar_notas():
         print(
             f"\n❌ No se encontraron notas que contengan '{termino_busqueda}'.")
 
+# Esta funcion exporta todas las notas a un archivo JSON con sangría, fácil de leer (el almacén guarda en formato compacto).
+def exportar_notas():
+
+    ruta = input("\nRuta del archivo de exportación (vacío = notas_exportadas.json): ").strip() or "notas_exportadas.json"
+    notas = cargar_notas()
+
+    try:
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(notas, f, indent=4, ensure_ascii=False)
+    except OSError as e:
+        print(f"❌ Error al exportar las notas: {e}")
+        return
+
+    print(f"\n✅ {len(notas)} notas exportadas a '{os.path.abspath(ruta)}'.")
+
+
+# Banco de pruebas: guarda y vuelve a cargar 'num_notas' notas con cada serializador disponible y con el formato anterior (json con indent=4).
+def medir_serializadores(num_notas: int = NOTAS_BANCO_PRUEBAS):
+
+    notas = [{"id": i, "contenido": f"Nota {i}: comprar pan, leche y café para la reunión del día {i % 28 + 1}"}
+             for i in range(1, num_notas + 1)]
+    print(f"\n⏱️ Guardar y cargar {num_notas} notas:")
+    print(f"{'Serializador':<22}{'Guardar (s)':>12}{'Cargar (s)':>12}{'Tamaño (MB)':>13}")
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "notas.json")
+
+        # 1. Formato anterior, como referencia.
+        inicio = time.perf_counter()
+        with open(ruta, 'w') as f:
+            json.dump(notas, f, indent=4)
+        tiempo_guardar = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        with open(ruta, 'r') as f:
+            json.load(f)
+        tiempo_cargar = time.perf_counter() - inicio
+        print(f"{'json (indent=4)':<22}{tiempo_guardar:>12.3f}{tiempo_cargar:>12.3f}{os.path.getsize(ruta) / 1024 / 1024:>13.1f}")
+
+        # 2. Cada serializador disponible, con lectura y escritura en bytes.
+        for serializador in serializadores_disponibles():
+            inicio = time.perf_counter()
+            with open(ruta, 'wb') as f:
+                f.write(serializador.codificar(notas))
+            tiempo_guardar = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            with open(ruta, 'rb') as f:
+                cargadas = serializador.decodificar(f.read())
+            tiempo_cargar = time.perf_counter() - inicio
+            if cargadas != notas:
+                print(f"❌ {serializador.nombre}: las notas cargadas no coinciden con las guardadas.")
+                continue
+            print(f"{serializador.nombre:<22}{tiempo_guardar:>12.3f}{tiempo_cargar:>12.3f}{os.path.getsize(ruta) / 1024 / 1024:>13.1f}")
+
+    faltan = [nombre for nombre, disponible in (("orjson", ORJSON_DISPONIBLE), ("msgspec", MSGSPEC_DISPONIBLE))
+              if not disponible]
+    if faltan:
+        print(
+            f"ℹ️ Instala {' y '.join(faltan)} (pip install {' '.join(faltan)}) para compararlo también.")
+
+
+# --- SERVICIO HTTP (VARIOS USUARIOS) ---
+# API JSON sobre asyncio (sin dependencias externas) que comparte una sola sesión RepositorioNotas entre todos los clientes.
+# Cada nota tiene una versión: para cambiarla o borrarla hay que enviar la versión vista (cabecera If-Match o campo "version"),
+# si otro cliente la cambió antes se responde 409 con la nota actual en lugar de sobrescribirla.
+#
+#   GET    /notas               -> lista de notas
+#   POST   /notas               -> crea {"contenido": ...}
+#   GET    /notas/<id>          -> una nota (cabecera ETag = versión)
+#   PUT    /notas/<id>          -> cambia {"contenido": ..., "version": ...}
+#   DELETE /notas/<id>?version= -> borra
+#   GET    /buscar?q=...&limite=
+
+class ServicioNotas:
+
+    def __init__(self, repositorio_notas: RepositorioNotas):
+        self.repositorio = repositorio_notas
+        self.serializador = elegir_serializador(SERIALIZADOR)
+
+    # Atiende una conexión: varias peticiones seguidas sobre el mismo socket (keep-alive de HTTP/1.1).
+    async def atender_conexion(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        try:
+            while True:
+                # 1. Línea de petición y cabeceras.
+                try:
+                    cabecera = await lector.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lineas = cabecera.decode("latin-1").split("\r\n")
+                try:
+                    metodo, objetivo, version_http = lineas[0].split(" ", 2)
+                    cabeceras = {nombre.strip().lower(): valor.strip()
+                                 for nombre, valor in (linea.split(":", 1) for linea in lineas[1:] if ":" in linea)}
+                    # Solo dígitos ASCII: int() también aceptaría '-5', '+5' o '1_0'.
+                    valor_longitud = cabeceras.get("content-length", "0")
+                    if not (valor_longitud.isascii() and valor_longitud.isdigit()):
+                        raise ValueError(valor_longitud)
+                    longitud = int(valor_longitud)
+                except ValueError:
+                    self.responder(escritor, 400, {"error": "Petición mal formada."}, {}, False)
+                    break
+                # Sin soporte de cuerpos por trozos: leerlos como si no existieran desincronizaría la conexión.
+                if "transfer-encoding" in cabeceras:
+                    self.responder(escritor, 501, {"error": "Transfer-Encoding no soportado, usa Content-Length."}, {}, False)
+                    break
+                if longitud > MAX_CUERPO_PETICION:
+                    self.responder(escritor, 413, {"error": "Cuerpo demasiado grande."}, {}, False)
+                    break
+
+                # 2. Cuerpo y respuesta.
+                try:
+                    cuerpo = await lector.readexactly(longitud) if longitud else b""
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                estado, datos, extra = await self.despachar(metodo, objetivo, cabeceras, cuerpo)
+                if version_http == "HTTP/1.1":
+                    mantener = cabeceras.get("connection", "").lower() != "close"
+                else:
+                    mantener = cabeceras.get("connection", "").lower() == "keep-alive"
+                self.responder(escritor, estado, datos, extra, mantener)
+                await escritor.drain()
+                if not mantener:
+                    break
+        finally:
+            escritor.close()
+
+    def responder(self, escritor: asyncio.StreamWriter, estado: int, datos, extra: Dict[str, str], mantener: bool):
+        cuerpo = b"" if datos is None else self.serializador.codificar(datos)
+        cabeceras = {"Content-Type": "application/json; charset=utf-8",
+                     "Content-Length": str(len(cuerpo)),
+                     "Connection": "keep-alive" if mantener else "close", **extra}
+        escritor.write((f"HTTP/1.1 {estado} {ESTADOS_HTTP.get(estado, '')}\r\n"
+                        + "".join(f"{nombre}: {valor}\r\n" for nombre, valor in cabeceras.items())
+                        + "\r\n").encode("latin-1") + cuerpo)
+
+    # Decide qué hacer con cada petición, devuelve (estado HTTP, datos JSON, cabeceras extra).
+    async def despachar(self, metodo: str, objetivo: str, cabeceras: Dict[str, str], cuerpo: bytes) -> Tuple[int, Any, Dict[str, str]]:
+        url = urllib.parse.urlsplit(objetivo)
+        partes = [parte for parte in url.path.split("/") if parte]
+        parametros = dict(urllib.parse.parse_qsl(url.query))
+
+        try:
+            datos = self.serializador.decodificar(cuerpo) if cuerpo else {}
+        except self.serializador.errores:
+            return 400, {"error": "El cuerpo no es JSON válido."}, {}
+        if not isinstance(datos, dict):
+            return 400, {"error": "El cuerpo debe ser un objeto JSON."}, {}
+
+        if partes == ["notas"]:
+            if metodo == "GET":
+                # Las lecturas también toman el cerrojo del repositorio, que un guardado puede tener ocupado mientras escribe en disco,
+                # así que van a un hilo como las escrituras: el bucle de eventos nunca espera al disco.
+                return 200, await asyncio.to_thread(self.repositorio.listar), {}
+            if metodo == "POST":
+                contenido = datos.get("contenido")
+                if not isinstance(contenido, str):
+                    return 400, {"error": "Falta el campo 'contenido'."}, {}
+                # Las escrituras pueden tocar el disco (guardado por lotes), van a un hilo para no frenar al resto de clientes.
+                nota = await asyncio.to_thread(self.repositorio.crear, contenido)
+                return 201, nota, {"ETag": f'"{nota["version"]}"', "Location": f"/notas/{nota['id']}"}
+            return 405, {"error": "Método no permitido."}, {}
+
+        if len(partes) == 2 and partes[0] == "notas":
+            try:
+                id_nota = int(partes[1])
+            except ValueError:
+                return 404, {"error": "Nota no encontrada."}, {}
+
+            if metodo == "GET":
+                nota = await asyncio.to_thread(self.repositorio.obtener, id_nota)
+                if nota is None:
+                    return 404, {"error": "Nota no encontrada."}, {}
+                return 200, nota, {"ETag": f'"{nota["version"]}"'}
+
+            if metodo in ("PUT", "DELETE"):
+                # La versión que el cliente vio: cabecera If-Match, campo "version" del cuerpo o parámetro ?version=.
+                version = cabeceras.get("if-match", "").removeprefix("W/").strip('"') or \
+                    datos.get("version", parametros.get("version"))
+                try:
+                    version = int(version)
+                except (TypeError, ValueError):
+                    return 428, {"error": "Indica la versión de la nota (If-Match o 'version')."}, {}
+
+                if metodo == "PUT":
+                    contenido = datos.get("contenido")
+                    if not isinstance(contenido, str):
+                        return 400, {"error": "Falta el campo 'contenido'."}, {}
+                    resultado, nota = await asyncio.to_thread(self.repositorio.actualizar_si_version, id_nota, contenido, version)
+                else:
+                    resultado, nota = await asyncio.to_thread(self.repositorio.borrar_si_version, id_nota, version)
+
+                if resultado == "no_existe":
+                    return 404, {"error": "Nota no encontrada."}, {}
+                if resultado == "conflicto":
+                    return 409, {"error": "La nota cambió, vuelve a leerla.", "actual": nota}, {"ETag": f'"{nota["version"]}"'}
+                if nota is None:
+                    return 204, None, {}
+                return 200, nota, {"ETag": f'"{nota["version"]}"'}
+            return 405, {"error": "Método no permitido."}, {}
+
+        if partes == ["buscar"] and metodo == "GET":
+            try:
+                limite = int(parametros.get("limite", 20))
+            except ValueError:
+                return 400, {"error": "'limite' debe ser un número."}, {}
+            resultados = await asyncio.to_thread(self.repositorio.buscar, parametros.get("q", ""), limite)
+            return 200, [{"nota": nota, "puntuacion": puntuacion} for nota, puntuacion in resultados], {}
+
+        return 404, {"error": "Ruta no encontrada."}, {}
+
+
+# Arranca el servicio HTTP y atiende hasta pulsar Ctrl+C, al terminar guarda los cambios pendientes.
+def servir(puerto: int = PUERTO_SERVICIO):
+
+    async def ejecutar():
+        servicio = ServicioNotas(obtener_repositorio())
+        servidor = await asyncio.start_server(servicio.atender_conexion, HOST_SERVICIO, puerto, backlog=1024)
+        print(f"🌐 Servicio de notas en http://{HOST_SERVICIO}:{puerto} (Ctrl+C para detener)")
+        async with servidor:
+            await servidor.serve_forever()
+
+    try:
+        asyncio.run(ejecutar())
+    except KeyboardInterrupt:
+        print("\n👋 Servicio detenido.")
+    finally:
+        obtener_repositorio().cerrar()
+
+
+# --- PRUEBA DE CARGA ---
+
+# Envía una petición por una conexión abierta y lee la respuesta completa, devuelve (estado, datos JSON).
+async def peticion_http(lector: asyncio.StreamReader, escritor: asyncio.StreamWriter, metodo: str, ruta: str,
+                        datos=None, cabeceras: Optional[Dict[str, str]] = None) -> Tuple[int, Any]:
+    cuerpo = b"" if datos is None else json.dumps(datos).encode("utf-8")
+    extra = "".join(f"{nombre}: {valor}\r\n" for nombre,
+                    valor in (cabeceras or {}).items())
+    escritor.write(f"{metodo} {ruta} HTTP/1.1\r\nHost: {HOST_SERVICIO}\r\nContent-Length: {len(cuerpo)}\r\n{extra}\r\n".encode("latin-1") + cuerpo)
+    await escritor.drain()
+
+    cabecera = (await lector.readuntil(b"\r\n\r\n")).decode("latin-1")
+    estado = int(cabecera.split(" ", 2)[1])
+    longitud = 0
+    for linea in cabecera.split("\r\n")[1:]:
+        if linea.lower().startswith("content-length:"):
+            longitud = int(linea.split(":", 1)[1])
+    contenido = await lector.readexactly(longitud) if longitud else b""
+    return estado, json.loads(contenido) if contenido else None
+
+
+# Un cliente de la prueba: repite operaciones de la mezcla hasta 'fin' y anota la latencia de cada petición.
+async def cliente_carga(puerto: int, mezcla: Dict[str, float], num_notas: int, fin: float,
+                        latencias: List[float], contadores: Counter, semilla: int):
+    aleatorio = random.Random(semilla)
+    operaciones, pesos = list(mezcla), list(mezcla.values())
+    lector, escritor = await asyncio.open_connection(HOST_SERVICIO, puerto)
+    try:
+        while time.perf_counter() < fin:
+            operacion = aleatorio.choices(operaciones, pesos)[0]
+            id_nota = aleatorio.randint(1, num_notas)
+            inicio = time.perf_counter()
+            if operacion == "leer":
+                estado, _ = await peticion_http(lector, escritor, "GET", f"/notas/{id_nota}")
+            elif operacion == "buscar":
+                tema = aleatorio.choice(TEMAS_PRUEBA_CARGA)
+                estado, _ = await peticion_http(lector, escritor, "GET", f"/buscar?q={tema}&limite=10")
+            else:
+                # Escritura optimista: leer la versión y enviarla con el cambio, si otro cliente se adelantó llega un 409.
+                estado, nota = await peticion_http(lector, escritor, "GET", f"/notas/{id_nota}")
+                if estado == 200:
+                    estado, _ = await peticion_http(lector, escritor, "PUT", f"/notas/{id_nota}",
+                                                    {"contenido": f"{nota['contenido'][:40]} editada", "version": nota['version']})
+            latencias.append(time.perf_counter() - inicio)
+            contadores[estado] += 1
+    finally:
+        escritor.close()
+
+
+# Lanza el servicio en otro proceso con una carpeta temporal, crea notas de prueba y mide cada mezcla de operaciones.
+def prueba_carga(duracion: float = DURACION_PRUEBA_CARGA, concurrencia: int = CONCURRENCIA_PRUEBA_CARGA,
+                 num_notas: int = NOTAS_PRUEBA_CARGA):
+
+    # 1. Puerto libre y servicio en un proceso aparte (así el cliente no le quita CPU dentro del mismo bucle).
+    with socket.socket() as prueba:
+        prueba.bind((HOST_SERVICIO, 0))
+        puerto = prueba.getsockname()[1]
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        comando = [sys.executable, os.path.abspath(__file__), "--servir", "--puerto", str(puerto)]
+        if BACKEND == "sqlite":
+            comando.append("--sqlite")
+        proceso = subprocess.Popen(comando, cwd=carpeta, stdout=subprocess.DEVNULL)
+
+        async def ejecutar():
+            # 2. Esperar a que el servicio acepte conexiones.
+            for _ in range(100):
+                try:
+                    lector, escritor = await asyncio.open_connection(HOST_SERVICIO, puerto)
+                    break
+                except OSError:
+                    await asyncio.sleep(0.1)
+            else:
+                print("❌ El servicio no arrancó.")
+                return
+
+            # 3. Notas de prueba.
+            for i in range(num_notas):
+                await peticion_http(lector, escritor, "POST", "/notas",
+                                    {"contenido": f"Nota {i} sobre {TEMAS_PRUEBA_CARGA[i % len(TEMAS_PRUEBA_CARGA)]}"})
+            escritor.close()
+
+            # 4. Cada mezcla durante 'duracion' segundos con 'concurrencia' clientes.
+            print(f"\n⏱️ Prueba de carga: {concurrencia} clientes, {duracion:.0f} s por mezcla, {num_notas} notas ({BACKEND}).")
+            print(f"{'Mezcla':<12}{'Operaciones':>12}{'Op./s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'409':>7}")
+            for nombre, mezcla in MEZCLAS_PRUEBA_CARGA.items():
+                latencias: List[float] = []
+                contadores: Counter = Counter()
+                inicio = time.perf_counter()
+                fin = inicio + duracion
+                await asyncio.gather(*(cliente_carga(puerto, mezcla, num_notas, fin, latencias, contadores, semilla)
+                                       for semilla in range(concurrencia)))
+                segundos = time.perf_counter() - inicio
+                latencias.sort()
+                p50 = latencias[len(latencias) // 2] * 1000 if latencias else 0
+                p99 = latencias[int(0.99 * (len(latencias) - 1))] * 1000 if latencias else 0
+                print(f"{nombre:<12}{len(latencias):>12}{len(latencias) / segundos:>10,.0f}{p50:>10.2f}{p99:>10.2f}{contadores[409]:>7}")
+
+        try:
+            asyncio.run(ejecutar())
+        finally:
+            # Ctrl+C simulado: el servicio guarda lo pendiente y termina.
+            proceso.send_signal(signal.SIGINT)
+            try:
+                proceso.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proceso.kill()
+
+
 # Bucle principal de la aplicación de consola.
 
 
 def main():
-    # Bucle infinito que mantiene el programa en ejecución hasta que se pulsa '6', muestra el menú de opciones.
+    # Bucle infinito que mantiene el programa en ejecución hasta que se pulsa '8', muestra el menú de opciones.
     while True:
         print("\n--- GESTOR DE NOTAS ---")
         print("1. Crear nota")
@@ -219,12 +1504,16 @@ def main():
         print("3. Actualizar nota")
         print("4. Borrar nota")
         print("5. Buscar notas")
-        print("6. Salir")
+        print("6. Exportar notas (JSON legible)")
+        print("7. Medir velocidad de guardado y carga")
+        print("8. Salir")
 
-        opcion = input("\nElige una opción (1-6): ")
+        opcion = input("\nElige una opción (1-8): ")
 
         # Estructura de control: Llama a la función correspondiente según la opción elegida.
-        if opcion == '6':
+        if opcion == '8':
+            # Guarda los cambios pendientes y cierra el almacén antes de salir.
+            obtener_repositorio().cerrar()
             print("👋 Gracias por usar el gestor de notas. ¡Hasta pronto!")
             # El comando 'break' detiene el bucle 'while True' y termina el programa.
             break
@@ -238,12 +1527,26 @@ def main():
             borrar_nota()
         elif opcion == '5':
             buscar_notas()
+        elif opcion == '6':
+            exportar_notas()
+        elif opcion == '7':
+            medir_serializadores()
         else:
             # Manejo de error si el usuario no ingresa una opción válida.
-            print("❌ Opción no válida, por favor, elige un número del 1 al 6.")
+            print("❌ Opción no válida, por favor, elige un número del 1 al 8.")
 
 
 # Punto de entrada del programa
 if __name__ == "__main__":
     # Esta línea asegura que la función 'main()' solo se ejecute cuando el archivo se ejecuta directamente (no cuando se importa como un módulo en otro archivo).
-    main()
+    # Opciones: --sqlite (backend SQLite), --servir [--puerto N] (servicio HTTP) y --prueba-carga.
+    argumentos = sys.argv[1:]
+    if "--sqlite" in argumentos:
+        BACKEND = "sqlite"
+    if "--servir" in argumentos:
+        servir(int(argumentos[argumentos.index("--puerto") + 1])
+               if "--puerto" in argumentos else PUERTO_SERVICIO)
+    elif "--prueba-carga" in argumentos:
+        prueba_carga()
+    else:
+        main()
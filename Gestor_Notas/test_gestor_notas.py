@@ -0,0 +1,176 @@
+# Pruebas del gestor de notas (se ejecutan con: python -m pytest).
+import asyncio
+
+import gestor_notas
+
+
+# --- ÍNDICE DE BÚSQUEDA ---
+
+def test_indice_guardado_en_json_se_recupera(tmp_path):
+    notas = [{"id": 1, "contenido": "Hola mundo"}, {"id": 2, "contenido": "Mundo cruel"},
+             {"id": 3, "contenido": "Canción de hola"}]
+    indice = gestor_notas.IndiceInvertido.desde_notas(notas)
+    ruta = str(tmp_path / "notas.json.idx")
+
+    indice.guardar(ruta, [10, 20])
+    cargado = gestor_notas.IndiceInvertido.cargar(ruta, [10, 20])
+
+    assert cargado is not None
+    assert cargado.buscar("hola") == indice.buscar("hola")
+    assert cargado.buscar("cancion mund*") == []
+    # Otra firma (la instantánea cambió) obliga a reconstruirlo.
+    assert gestor_notas.IndiceInvertido.cargar(ruta, [10, 21]) is None
+
+
+def test_indice_danado_se_ignora(tmp_path):
+    ruta = str(tmp_path / "notas.json.idx")
+    with open(ruta, 'wb') as f:
+        f.write(b"\x80\x04\x95no es json")
+
+    assert gestor_notas.IndiceInvertido.cargar(ruta, [1, 2]) is None
+
+
+def test_buscar_con_limite_devuelve_los_mas_relevantes():
+    notas = [{"id": i, "contenido": "nota " * i} for i in range(1, 30)]
+    indice = gestor_notas.IndiceInvertido.desde_notas(notas)
+
+    resultados = indice.buscar("nota", limite=5)
+
+    assert len(resultados) == 5
+    assert resultados == indice.buscar("nota")[:5]
+
+
+# --- CONFLICTOS DE VERSIÓN ENTRE SESIONES ---
+
+# Abre dos sesiones (como dos procesos) sobre los mismos archivos, sin hilo de guardado periódico.
+def abrir_dos_sesiones(tmp_path, backend: str):
+    def abrir():
+        if backend == "sqlite":
+            almacen = gestor_notas.AlmacenNotasSQLite(
+                str(tmp_path / "notas.db"), str(tmp_path / "no_existe.json"))
+        else:
+            almacen = gestor_notas.AlmacenNotas(str(tmp_path / "notas.json"))
+        return gestor_notas.RepositorioNotas(almacen, intervalo=0)
+    return abrir(), abrir()
+
+
+def test_guardar_cambios_detecta_version_antigua_sqlite(tmp_path):
+    almacen = gestor_notas.AlmacenNotasSQLite(
+        str(tmp_path / "notas.db"), str(tmp_path / "no_existe.json"))
+    try:
+        nota = {"id": 1, "contenido": "original", "version": 1}
+        almacen.guardar_cambios({1: nota}, {1: None})
+        almacen.guardar_cambios({1: {**nota, "contenido": "cambiada por otro", "version": 2}}, {1: 1})
+
+        # Quien vio la versión 1 no puede sobrescribir la 2, y no se escribe nada.
+        try:
+            almacen.guardar_cambios({nota['id']: {**nota, "contenido": "mía", "version": 2}}, {nota['id']: 1})
+            assert False, "debía lanzar ConflictoVersiones"
+        except gestor_notas.ConflictoVersiones as e:
+            assert e.ids == [nota['id']]
+        assert almacen.obtener(nota['id'])['contenido'] == "cambiada por otro"
+    finally:
+        almacen.cerrar()
+
+
+def test_sesiones_concurrentes_no_pisan_cambios(tmp_path):
+    for backend in ("json", "sqlite"):
+        carpeta = tmp_path / backend
+        carpeta.mkdir()
+        primera, segunda = abrir_dos_sesiones(carpeta, backend)
+        try:
+            nota = primera.crear("inicial")
+            primera.guardar()
+            segunda.sincronizar(forzar=True)
+
+            # Las dos editan la misma nota, gana la que guarda primero y la otra descarta su cambio.
+            assert segunda.actualizar_si_version(nota['id'], "de la segunda", 1)[0] == "ok"
+            assert primera.actualizar_si_version(nota['id'], "de la primera", 1)[0] == "ok"
+            primera.guardar()
+            # Simulamos que la segunda guarda justo entre su comprobación y su escritura: solo la comprobación atómica del almacén la detiene.
+            segunda.almacen.modificado_externamente = lambda: False
+            segunda.guardar()
+            del segunda.almacen.modificado_externamente
+
+            assert segunda.obtener(nota['id'])['contenido'] == "de la primera"
+            assert segunda.obtener(nota['id'])['version'] == 2
+        finally:
+            primera.cerrar()
+            segunda.cerrar()
+
+
+# --- MIGRACIÓN DE JSON A SQLITE ---
+
+# Las notas de 'notas.json' se copian solo la primera vez: si luego se borran todas, no vuelven al reabrir.
+def test_migracion_desde_json_solo_una_vez(tmp_path):
+    ruta_json, ruta_db = str(tmp_path / "notas.json"), str(tmp_path / "notas.db")
+    repositorio = gestor_notas.RepositorioNotas(gestor_notas.AlmacenNotas(ruta_json), intervalo=0)
+    repositorio.crear("de json")
+    repositorio.cerrar()
+
+    almacen = gestor_notas.AlmacenNotasSQLite(ruta_db, ruta_json)
+    assert [nota['contenido'] for nota in almacen.listar()] == ["de json"]
+    almacen.reemplazar([])
+    almacen.cerrar()
+
+    almacen = gestor_notas.AlmacenNotasSQLite(ruta_db, ruta_json)
+    try:
+        assert almacen.listar() == []
+    finally:
+        almacen.cerrar()
+
+
+# --- SERVICIO HTTP ---
+
+def test_lecturas_no_bloquean_el_bucle_de_eventos(tmp_path):
+    repositorio = gestor_notas.RepositorioNotas(
+        gestor_notas.AlmacenNotas(str(tmp_path / "notas.json")), intervalo=0)
+    servicio = gestor_notas.ServicioNotas(repositorio)
+    nota = repositorio.crear("hola")
+
+    async def probar():
+        # Otro hilo tiene el cerrojo (como un guardado escribiendo en disco): la lectura espera en un hilo y el bucle sigue atendiendo.
+        with repositorio.cerrojo:
+            lectura = asyncio.ensure_future(servicio.despachar("GET", f"/notas/{nota['id']}", {}, b""))
+            await asyncio.sleep(0.05)
+            assert not lectura.done()
+        return await lectura
+
+    try:
+        estado, datos, _ = asyncio.run(probar())
+        assert estado == 200 and datos["contenido"] == "hola"
+    finally:
+        repositorio.cerrar()
+
+
+# Envía 'peticion' en bruto a un ServicioNotas en un puerto libre y devuelve todo lo que responde hasta que cierra la conexión.
+def enviar_en_bruto(tmp_path, peticion: bytes) -> bytes:
+    repositorio = gestor_notas.RepositorioNotas(
+        gestor_notas.AlmacenNotas(str(tmp_path / "notas.json")), intervalo=0)
+    servicio = gestor_notas.ServicioNotas(repositorio)
+
+    async def probar():
+        servidor = await asyncio.start_server(servicio.atender_conexion, "127.0.0.1", 0)
+        async with servidor:
+            lector, escritor = await asyncio.open_connection(*servidor.sockets[0].getsockname()[:2])
+            escritor.write(peticion)
+            respuesta = await asyncio.wait_for(lector.read(), timeout=5)
+            escritor.close()
+            return respuesta
+
+    try:
+        return asyncio.run(probar())
+    finally:
+        repositorio.cerrar()
+
+
+# Una longitud negativa o no numérica es un 400 (no una excepción sin respuesta) y un cuerpo por trozos un 501 que cierra la conexión.
+def test_longitud_invalida_y_transfer_encoding(tmp_path):
+    for longitud in (b"-5", b"abc", b"1_0"):
+        respuesta = enviar_en_bruto(tmp_path, b"POST /notas HTTP/1.1\r\nContent-Length: " + longitud + b"\r\n\r\n")
+        assert respuesta.startswith(b"HTTP/1.1 400 ")
+
+    respuesta = enviar_en_bruto(tmp_path, b"POST /notas HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+                                          b"15\r\n{\"contenido\": \"hola\"}\r\n0\r\n\r\n")
+    assert respuesta.startswith(b"HTTP/1.1 501 ")
+    assert respuesta.count(b"HTTP/1.1 ") == 1
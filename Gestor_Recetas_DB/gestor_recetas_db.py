@@ -1,4 +1,133 @@
 import sqlite3
+import csv
+import json
+import os
+import sys
+import time
+import tempfile
+import random
+import threading
+import queue
+import contextlib
+import tracemalloc
+import unicodedata
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Número de recetas de la prueba de guardado masivo de la demostración.
+RECETAS_PRUEBA_MASIVA = 100000
+# Máximo de IDs por consulta 'IN (...)' (SQLite antiguo admite 999 parámetros).
+TAMANO_BLOQUE_IDS = 900
+# Filas que se piden al cursor en cada fetchmany al recorrer todas las recetas.
+TAMANO_LOTE_LECTURA = 1000
+# Recetas por transacción al importar (se puede cambiar con --lote N).
+TAMANO_LOTE_IMPORTACION = 5000
+# Columnas del formato CSV: una fila por ingrediente, las filas seguidas con el mismo valor de 'receta' forman una receta.
+COLUMNAS_CSV = ["receta", "nombre", "tiempo_prep",
+                "ingrediente", "cantidad", "unidad"]
+# Filas de INGREDIENTES de la prueba de búsqueda por ingredientes (recetas de INGREDIENTES_POR_RECETA_PRUEBA ingredientes).
+FILAS_PRUEBA_BUSQUEDA = 1000000
+INGREDIENTES_POR_RECETA_PRUEBA = 8
+# Sentencias preparadas que guarda cada conexión del repositorio (sqlite3 las reutiliza si el texto SQL es idéntico).
+TAMANO_CACHE_SENTENCIAS = 256
+# Espera máxima (segundos) de una conexión ante un bloqueo de escritura, y de un hilo esperando una conexión libre del pool.
+ESPERA_BLOQUEO = 30.0
+# Conexiones máximas del pool de RepositorioRecetas (los hilos que pasen de ahí esperan a que se libere una).
+TAMANO_POOL_CONEXIONES = 8
+# Prueba de concurrencia: hilos lectores (más un escritor), duración en segundos y recetas iniciales.
+LECTORES_PRUEBA_CONCURRENCIA = 4
+DURACION_PRUEBA_CONCURRENCIA = 3.0
+RECETAS_PRUEBA_CONCURRENCIA = 10000
+
+# Gramos por unidad de medida (los ml se cuentan como gramos de agua). Claves en minúsculas, tal como se comparan en SQL con lower(trim(unidad)).
+GRAMOS_POR_UNIDAD = {
+    "g": 1, "gr": 1, "gramo": 1, "gramos": 1,
+    "kg": 1000, "kilo": 1000, "kilos": 1000, "kilogramo": 1000, "kilogramos": 1000,
+    "mg": 0.001, "ml": 1, "mililitro": 1, "mililitros": 1,
+    "l": 1000, "litro": 1000, "litros": 1000,
+    "cucharada": 15, "cucharadas": 15, "cucharadita": 5, "cucharaditas": 5,
+    "taza": 240, "tazas": 240,
+}
+
+# Tabla local de calorías (kcal por 100 g), por nombre normalizado de ingrediente.
+CALORIAS_POR_100G = {
+    "garbanzos cocidos": 164, "lentejas cocidas": 116, "leche de coco": 230, "espinacas": 23,
+    "tomate": 18, "cebolla": 40, "ajo": 149, "arroz": 130, "tofu": 76, "aceite de oliva": 884,
+    "patata": 77, "zanahoria": 41, "pimiento rojo": 31, "calabacin": 17, "champinones": 22,
+    "harina de trigo": 364, "azucar": 387, "avena": 389, "platano": 89, "quinoa cocida": 120,
+}
+
+# Gramos y calorías de UNA fila de INGREDIENTES ('{fila}' es NEW, OLD o un alias), 0 si la unidad o el ingrediente no están en las tablas.
+SQL_GRAMOS_FILA = "COALESCE({fila}.cantidad * (SELECT gramos_por_unidad FROM UNIDADES WHERE unidad = lower(trim({fila}.unidad))), 0)"
+SQL_CALORIAS_FILA = ("(" + SQL_GRAMOS_FILA + " * COALESCE((SELECT N.kcal_100g FROM NUTRIENTES N JOIN NOMBRES_INGREDIENTES NI "
+                     "ON NI.nombre = N.nombre WHERE NI.id = {fila}.nombre_id), 0) / 100)")
+
+# Asigna a una receta ('{receta}' es su id en SQL) la SUMA de gramos y calorías de todas sus filas de INGREDIENTES.
+# Se suma siempre desde cero: sumar y restar fila a fila acumularía errores de redondeo de los REAL.
+SQL_ASIGNAR_AGREGADOS = (
+    "SET gramos_totales = COALESCE((SELECT SUM(" + SQL_GRAMOS_FILA.format(fila="I") +
+    ") FROM INGREDIENTES I WHERE I.receta_id = {receta}), 0), "
+    "calorias = COALESCE((SELECT SUM(" + SQL_CALORIAS_FILA.format(fila="I") +
+    ") FROM INGREDIENTES I WHERE I.receta_id = {receta}), 0)")
+
+# Recalcula la receta de una fila de INGREDIENTES ('{fila}' es NEW u OLD, cuerpo de los triggers).
+SQL_RECALCULAR_RECETA = ("UPDATE RECETAS " + SQL_ASIGNAR_AGREGADOS.replace("{receta}", "{fila}.receta_id") +
+                         " WHERE id = {fila}.receta_id;")
+
+# Recalcula desde cero los agregados de todas las recetas (tras cambiar UNIDADES o NUTRIENTES, que no tienen triggers, o tras importar).
+SQL_RECALCULAR_AGREGADOS = "UPDATE RECETAS " + \
+    SQL_ASIGNAR_AGREGADOS.format(receta="RECETAS.id")
+
+# Triggers que mantienen los agregados de RECETAS al cambiar INGREDIENTES: (nombre, sentencia CREATE TRIGGER).
+TRIGGERS_AGREGADOS: List[Tuple[str, str]] = [
+    ("TRG_INGREDIENTES_INSERT", "CREATE TRIGGER IF NOT EXISTS TRG_INGREDIENTES_INSERT AFTER INSERT ON INGREDIENTES BEGIN " +
+     SQL_RECALCULAR_RECETA.format(fila="NEW") + " END"),
+    ("TRG_INGREDIENTES_DELETE", "CREATE TRIGGER IF NOT EXISTS TRG_INGREDIENTES_DELETE AFTER DELETE ON INGREDIENTES BEGIN " +
+     SQL_RECALCULAR_RECETA.format(fila="OLD") + " END"),
+    ("TRG_INGREDIENTES_UPDATE", "CREATE TRIGGER IF NOT EXISTS TRG_INGREDIENTES_UPDATE AFTER UPDATE OF cantidad, unidad, nombre_id, receta_id "
+     "ON INGREDIENTES BEGIN " + SQL_RECALCULAR_RECETA.format(fila="OLD") + " " +
+     SQL_RECALCULAR_RECETA.format(fila="NEW") + " END"),
+]
+
+# Migraciones del esquema: (versión, sentencias SQL), en orden. Cada base de datos guarda en PRAGMA user_version la última que aplicó.
+MIGRACIONES: List[Tuple[int, List[str]]] = [
+    # 1. Índice para buscar los ingredientes de una receta sin recorrer toda la tabla.
+    (1, ["CREATE INDEX IF NOT EXISTS IDX_INGREDIENTES_RECETA ON INGREDIENTES(receta_id)"]),
+    # 2. Tabla de nombres normalizados de ingredientes: cada fila de INGREDIENTES apunta a su nombre por 'nombre_id'.
+    (2, [
+        """
+        CREATE TABLE IF NOT EXISTS NOMBRES_INGREDIENTES (
+            id INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL UNIQUE
+        )
+        """,
+        "ALTER TABLE INGREDIENTES ADD COLUMN nombre_id INTEGER REFERENCES NOMBRES_INGREDIENTES(id)",
+        "INSERT OR IGNORE INTO NOMBRES_INGREDIENTES (nombre) SELECT DISTINCT normalizar_ingrediente(nombre) FROM INGREDIENTES",
+        """
+        UPDATE INGREDIENTES SET nombre_id = (
+            SELECT id FROM NOMBRES_INGREDIENTES WHERE nombre = normalizar_ingrediente(INGREDIENTES.nombre))
+        """,
+        # Índices cubrientes de la búsqueda por despensa: del nombre a sus recetas y de la receta a sus nombres, sin tocar la tabla.
+        "CREATE INDEX IF NOT EXISTS IDX_INGREDIENTES_NOMBRE ON INGREDIENTES(nombre_id, receta_id)",
+        "CREATE INDEX IF NOT EXISTS IDX_INGREDIENTES_RECETA_NOMBRE ON INGREDIENTES(receta_id, nombre_id)",
+        # El índice de la migración 1 queda cubierto por el anterior.
+        "DROP INDEX IF EXISTS IDX_INGREDIENTES_RECETA",
+    ]),
+    # 3. Tablas de unidades y calorías, y agregados por receta (gramos_totales, calorias) mantenidos por triggers al cambiar INGREDIENTES.
+    (3, [
+        "CREATE TABLE IF NOT EXISTS UNIDADES (unidad TEXT PRIMARY KEY, gramos_por_unidad REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS NUTRIENTES (nombre TEXT PRIMARY KEY, kcal_100g REAL NOT NULL)",
+        "INSERT OR IGNORE INTO UNIDADES (unidad, gramos_por_unidad) VALUES " +
+        ", ".join(f"('{unidad}', {gramos})" for unidad,
+                  gramos in GRAMOS_POR_UNIDAD.items()),
+        "INSERT OR IGNORE INTO NUTRIENTES (nombre, kcal_100g) VALUES " +
+        ", ".join(f"('{nombre}', {kcal})" for nombre,
+                  kcal in CALORIAS_POR_100G.items()),
+        "ALTER TABLE RECETAS ADD COLUMN gramos_totales REAL NOT NULL DEFAULT 0",
+        "ALTER TABLE RECETAS ADD COLUMN calorias REAL NOT NULL DEFAULT 0",
+        SQL_RECALCULAR_AGREGADOS,
+        "CREATE INDEX IF NOT EXISTS IDX_RECETAS_CALORIAS ON RECETAS(calorias)",
+    ] + [crear for _, crear in TRIGGERS_AGREGADOS]),
+]
 
 # =====================================================================
 #                          CLASES (POO)
@@ -7,6 +136,8 @@ import sqlite3
 
 # Clase para modelar un ingrediente con sus propiedades: nombre, cantidad y unidad.
 class Ingrediente:
+    # __slots__: sin __dict__ por instancia, cada objeto ocupa mucha menos memoria al cargar miles de recetas.
+    __slots__ = ("nombre", "cantidad", "unidad")
 
     def __init__(self, nombre: str, cantidad: float, unidad: str):
         # Atributos de la instancia
@@ -21,17 +152,54 @@ class Ingrediente:
 
 # Clase principal que modela una receta, compuesta por objetos Ingrediente.
 class Receta:
+    __slots__ = ("id", "nombre", "tiempo_prep",
+                 "_ingredientes", "_cargar_ingredientes")
 
     def __init__(self, nombre: str, tiempo_prep: int):
+        # ID en la BD (None mientras no se haya guardado).
+        self.id: Optional[int] = None
         self.nombre = nombre
         self.tiempo_prep = tiempo_prep
         # Composición: Cada receta contiene una lista de objetos Ingrediente.
-        self.ingredientes = []
+        self._ingredientes: Optional[List[Ingrediente]] = []
+        # Función que trae los ingredientes de la BD en la carga perezosa (None si ya están en memoria).
+        self._cargar_ingredientes: Optional[Callable[[], List[Ingrediente]]] = None
+
+    # Crea una receta leída de la BD cuyos ingredientes se cargan (con su propio cursor) la primera vez que se usan.
+    @classmethod
+    def desde_fila(cls, receta_id: int, nombre: str, tiempo_prep: int, conn) -> "Receta":
+        receta = cls(nombre, tiempo_prep)
+        receta.id = receta_id
+        receta._ingredientes = None
+        receta._cargar_ingredientes = lambda: [Ingrediente(*fila) for fila in
+                                               cargar_ingredientes_de_receta_db(conn.cursor(), receta_id)]
+        return receta
+
+    @property
+    def ingredientes(self) -> List[Ingrediente]:
+        if self._ingredientes is None:
+            self._ingredientes = self._cargar_ingredientes()
+            self._cargar_ingredientes = None
+        return self._ingredientes
+
+    @ingredientes.setter
+    def ingredientes(self, ingredientes: List[Ingrediente]):
+        self._ingredientes = ingredientes
+        self._cargar_ingredientes = None
 
     def agregar_ingrediente(self, ingrediente: Ingrediente):
         # Añade un objeto Ingrediente a la lista de la receta.
         self.ingredientes.append(ingrediente)
 
+    # Devuelve una copia (sin guardar, id None) con todas las cantidades multiplicadas por 'factor' (ej: 2 para el doble de porciones).
+    def escalar(self, factor: float) -> "Receta":
+        escalada = Receta(self.nombre, self.tiempo_prep)
+        for ing in self.ingredientes:
+            cantidad = ing.cantidad * factor if ing.cantidad is not None else None
+            escalada.agregar_ingrediente(
+                Ingrediente(ing.nombre, cantidad, ing.unidad))
+        return escalada
+
     # MÉTODO DE INSTANCIA: Guarda el objeto actual en la BD.
     def guardar_db(self, conn, cursor):
 
@@ -47,15 +215,12 @@ class Receta:
 
             print(
                 f"-> Receta insertada, esperando confirmación, ID: {receta_id}")
+            self.id = receta_id
 
-            # 2. Iterar sobre todos los objetos Ingrediente.
-            for ingrediente in self.ingredientes:
-                # 3. Guardar cada ingrediente, usando 'receta_id' como CLAVE FORÁNEA (FK).
-                insertar_ingrediente_db(cursor,
-                                        ingrediente.nombre,
-                                        ingrediente.cantidad,
-                                        ingrediente.unidad,
-                                        receta_id)
+            # 2. Guardar todos los ingredientes con un solo executemany, usando 'receta_id' como CLAVE FORÁNEA (FK).
+            insertar_ingredientes_db(cursor, self.ingredientes, receta_id)
+            print(
+                f"   -> {len(self.ingredientes)} ingredientes insertados en buffer.")
 
             # 3. Confirmar la inserción de la Receta y TODOS sus ingredientes.
             conn.commit()
@@ -70,40 +235,255 @@ class Receta:
             conn.rollback()
             print(f"❌ ERROR INESPERADO, se ejecutó ROLLBACK, detalle: {e}")
 
+    # MÉTODO ESTÁTICO: Guarda muchas recetas (con sus ingredientes) en una ÚNICA transacción, para importaciones grandes.
+    # Si quien llama ya tiene una transacción abierta, el lote va dentro de un SAVEPOINT y la transacción sigue siendo suya (no se confirma ni se deshace aquí).
+    @staticmethod
+    def guardar_muchas_db(conn, recetas: Iterable["Receta"]) -> int:
+
+        # Devuelve el número de recetas guardadas, si algo falla se deshace el lote y se relanza el error.
+        recetas = list(recetas)
+        if not recetas:
+            return 0
+        transaccion_propia = not conn.in_transaction
+        if transaccion_propia:
+            # BEGIN IMMEDIATE reserva la escritura desde el principio (sin esperas a mitad del lote).
+            conn.execute("BEGIN IMMEDIATE")
+        conn.execute("SAVEPOINT guardar_muchas")
+        try:
+            # 1. El ID de la primera receta lo asigna SQLite: desde ese INSERT la conexión tiene el bloqueo de escritura,
+            #    nadie más puede añadir recetas y los IDs siguientes al máximo quedan libres para el resto del lote.
+            primera = recetas[0]
+            primera.id = conn.execute("INSERT INTO RECETAS (nombre, tiempo_prep) VALUES (?, ?)",
+                                      (primera.nombre, primera.tiempo_prep)).lastrowid
+
+            # 2. Con los IDs asignados aquí, recetas e ingredientes se insertan con dos executemany en lugar de una consulta por fila.
+            ids_nombres = obtener_ids_nombres(
+                conn.cursor(), (ing.nombre for receta in recetas for ing in receta.ingredientes))
+            filas_recetas = []
+            filas_ingredientes = []
+            for receta_id, receta in enumerate(recetas, start=primera.id):
+                receta.id = receta_id
+                if receta is not primera:
+                    filas_recetas.append(
+                        (receta_id, receta.nombre, receta.tiempo_prep))
+                filas_ingredientes.extend((ing.nombre, ing.cantidad, ing.unidad, receta_id, ids_nombres[ing.nombre])
+                                          for ing in receta.ingredientes)
+
+            conn.executemany(
+                "INSERT INTO RECETAS (id, nombre, tiempo_prep) VALUES (?, ?, ?)", filas_recetas)
+            conn.executemany(
+                "INSERT INTO INGREDIENTES (nombre, cantidad, unidad, receta_id, nombre_id) VALUES (?, ?, ?, ?, ?)", filas_ingredientes)
+            conn.execute("RELEASE guardar_muchas")
+
+        except Exception:
+            # Se deshace solo el lote, la transacción de quien llama sigue abierta con lo que tuviera antes.
+            conn.execute("ROLLBACK TO guardar_muchas")
+            conn.execute("RELEASE guardar_muchas")
+            if transaccion_propia:
+                conn.rollback()
+            raise
+
+        # 3. Un solo commit para todo el lote (solo si la transacción es nuestra).
+        if transaccion_propia:
+            conn.commit()
+        return len(recetas)
+
     # MÉTODO DE CLASE: Carga y crea un nuevo objeto Receta a partir de la BD.
 
     @classmethod
-    def cargar_por_id(cls, cursor, id_cargar: int):
-        # Crea y devuelve un objeto Receta completo (con ingredientes) desde la BD.
-
-        # 1. Cargar la fila principal de la receta.
-        datos_receta = cargar_receta_id_db(cursor, id_cargar)
+    def cargar_por_id(cls, cursor, id_cargar: int, perezoso: bool = False):
+        # Crea y devuelve un objeto Receta completo (con ingredientes) desde la BD, con una sola consulta (JOIN).
+        # Con 'perezoso' solo lee la fila de RECETAS, los ingredientes se consultan al usarlos por primera vez.
+        if perezoso:
+            fila = cargar_receta_id_db(cursor, id_cargar)
+            recetas = [cls.desde_fila(*fila, cursor.connection)] if fila else []
+        else:
+            recetas = cls.cargar_muchas(cursor, [id_cargar])
 
-        if not datos_receta:
+        if not recetas:
             # Receta no encontrada.
             return None
 
-        # Desempaquetar los datos: (id, nombre, tiempo_prep)
-        receta_id, nombre, tiempo_prep = datos_receta
-
-        # 2. Crear la nueva instancia de la Receta
-        receta_cargada = cls(nombre, tiempo_prep)
-
-        # 3. Cargar las filas de los ingredientes usando el ID.
-        filas_ingredientes = cargar_ingredientes_de_receta_db(
-            cursor, receta_id)
-
-        # 4. Iterar sobre las filas y crear objetos Ingrediente.
-        for nombre_ing, cantidad_ing, unidad_ing in filas_ingredientes:
-            nuevo_ing = Ingrediente(nombre_ing, cantidad_ing, unidad_ing)
-
-            # 5. Añadir el objeto Ingrediente a la Receta cargada.
-            receta_cargada.agregar_ingrediente(nuevo_ing)
+        receta_cargada = recetas[0]
+        print(
+            f"✅ Receta '{receta_cargada.nombre}' (ID {receta_cargada.id}) cargada con éxito.")
+        return receta_cargada
 
-        print(f"✅ Receta '{nombre}' (ID {receta_id}) cargada con éxito.")
+    # MÉTODO DE CLASE: Carga muchas recetas con UNA consulta JOIN por bloque de IDs (en lugar de 1 + N consultas).
+    @classmethod
+    def cargar_muchas(cls, cursor, ids: Iterable[int]) -> List["Receta"]:
+
+        ids = list(ids)
+        cargadas: Dict[int, "Receta"] = {}
+
+        for inicio in range(0, len(ids), TAMANO_BLOQUE_IDS):
+            bloque = ids[inicio:inicio + TAMANO_BLOQUE_IDS]
+
+            # 1. Una fila por ingrediente (o una fila con ingrediente NULL si la receta no tiene ninguno), ordenadas por receta.
+            comando_sql = f"""
+            SELECT R.id, R.nombre, R.tiempo_prep, I.nombre, I.cantidad, I.unidad
+            FROM RECETAS R LEFT JOIN INGREDIENTES I ON I.receta_id = R.id
+            WHERE R.id IN ({", ".join("?" * len(bloque))})
+            ORDER BY R.id, I.id
+            """
+            cursor.execute(comando_sql, bloque)
+
+            # 2. Agrupar las filas en Python: una Receta por ID y sus ingredientes dentro.
+            for receta_id, nombre, tiempo_prep, nombre_ing, cantidad_ing, unidad_ing in cursor:
+                receta = cargadas.get(receta_id)
+                if receta is None:
+                    receta = cargadas[receta_id] = cls(nombre, tiempo_prep)
+                    receta.id = receta_id
+                if nombre_ing is not None:
+                    receta.agregar_ingrediente(
+                        Ingrediente(nombre_ing, cantidad_ing, unidad_ing))
+
+        # 3. Mismo orden que los IDs pedidos (los que no existen se omiten).
+        return [cargadas[receta_id] for receta_id in ids if receta_id in cargadas]
+
+    # MÉTODO DE CLASE: Recorre TODAS las recetas en orden de ID sin tenerlas a la vez en memoria, pidiendo al cursor 'tamano_lote' filas cada vez.
+    @classmethod
+    def iterar_todas(cls, conn, tamano_lote: int = TAMANO_LOTE_LECTURA, perezoso: bool = False) -> Iterator["Receta"]:
+        cursor = conn.cursor()
 
-        # 6. Devolver el objeto POO completo.
-        return receta_cargada
+        # 1. Perezoso: solo las filas de RECETAS, cada receta consulta sus ingredientes si se usan.
+        if perezoso:
+            cursor.execute(
+                "SELECT id, nombre, tiempo_prep FROM RECETAS ORDER BY id")
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    return
+                for receta_id, nombre, tiempo_prep in filas:
+                    yield cls.desde_fila(receta_id, nombre, tiempo_prep, conn)
+
+        # 2. Completo: un único JOIN ordenado por receta, las filas consecutivas con el mismo ID forman una receta.
+        #    SQLite ordena los ingredientes receta a receta ("RIGHT PART OF ORDER BY"), sin ordenar toda la tabla en memoria.
+        cursor.execute("""
+        SELECT R.id, R.nombre, R.tiempo_prep, I.nombre, I.cantidad, I.unidad
+        FROM RECETAS R LEFT JOIN INGREDIENTES I ON I.receta_id = R.id
+        ORDER BY R.id, I.id
+        """)
+        receta = None
+        while True:
+            filas = cursor.fetchmany(tamano_lote)
+            if not filas:
+                break
+            for receta_id, nombre, tiempo_prep, nombre_ing, cantidad_ing, unidad_ing in filas:
+                if receta is None or receta.id != receta_id:
+                    if receta is not None:
+                        yield receta
+                    receta = cls(nombre, tiempo_prep)
+                    receta.id = receta_id
+                if nombre_ing is not None:
+                    receta.agregar_ingrediente(
+                        Ingrediente(nombre_ing, cantidad_ing, unidad_ing))
+        if receta is not None:
+            yield receta
+
+
+# Capa de acceso a datos segura entre hilos: un pool acotado de conexiones (queue.Queue) sobre la misma BD en modo WAL.
+# Cada operación saca una conexión del pool y la devuelve al terminar, así el número de conexiones no crece con el número de hilos.
+# Las lecturas no esperan a los escritores (WAL) y las escrituras del proceso se serializan con un candado.
+class RepositorioRecetas:
+
+    def __init__(self, ruta: str = "Recetas_veganas.db", tamano_pool: int = TAMANO_POOL_CONEXIONES):
+        self.ruta = ruta
+        self._tamano_pool = tamano_pool
+        # Conexiones libres, y todas las abiertas (libres o en uso) para no pasar del tamaño del pool y poder cerrarlas.
+        self._libres: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._conexiones: List[sqlite3.Connection] = []
+        self._bloqueo_conexiones = threading.Lock()
+        self._bloqueo_escritura = threading.Lock()
+
+        # El esquema (y sus migraciones) se prepara una sola vez, al crear el repositorio.
+        with self.conexion() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            crear_tablas_iniciales(conn.cursor(), conn)
+
+    # Abre una conexión nueva con los PRAGMA del repositorio.
+    def _abrir_conexion(self) -> sqlite3.Connection:
+        # check_same_thread=False porque la conexión pasa de un hilo a otro a través del pool, pero nunca la usan dos a la vez.
+        conn = sqlite3.connect(self.ruta, timeout=ESPERA_BLOQUEO, check_same_thread=False,
+                               cached_statements=TAMANO_CACHE_SENTENCIAS)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    # Presta una conexión del pool (with repositorio.conexion() as conn: ...) y la devuelve al salir.
+    # Si no hay libres y el pool no está lleno abre otra, si está lleno espera hasta ESPERA_BLOQUEO segundos.
+    @contextlib.contextmanager
+    def conexion(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._libres.get_nowait()
+        except queue.Empty:
+            with self._bloqueo_conexiones:
+                conn = None
+                if len(self._conexiones) < self._tamano_pool:
+                    conn = self._abrir_conexion()
+                    self._conexiones.append(conn)
+            if conn is None:
+                try:
+                    conn = self._libres.get(timeout=ESPERA_BLOQUEO)
+                except queue.Empty:
+                    raise sqlite3.OperationalError(
+                        f"No quedan conexiones libres en el pool ({self._tamano_pool}) tras {ESPERA_BLOQUEO} s.") from None
+        try:
+            yield conn
+        finally:
+            # Nunca se devuelve al pool una conexión con una transacción a medias.
+            if conn.in_transaction:
+                conn.rollback()
+            self._libres.put(conn)
+
+    # Lecturas: sin candados, cada hilo lee una instantánea consistente con su conexión.
+    def obtener(self, receta_id: int) -> Optional[Receta]:
+        with self.conexion() as conn:
+            recetas = Receta.cargar_muchas(conn.cursor(), [receta_id])
+        return recetas[0] if recetas else None
+
+    def obtener_muchas(self, ids: Iterable[int]) -> List[Receta]:
+        with self.conexion() as conn:
+            return Receta.cargar_muchas(conn.cursor(), ids)
+
+    def buscar_por_ingredientes(self, despensa: Iterable[str], tiempo_max: Optional[int] = None, limite: int = 10):
+        with self.conexion() as conn:
+            return buscar_por_ingredientes(conn.cursor(), despensa, tiempo_max, limite)
+
+    # Escrituras: una transacción BEGIN IMMEDIATE por llamada, relanza el error tras el rollback.
+    def guardar(self, receta: Receta) -> int:
+        with self._bloqueo_escritura, self.conexion() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                cursor = conn.cursor()
+                receta.id = insertar_receta_db_no_commit(
+                    cursor, receta.nombre, receta.tiempo_prep)
+                insertar_ingredientes_db(
+                    cursor, receta.ingredientes, receta.id)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return receta.id
+
+    def guardar_muchas(self, recetas: Iterable[Receta]) -> int:
+        with self._bloqueo_escritura, self.conexion() as conn:
+            return Receta.guardar_muchas_db(conn, recetas)
+
+    def borrar(self, receta_id: int) -> bool:
+        with self._bloqueo_escritura, self.conexion() as conn:
+            with conn:
+                borradas = conn.execute(
+                    "DELETE FROM RECETAS WHERE id = ?", (receta_id,)).rowcount
+        return borradas > 0
+
+    # Cierra todas las conexiones del pool (el repositorio no debe usarse después).
+    def cerrar(self):
+        with self._bloqueo_conexiones:
+            for conn in self._conexiones:
+                conn.close()
+            self._conexiones.clear()
+        self._libres = queue.Queue()
 
 
 # =====================================================================
@@ -112,13 +492,24 @@ class Receta:
 
 
 # Conecta o crea la base de datos y devuelve la conexión, usamos el manejador de contexto (with) para la conexión en main()
-def inicializar_bd():
-    conn = sqlite3.connect("Recetas_veganas.db")
+def inicializar_bd(ruta: str = "Recetas_veganas.db", modo_masivo: bool = False):
+    conn = sqlite3.connect(ruta)
     # PRAGMA: Asegura que la integridad referencial (Foreign Keys) sea aplicada.
     conn.execute("PRAGMA foreign_keys = ON")
+    if modo_masivo:
+        configurar_importacion_masiva(conn)
     return conn
 
 
+# Ajusta los PRAGMA para importaciones grandes: WAL evita reescribir la base de datos en cada commit y synchronous=NORMAL solo sincroniza el disco en los checkpoints.
+def configurar_importacion_masiva(conn):
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    # Tablas temporales en memoria y unos 64 MB de caché de páginas.
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -65536")
+
+
 # Crea las tablas RECETAS y INGREDIENTES y define la Clave Foránea (FK).
 def crear_tablas_iniciales(cursor, conn=None):
 
@@ -149,9 +540,38 @@ def crear_tablas_iniciales(cursor, conn=None):
 
     if conn:
         conn.commit()
+
+    # 3. Índices y demás cambios de esquema pendientes.
+    migrar_esquema(cursor.connection)
+
+    # 4. Los triggers de agregados se vuelven a crear si faltan (sin ellos las recetas nuevas quedarían con 0 gramos y 0 calorías).
+    with cursor.connection as conexion:
+        for _, crear in TRIGGERS_AGREGADOS:
+            conexion.execute(crear)
     print("✅ Tablas 'RECETAS' e 'INGREDIENTES' verificadas o creadas con éxito.")
 
 
+# Aplica, en orden y cada una en su propia transacción, las MIGRACIONES posteriores a la versión guardada en la BD.
+def migrar_esquema(conn):
+    # Las migraciones pueden usar normalizar_ingrediente() desde SQL.
+    conn.create_function("normalizar_ingrediente", 1,
+                         normalizar_ingrediente, deterministic=True)
+    version_actual = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    for version, sentencias in MIGRACIONES:
+        if version <= version_actual:
+            continue
+        if conn.in_transaction:
+            conn.commit()
+        # 'with conn' confirma al terminar o hace rollback si una sentencia falla (la versión no avanza).
+        with conn:
+            conn.execute("BEGIN")
+            for sentencia in sentencias:
+                conn.execute(sentencia)
+            conn.execute(f"PRAGMA user_version = {version}")
+        print(f"🛠️ Migración de esquema {version} aplicada.")
+
+
 # Función para limpiar los datos para demostración.
 def limpiar_tablas(cursor, conn):
     cursor.execute("DELETE FROM INGREDIENTES")
@@ -168,12 +588,41 @@ def insertar_receta_db_no_commit(cursor, nombre: str, tiempo_prep: int):
     return receta_id
 
 
-# Inserta un ingrediente, vinculándolo con la receta_id (NO hace commit).
-def insertar_ingrediente_db(cursor, nombre: str, cantidad: float, unidad: str, receta_id: int):
-    comando_sql = "INSERT INTO INGREDIENTES (nombre, cantidad, unidad, receta_id) VALUES (?, ?, ?, ?)"
-    datos_ingrediente = (nombre, cantidad, unidad, receta_id)
-    cursor.execute(comando_sql, datos_ingrediente)
-    print(f"   -> Ingrediente '{nombre}' insertado en buffer.")
+# Nombre de ingrediente tal como se guarda en NOMBRES_INGREDIENTES: minúsculas, sin tildes y con los espacios simplificados ("Garbanzos  Cocidos" -> "garbanzos cocidos").
+def normalizar_ingrediente(nombre: str) -> str:
+    descompuesto = unicodedata.normalize("NFD", nombre.lower())
+    sin_tildes = "".join(
+        c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_tildes.split())
+
+
+# Devuelve {nombre original: id en NOMBRES_INGREDIENTES}, creando los nombres normalizados que aún no existan (NO hace commit).
+def obtener_ids_nombres(cursor, nombres: Iterable[str]) -> Dict[str, int]:
+    # 1. Cada nombre distinto se normaliza una sola vez.
+    normalizados = {nombre: normalizar_ingrediente(nombre)
+                    for nombre in set(nombres)}
+    distintos = list(set(normalizados.values()))
+
+    # 2. Alta de los nombres nuevos y consulta de los IDs por bloques.
+    cursor.executemany("INSERT OR IGNORE INTO NOMBRES_INGREDIENTES (nombre) VALUES (?)",
+                       [(nombre,) for nombre in distintos])
+    ids: Dict[str, int] = {}
+    for inicio in range(0, len(distintos), TAMANO_BLOQUE_IDS):
+        bloque = distintos[inicio:inicio + TAMANO_BLOQUE_IDS]
+        cursor.execute(
+            f"SELECT nombre, id FROM NOMBRES_INGREDIENTES WHERE nombre IN ({', '.join('?' * len(bloque))})", bloque)
+        ids.update(cursor.fetchall())
+
+    return {nombre: ids[normalizado] for nombre, normalizado in normalizados.items()}
+
+
+# Inserta todos los ingredientes de una receta con un solo executemany (NO hace commit ni imprime por ingrediente).
+def insertar_ingredientes_db(cursor, ingredientes: List[Ingrediente], receta_id: int):
+    comando_sql = "INSERT INTO INGREDIENTES (nombre, cantidad, unidad, receta_id, nombre_id) VALUES (?, ?, ?, ?, ?)"
+    ids_nombres = obtener_ids_nombres(
+        cursor, (ing.nombre for ing in ingredientes))
+    cursor.executemany(comando_sql, [(ing.nombre, ing.cantidad, ing.unidad, receta_id, ids_nombres[ing.nombre])
+                                     for ing in ingredientes])
 
 
 # Busca una fila en RECETAS por su ID.
@@ -185,11 +634,403 @@ def cargar_receta_id_db(cursor, receta_id: int):
 
 # Busca todas las filas de INGREDIENTES vinculadas a un receta_id.
 def cargar_ingredientes_de_receta_db(cursor, receta_id: int):
-    comando_sql = "SELECT nombre, cantidad, unidad FROM INGREDIENTES WHERE receta_id = ?"
+    # En el orden en que se guardaron, igual que cargar_muchas (el índice por receta no garantiza ese orden).
+    comando_sql = "SELECT nombre, cantidad, unidad FROM INGREDIENTES WHERE receta_id = ? ORDER BY id"
     cursor.execute(comando_sql, (receta_id,))
     return cursor.fetchall()
 
 
+# "¿Qué puedo cocinar con esto?": ordena las recetas por la fracción de sus ingredientes que hay en la despensa, todo en SQL (sin cargar objetos Receta).
+def buscar_por_ingredientes(cursor, despensa: Iterable[str], tiempo_max: Optional[int] = None,
+                            limite: int = 10) -> List[Tuple[int, str, int, int, int, float]]:
+    # Devuelve filas (id, nombre, tiempo_prep, ingredientes disponibles, ingredientes totales, cobertura de 0 a 1).
+
+    # 1. Los nombres de la despensa se normalizan igual que al guardar.
+    nombres = list({normalizar_ingrediente(nombre) for nombre in despensa})
+    if not nombres:
+        return []
+
+    # 2. El índice (nombre_id, receta_id) da las recetas candidatas y cuántos ingredientes de la despensa usa cada una,
+    #    el índice (receta_id, nombre_id) cuenta los ingredientes totales de las que pasan el filtro de tiempo,
+    #    y la ordenación se hace sobre esos agregados. 'LIMIT -1 OFFSET 0' impide que SQLite aplane la subconsulta y repita el conteo
+    #    en el ORDER BY (lo mismo que 'AS MATERIALIZED', que necesita SQLite 3.35 o posterior).
+    comando_sql = f"""
+    WITH CANDIDATAS AS (
+        SELECT I.receta_id, COUNT(DISTINCT I.nombre_id) AS disponibles
+        FROM NOMBRES_INGREDIENTES N JOIN INGREDIENTES I ON I.nombre_id = N.id
+        WHERE N.nombre IN ({", ".join("?" * len(nombres))})
+        GROUP BY I.receta_id
+    )
+    SELECT id, nombre, tiempo_prep, disponibles, total, disponibles * 1.0 / total AS cobertura
+    FROM (
+        SELECT R.id, R.nombre, R.tiempo_prep, C.disponibles,
+               (SELECT COUNT(DISTINCT T.nombre_id) FROM INGREDIENTES T WHERE T.receta_id = R.id) AS total
+        FROM CANDIDATAS C JOIN RECETAS R ON R.id = C.receta_id
+        WHERE ? IS NULL OR R.tiempo_prep <= ?
+        LIMIT -1 OFFSET 0
+    )
+    ORDER BY cobertura DESC, total - disponibles, tiempo_prep, id
+    LIMIT ?
+    """
+    cursor.execute(comando_sql, [*nombres, tiempo_max, tiempo_max, limite])
+    return cursor.fetchall()
+
+
+# Lista recetas de menos a más calorías usando los agregados guardados en RECETAS (sin recorrer INGREDIENTES).
+# 'factor' escala las porciones: los totales de la receta se multiplican por él.
+def listar_por_calorias(cursor, calorias_max: Optional[float] = None, limite: int = 10,
+                        factor: float = 1.0) -> List[Tuple[int, str, float, float]]:
+    # Devuelve filas (id, nombre, gramos totales, calorías).
+    if factor <= 0:
+        raise ValueError(
+            f"El factor de porciones debe ser mayor que 0 (recibido {factor}).")
+    comando_sql = """
+    SELECT id, nombre, gramos_totales * ?, calorias * ?
+    FROM RECETAS
+    WHERE ? IS NULL OR calorias <= ?
+    ORDER BY calorias, id
+    LIMIT ?
+    """
+    # El filtro se aplica sobre la receta sin escalar para que siga usando el índice de calorías.
+    limite_sin_escalar = calorias_max / factor if calorias_max is not None else None
+    cursor.execute(comando_sql, (factor, factor, limite_sin_escalar,
+                                 limite_sin_escalar, limite))
+    return cursor.fetchall()
+
+
+# Recalcula gramos_totales y calorias de todas las recetas, necesario solo tras editar UNIDADES o NUTRIENTES.
+def recalcular_agregados(conn):
+    with conn:
+        conn.execute(SQL_RECALCULAR_AGREGADOS)
+
+
+# Quita los triggers de agregados mientras dura el bloque (importaciones masivas, donde recalcular por fila es lo más caro),
+# los vuelve a crear y recalcula una sola vez las recetas añadidas (IDs mayores que el máximo anterior).
+# Todo ocurre en UNA transacción: si el bloque falla o el proceso muere, el rollback devuelve los triggers, y las demás conexiones
+# esperan al bloqueo de escritura en lugar de escribir sin triggers.
+@contextlib.contextmanager
+def sin_triggers_agregados(conn):
+    transaccion_propia = not conn.in_transaction
+    if transaccion_propia:
+        conn.execute("BEGIN IMMEDIATE")
+    conn.execute("SAVEPOINT sin_triggers")
+    try:
+        ultimo_id = conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM RECETAS").fetchone()[0]
+        for nombre, _ in TRIGGERS_AGREGADOS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+        yield
+        for _, crear in TRIGGERS_AGREGADOS:
+            conn.execute(crear)
+        conn.execute(SQL_RECALCULAR_AGREGADOS +
+                     " WHERE id > ?", (ultimo_id,))
+        conn.execute("RELEASE sin_triggers")
+    except BaseException:
+        conn.execute("ROLLBACK TO sin_triggers")
+        conn.execute("RELEASE sin_triggers")
+        if transaccion_propia:
+            conn.rollback()
+        raise
+    if transaccion_propia:
+        conn.commit()
+
+
+# Deduce el formato de importación/exportación por la extensión: 'csv' o 'jsonl' (una receta JSON por línea).
+def formato_de_archivo(ruta: str) -> str:
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(
+        f"Formato no soportado '{extension}' (usa .jsonl, .ndjson o .csv).")
+
+
+# Lee recetas de un archivo JSON-lines de una en una: {"nombre", "tiempo_prep", "ingredientes": [{"nombre", "cantidad", "unidad"}]}.
+def leer_recetas_jsonl(archivo) -> Iterator[Receta]:
+    for linea in archivo:
+        if not linea.strip():
+            continue
+        datos = json.loads(linea)
+        receta = Receta(datos["nombre"], datos.get("tiempo_prep"))
+        for ing in datos.get("ingredientes", []):
+            receta.agregar_ingrediente(Ingrediente(
+                ing["nombre"], ing.get("cantidad"), ing.get("unidad")))
+        yield receta
+
+
+# Lee recetas de un CSV con COLUMNAS_CSV, agrupando las filas consecutivas de la misma receta (una receta sin ingredientes es una fila con 'ingrediente' vacío).
+def leer_recetas_csv(archivo) -> Iterator[Receta]:
+    receta = None
+    clave_actual = None
+    for fila in csv.DictReader(archivo):
+        if receta is None or fila["receta"] != clave_actual:
+            if receta is not None:
+                yield receta
+            clave_actual = fila["receta"]
+            receta = Receta(fila["nombre"], int(fila["tiempo_prep"])
+                            if fila["tiempo_prep"] else None)
+        if fila["ingrediente"]:
+            receta.agregar_ingrediente(Ingrediente(
+                fila["ingrediente"], float(fila["cantidad"]) if fila["cantidad"] else None, fila["unidad"]))
+    if receta is not None:
+        yield receta
+
+
+# Exporta todas las recetas a 'ruta' (JSON-lines o CSV) recorriéndolas en streaming, la memoria no depende del tamaño de la BD.
+def exportar_recetas(conn, ruta: str) -> int:
+    formato = formato_de_archivo(ruta)
+    inicio = time.perf_counter()
+    num_recetas = num_ingredientes = 0
+
+    with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+        escritor = csv.writer(archivo) if formato == "csv" else None
+        if escritor:
+            escritor.writerow(COLUMNAS_CSV)
+
+        for receta in Receta.iterar_todas(conn):
+            num_recetas += 1
+            num_ingredientes += len(receta.ingredientes)
+            if escritor:
+                # Una fila por ingrediente, o una fila sin ingrediente si la receta no tiene ninguno.
+                filas = [(receta.id, receta.nombre, receta.tiempo_prep, ing.nombre, ing.cantidad, ing.unidad)
+                         for ing in receta.ingredientes]
+                escritor.writerows(
+                    filas or [(receta.id, receta.nombre, receta.tiempo_prep, "", "", "")])
+            else:
+                archivo.write(json.dumps({
+                    "id": receta.id,
+                    "nombre": receta.nombre,
+                    "tiempo_prep": receta.tiempo_prep,
+                    "ingredientes": [{"nombre": ing.nombre, "cantidad": ing.cantidad, "unidad": ing.unidad}
+                                     for ing in receta.ingredientes],
+                }, ensure_ascii=False) + "\n")
+
+    segundos = time.perf_counter() - inicio
+    print(f"📤 {num_recetas} recetas ({num_ingredientes} ingredientes) exportadas a '{ruta}' en {segundos:.2f} s "
+          f"({num_recetas / segundos:,.0f} recetas/s, {num_ingredientes / segundos:,.0f} ingredientes/s).")
+    return num_recetas
+
+
+# Importa recetas de 'ruta' (JSON-lines o CSV) leyendo en streaming y guardando de 'tamano_lote' en 'tamano_lote' recetas (guardar_muchas_db).
+# Todo el archivo va en una transacción y los agregados se recalculan una sola vez al final (sin_triggers_agregados), no fila a fila.
+def importar_recetas(conn, ruta: str, tamano_lote: int = TAMANO_LOTE_IMPORTACION) -> int:
+    formato = formato_de_archivo(ruta)
+    inicio = time.perf_counter()
+    num_recetas = num_ingredientes = 0
+
+    with open(ruta, "r", encoding="utf-8", newline="") as archivo, sin_triggers_agregados(conn):
+        lector = leer_recetas_csv(
+            archivo) if formato == "csv" else leer_recetas_jsonl(archivo)
+
+        # Solo hay en memoria un lote de recetas a la vez; si un lote falla, no queda nada del archivo importado.
+        lote: List[Receta] = []
+        for receta in lector:
+            lote.append(receta)
+            if len(lote) >= tamano_lote:
+                num_recetas += Receta.guardar_muchas_db(conn, lote)
+                num_ingredientes += sum(len(r.ingredientes) for r in lote)
+                lote = []
+        if lote:
+            num_recetas += Receta.guardar_muchas_db(conn, lote)
+            num_ingredientes += sum(len(r.ingredientes) for r in lote)
+
+    segundos = time.perf_counter() - inicio
+    print(f"📥 {num_recetas} recetas ({num_ingredientes} ingredientes) importadas de '{ruta}' en {segundos:.2f} s "
+          f"({num_recetas / segundos:,.0f} recetas/s, {num_ingredientes / segundos:,.0f} ingredientes/s, lotes de {tamano_lote}).")
+    return num_recetas
+
+
+# Mide el guardado masivo de 'num_recetas' recetas de prueba en una base de datos temporal (con los PRAGMA de importación).
+def medir_guardado_masivo(num_recetas: int = RECETAS_PRUEBA_MASIVA):
+
+    # 1. Recetas de prueba con tres ingredientes cada una.
+    recetas = []
+    for i in range(num_recetas):
+        receta = Receta(f"Receta de prueba {i}", 10 + i % 50)
+        receta.agregar_ingrediente(
+            Ingrediente("Garbanzos Cocidos", 400.0, "gramos"))
+        receta.agregar_ingrediente(Ingrediente("Leche de Coco", 200.0, "ml"))
+        receta.agregar_ingrediente(Ingrediente("Espinacas", 100.0, "gramos"))
+        recetas.append(receta)
+
+    # 2. Guardado en una única transacción sobre una base de datos temporal.
+    with tempfile.TemporaryDirectory() as carpeta:
+        conn = inicializar_bd(os.path.join(
+            carpeta, "prueba_masiva.db"), modo_masivo=True)
+        try:
+            crear_tablas_iniciales(conn.cursor(), conn)
+            inicio = time.perf_counter()
+            guardadas = Receta.guardar_muchas_db(conn, recetas)
+            segundos = time.perf_counter() - inicio
+            print(f"⏱️ {guardadas} recetas ({guardadas * 3} ingredientes) guardadas en {segundos:.2f} s "
+                  f"({guardadas / segundos:,.0f} recetas/s).")
+
+            # 3. Carga de hasta 10000 recetas: 1 + N consultas frente a una consulta JOIN por bloque.
+            cursor = conn.cursor()
+            ids = list(range(1, min(guardadas, 10000) + 1))
+            inicio = time.perf_counter()
+            for receta_id in ids:
+                cargar_receta_id_db(cursor, receta_id)
+                cargar_ingredientes_de_receta_db(cursor, receta_id)
+            segundos_n1 = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            Receta.cargar_muchas(cursor, ids)
+            segundos_join = time.perf_counter() - inicio
+            print(f"⏱️ Carga de {len(ids)} recetas: {segundos_n1:.2f} s con 1 + N consultas, "
+                  f"{segundos_join:.2f} s con cargar_muchas (JOIN).")
+
+            # 4. Memoria máxima al recorrer todas las recetas: lista completa frente a iterar_todas (streaming).
+            tracemalloc.start()
+            todas = Receta.cargar_muchas(cursor, range(1, guardadas + 1))
+            pico_lista = tracemalloc.get_traced_memory()[1]
+            del todas
+            tracemalloc.reset_peak()
+            recorridas = sum(1 for _ in Receta.iterar_todas(conn))
+            pico_streaming = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"📉 Memoria máxima con {recorridas} recetas: {pico_lista / 2**20:.1f} MB en una lista, "
+                  f"{pico_streaming / 2**20:.1f} MB con iterar_todas.")
+        finally:
+            conn.close()
+
+
+# Mide buscar_por_ingredientes sobre una base de datos temporal con 'num_filas' ingredientes repartidos en recetas aleatorias.
+def medir_busqueda_ingredientes(num_filas: int = FILAS_PRUEBA_BUSQUEDA, repeticiones: int = 20):
+
+    # 1. Recetas aleatorias (semilla fija) con ingredientes de un catálogo de 500 nombres.
+    aleatorio = random.Random(42)
+    catalogo = [f"Ingrediente {n}" for n in range(500)]
+    recetas = []
+    for i in range(num_filas // INGREDIENTES_POR_RECETA_PRUEBA):
+        receta = Receta(f"Receta de prueba {i}", aleatorio.randint(5, 120))
+        for nombre in aleatorio.sample(catalogo, INGREDIENTES_POR_RECETA_PRUEBA):
+            receta.agregar_ingrediente(Ingrediente(nombre, 100.0, "gramos"))
+        recetas.append(receta)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        conn = inicializar_bd(os.path.join(
+            carpeta, "prueba_busqueda.db"), modo_masivo=True)
+        try:
+            cursor = conn.cursor()
+            crear_tablas_iniciales(cursor, conn)
+            Receta.guardar_muchas_db(conn, recetas)
+            # Estadísticas para que el planificador elija los índices.
+            conn.execute("ANALYZE")
+
+            # 2. Búsquedas con despensas aleatorias de 6 ingredientes y un tiempo máximo de 60 minutos.
+            despensas = [aleatorio.sample(catalogo, 6)
+                         for _ in range(repeticiones)]
+            inicio = time.perf_counter()
+            for despensa in despensas:
+                resultados = buscar_por_ingredientes(
+                    cursor, despensa, tiempo_max=60)
+            milisegundos = (time.perf_counter() - inicio) * \
+                1000 / repeticiones
+        finally:
+            conn.close()
+
+    print(f"⏱️ Búsqueda por ingredientes sobre {num_filas} filas: {milisegundos:.1f} ms de media.")
+    if resultados:
+        _, nombre, tiempo_prep, disponibles, total, cobertura = resultados[0]
+        print(f"   Mejor resultado de la última búsqueda: '{nombre}' ({tiempo_prep} min), "
+              f"{disponibles} de {total} ingredientes ({cobertura:.0%}).")
+
+
+# Prueba de concurrencia: 'num_lectores' hilos leen recetas al azar mientras un hilo escritor guarda recetas nuevas, sobre un RepositorioRecetas temporal.
+def medir_concurrencia(num_lectores: int = LECTORES_PRUEBA_CONCURRENCIA, segundos: float = DURACION_PRUEBA_CONCURRENCIA):
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        repositorio = RepositorioRecetas(
+            os.path.join(carpeta, "prueba_concurrencia.db"))
+        try:
+            # 1. Recetas iniciales para los lectores.
+            recetas = []
+            for i in range(RECETAS_PRUEBA_CONCURRENCIA):
+                receta = Receta(f"Receta de prueba {i}", 10 + i % 50)
+                receta.agregar_ingrediente(
+                    Ingrediente("Garbanzos Cocidos", 400.0, "gramos"))
+                receta.agregar_ingrediente(
+                    Ingrediente("Espinacas", 100.0, "gramos"))
+                recetas.append(receta)
+            repositorio.guardar_muchas(recetas)
+
+            # 2. Cada hilo cuenta sus operaciones hasta que se activa 'parar'.
+            parar = threading.Event()
+            lecturas = [0] * num_lectores
+            escrituras = [0]
+
+            def lector(posicion: int):
+                aleatorio = random.Random(posicion)
+                while not parar.is_set():
+                    repositorio.obtener(aleatorio.randint(
+                        1, RECETAS_PRUEBA_CONCURRENCIA))
+                    lecturas[posicion] += 1
+
+            def escritor():
+                while not parar.is_set():
+                    receta = Receta("Receta nueva", 20)
+                    receta.agregar_ingrediente(
+                        Ingrediente("Leche de Coco", 200.0, "ml"))
+                    repositorio.guardar(receta)
+                    escrituras[0] += 1
+
+            hilos = [threading.Thread(target=lector, args=(n,))
+                     for n in range(num_lectores)]
+            hilos.append(threading.Thread(target=escritor))
+            for hilo in hilos:
+                hilo.start()
+            time.sleep(segundos)
+            parar.set()
+            for hilo in hilos:
+                hilo.join()
+        finally:
+            repositorio.cerrar()
+
+    print(f"⏱️ {num_lectores} lectores + 1 escritor durante {segundos:.0f} s: "
+          f"{sum(lecturas) / segundos:,.0f} lecturas/s y {escrituras[0] / segundos:,.0f} escrituras/s.")
+
+
+# Exporta 'num_recetas' recetas de prueba a JSON-lines y a CSV y las vuelve a importar en bases de datos temporales.
+def medir_importacion_exportacion(num_recetas: int = RECETAS_PRUEBA_MASIVA):
+    with tempfile.TemporaryDirectory() as carpeta:
+        # 1. BD de origen con recetas de tres ingredientes.
+        conn = inicializar_bd(os.path.join(
+            carpeta, "origen.db"), modo_masivo=True)
+        try:
+            crear_tablas_iniciales(conn.cursor(), conn)
+            recetas = []
+            for i in range(num_recetas):
+                receta = Receta(f"Receta de prueba {i}", 10 + i % 50)
+                receta.agregar_ingrediente(
+                    Ingrediente("Garbanzos Cocidos", 400.0, "gramos"))
+                receta.agregar_ingrediente(
+                    Ingrediente("Leche de Coco", 200.0, "ml"))
+                receta.agregar_ingrediente(
+                    Ingrediente("Espinacas", 100.0, "gramos"))
+                recetas.append(receta)
+            Receta.guardar_muchas_db(conn, recetas)
+            del recetas
+
+            # 2. Exportación en los dos formatos.
+            rutas = [os.path.join(carpeta, "recetas.jsonl"),
+                     os.path.join(carpeta, "recetas.csv")]
+            for ruta in rutas:
+                exportar_recetas(conn, ruta)
+        finally:
+            conn.close()
+
+        # 3. Importación de cada archivo en una BD vacía.
+        for ruta in rutas:
+            destino = inicializar_bd(os.path.join(
+                carpeta, f"destino_{formato_de_archivo(ruta)}.db"), modo_masivo=True)
+            try:
+                crear_tablas_iniciales(destino.cursor(), destino)
+                importar_recetas(destino, ruta)
+            finally:
+                destino.close()
+
+
 # =====================================================================
 #                                EJECUCIÓN
 # =====================================================================
@@ -245,6 +1086,63 @@ def main():
 
     # La conexión se cierra automáticamente al salir del bloque 'with'
 
+    # --- DEMOSTRACIÓN DE NUTRICIÓN (agregados mantenidos por triggers) ---
+    print("\n--- PASO 2B: NUTRICIÓN Y PORCIONES ---")
+    with inicializar_bd() as conn:
+        for factor in (1.0, 2.0):
+            for _, nombre, gramos, calorias in listar_por_calorias(conn.cursor(), factor=factor):
+                print(
+                    f" - {nombre} (x{factor:g}): {gramos:.0f} g, {calorias:.0f} kcal")
+
+    # --- DEMOSTRACIÓN DE BÚSQUEDA POR INGREDIENTES ("¿qué puedo cocinar con esto?") ---
+    print("\n--- PASO 3: BÚSQUEDA POR INGREDIENTES ---")
+    with inicializar_bd() as conn:
+        despensa = ["garbanzos cocidos", "ESPINACAS", "Tomate"]
+        print(f"Despensa: {', '.join(despensa)}")
+        for _, nombre, tiempo_prep, disponibles, total, cobertura in buscar_por_ingredientes(conn.cursor(), despensa, tiempo_max=60):
+            print(
+                f" - {nombre} ({tiempo_prep} min): {disponibles} de {total} ingredientes ({cobertura:.0%})")
+
+    print("\nℹ️ Las pruebas de rendimiento tardan varios minutos, se ejecutan con: python gestor_recetas_db.py --medir")
+
+
+# Pruebas de rendimiento sobre bases de datos temporales (solo con --medir, tardan varios minutos).
+def medir_rendimiento():
+
+    # 1. Guardado masivo (muchas recetas, una transacción).
+    print("\n--- GUARDADO MASIVO ---")
+    medir_guardado_masivo()
+
+    # 2. Búsqueda por ingredientes sobre un millón de filas.
+    print("\n--- BÚSQUEDA POR INGREDIENTES ---")
+    medir_busqueda_ingredientes()
+
+    # 3. Acceso concurrente (un hilo escritor y varios lectores).
+    print("\n--- ACCESO CONCURRENTE ---")
+    medir_concurrencia()
+
+    # 4. Importación y exportación (JSON-lines y CSV).
+    print("\n--- IMPORTACIÓN Y EXPORTACIÓN ---")
+    medir_importacion_exportacion()
+
 
 if __name__ == "__main__":
-    main()
+    # Opciones: --exportar RUTA o --importar RUTA (.jsonl/.ndjson/.csv), con --bd RUTA_BD y --lote N opcionales, o --medir para las pruebas
+    # de rendimiento; sin opciones se ejecuta la demostración.
+    argumentos = sys.argv[1:]
+    ruta_bd = argumentos[argumentos.index(
+        "--bd") + 1] if "--bd" in argumentos else "Recetas_veganas.db"
+    if "--exportar" in argumentos:
+        with inicializar_bd(ruta_bd) as conn:
+            crear_tablas_iniciales(conn.cursor(), conn)
+            exportar_recetas(
+                conn, argumentos[argumentos.index("--exportar") + 1])
+    elif "--importar" in argumentos:
+        with inicializar_bd(ruta_bd, modo_masivo=True) as conn:
+            crear_tablas_iniciales(conn.cursor(), conn)
+            importar_recetas(conn, argumentos[argumentos.index("--importar") + 1],
+                             int(argumentos[argumentos.index("--lote") + 1]) if "--lote" in argumentos else TAMANO_LOTE_IMPORTACION)
+    elif "--medir" in argumentos:
+        medir_rendimiento()
+    else:
+        main()
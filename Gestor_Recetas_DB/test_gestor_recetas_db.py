@@ -0,0 +1,256 @@
+# Pruebas del gestor de recetas (se ejecutan con: python -m pytest), siempre sobre bases de datos temporales.
+import json
+import sqlite3
+
+import pytest
+
+import gestor_recetas_db
+from gestor_recetas_db import Ingrediente, Receta
+
+
+# Crea una base de datos temporal con el esquema completo y devuelve su conexión.
+@pytest.fixture
+def conn(tmp_path):
+    conexion = gestor_recetas_db.inicializar_bd(str(tmp_path / "recetas.db"))
+    gestor_recetas_db.crear_tablas_iniciales(conexion.cursor(), conexion)
+    yield conexion
+    conexion.close()
+
+
+# Receta de prueba con 'num_ingredientes' ingredientes conocidos.
+def receta_prueba(nombre: str = "Hummus", num_ingredientes: int = 2) -> Receta:
+    receta = Receta(nombre, 15)
+    for ing in [Ingrediente("Garbanzos cocidos", 400.0, "g"), Ingrediente("Ajo", 10.0, "g"),
+                Ingrediente("Aceite de oliva", 2.0, "cucharadas")][:num_ingredientes]:
+        receta.agregar_ingrediente(ing)
+    return receta
+
+
+def contar(conn, tabla: str) -> int:
+    return conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+
+
+# --- GUARDADO MASIVO ---
+
+def test_guardar_muchas_asigna_ids_consecutivos(conn):
+    Receta.guardar_muchas_db(conn, [receta_prueba("Primera")])
+    recetas = [receta_prueba(f"Receta {i}") for i in range(5)]
+
+    assert Receta.guardar_muchas_db(conn, recetas) == 5
+    assert [r.id for r in recetas] == [2, 3, 4, 5, 6]
+    assert [r.nombre for r in Receta.cargar_muchas(conn.cursor(), range(1, 7))] == [
+        "Primera"] + [f"Receta {i}" for i in range(5)]
+    assert not conn.in_transaction
+
+
+def test_guardar_muchas_deshace_el_lote_si_falla(conn):
+    # RECETAS.nombre es NOT NULL: la segunda receta falla después de insertar la primera.
+    recetas = [receta_prueba("Buena"), receta_prueba(None)]
+
+    with pytest.raises(sqlite3.IntegrityError):
+        Receta.guardar_muchas_db(conn, recetas)
+    assert contar(conn, "RECETAS") == 0
+    assert contar(conn, "INGREDIENTES") == 0
+
+
+def test_guardar_muchas_respeta_la_transaccion_de_quien_llama(conn):
+    conn.execute("BEGIN")
+    conn.execute("INSERT INTO RECETAS (nombre, tiempo_prep) VALUES ('Del llamador', 5)")
+
+    # Un lote que falla solo deshace su parte, la transacción sigue abierta con la fila anterior.
+    with pytest.raises(sqlite3.IntegrityError):
+        Receta.guardar_muchas_db(conn, [receta_prueba("Buena"), receta_prueba(None)])
+    assert conn.in_transaction
+    assert contar(conn, "RECETAS") == 1
+
+    # Un lote correcto tampoco confirma: quien llama decide.
+    Receta.guardar_muchas_db(conn, [receta_prueba("Otra")])
+    assert conn.in_transaction
+    conn.rollback()
+    assert contar(conn, "RECETAS") == 0
+
+
+# Con muchos hilos a la vez el repositorio no abre más conexiones que el tamaño del pool, y lecturas y escrituras siguen funcionando.
+def test_repositorio_pool_acotado(tmp_path):
+    import threading
+
+    repositorio = gestor_recetas_db.RepositorioRecetas(str(tmp_path / "pool.db"), tamano_pool=2)
+    try:
+        errores = []
+
+        def trabajar(n):
+            try:
+                receta_id = repositorio.guardar(receta_prueba(f"Receta {n}"))
+                assert repositorio.obtener(receta_id).nombre == f"Receta {n}"
+            except Exception as e:
+                errores.append(e)
+
+        hilos = [threading.Thread(target=trabajar, args=(n,)) for n in range(12)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        assert errores == []
+        assert len(repositorio._conexiones) <= 2
+        assert len(repositorio.obtener_muchas(range(1, 13))) == 12
+    finally:
+        repositorio.cerrar()
+
+
+# --- AGREGADOS ---
+
+def agregados(conn, receta_id: int):
+    return conn.execute("SELECT gramos_totales, calorias FROM RECETAS WHERE id = ?", (receta_id,)).fetchone()
+
+
+# Los triggers recalculan con SUM(): tras insertar y borrar muchas filas con decimales el total vuelve exactamente a 0.
+def test_triggers_recalculan_sin_deriva(conn):
+    Receta.guardar_muchas_db(conn, [receta_prueba("Hummus", 2)])
+    assert agregados(conn, 1) == pytest.approx((410.0, 656 + 14.9))
+
+    with conn:
+        conn.executemany("INSERT INTO INGREDIENTES (receta_id, nombre, cantidad, unidad) VALUES (1, 'Ajo', ?, 'g')",
+                         [(0.1,)] * 50)
+        conn.execute("UPDATE INGREDIENTES SET cantidad = 800.0 WHERE nombre = 'Garbanzos cocidos'")
+    assert agregados(conn, 1)[0] == pytest.approx(815.0)
+
+    with conn:
+        conn.execute("DELETE FROM INGREDIENTES WHERE receta_id = 1")
+    assert agregados(conn, 1) == (0, 0)
+
+
+# Archivo JSON-lines con 'num_recetas' recetas de garbanzos y ajo (410 g) y, opcionalmente, una línea rota al final.
+def escribir_jsonl(ruta, num_recetas: int, linea_rota: bool = False):
+    ruta.write_text("".join(json.dumps({
+        "nombre": f"Receta {i}", "tiempo_prep": 10,
+        "ingredientes": [{"nombre": "Garbanzos cocidos", "cantidad": 400.0, "unidad": "g"},
+                         {"nombre": "Ajo", "cantidad": 10.0, "unidad": "g"}],
+    }) + "\n" for i in range(num_recetas)) + ("{no es json\n" if linea_rota else ""), encoding="utf-8")
+
+
+# La importación quita los triggers mientras dura, recalcula al final solo las recetas importadas y deja los triggers como estaban.
+def test_importar_recalcula_agregados(conn, tmp_path):
+    Receta.guardar_muchas_db(conn, [receta_prueba("Anterior", 1)])
+    # Un total anterior desajustado a propósito: la importación no debe recalcular recetas que no son suyas.
+    with conn:
+        conn.execute("UPDATE RECETAS SET gramos_totales = -1 WHERE id = 1")
+    ruta = tmp_path / "recetas.jsonl"
+    escribir_jsonl(ruta, 5)
+
+    assert gestor_recetas_db.importar_recetas(conn, str(ruta), tamano_lote=2) == 5
+    assert all(agregados(conn, i) == pytest.approx((410.0, 656 + 14.9)) for i in range(2, 7))
+    assert agregados(conn, 1)[0] == -1
+    assert contar(conn, "sqlite_master WHERE type = 'trigger'") == 3
+
+    with conn:
+        conn.execute("DELETE FROM INGREDIENTES WHERE receta_id = 2 AND nombre = 'Ajo'")
+    assert agregados(conn, 2) == pytest.approx((400.0, 656))
+
+
+# Si la importación falla a medias no queda ninguna receta del archivo y los triggers siguen ahí.
+def test_importar_fallida_no_deja_la_bd_sin_triggers(conn, tmp_path):
+    ruta = tmp_path / "recetas.jsonl"
+    escribir_jsonl(ruta, 3, linea_rota=True)
+
+    with pytest.raises(json.JSONDecodeError):
+        gestor_recetas_db.importar_recetas(conn, str(ruta), tamano_lote=1)
+
+    assert contar(conn, "RECETAS") == 0
+    assert contar(conn, "sqlite_master WHERE type = 'trigger'") == 3
+    Receta.guardar_muchas_db(conn, [receta_prueba("Hummus", 2)])
+    assert agregados(conn, 1) == pytest.approx((410.0, 656 + 14.9))
+
+
+# Una BD que perdió los triggers (p. ej. por una versión anterior del importador) los recupera al abrirse.
+def test_abrir_recrea_triggers_perdidos(conn):
+    with conn:
+        for nombre, _ in gestor_recetas_db.TRIGGERS_AGREGADOS:
+            conn.execute(f"DROP TRIGGER {nombre}")
+
+    gestor_recetas_db.crear_tablas_iniciales(conn.cursor(), conn)
+
+    assert contar(conn, "sqlite_master WHERE type = 'trigger'") == 3
+
+
+# El factor de porciones escala los totales, y un factor 0 o negativo se rechaza en lugar de dividir por cero.
+def test_listar_por_calorias_con_factor(conn):
+    Receta.guardar_muchas_db(conn, [receta_prueba("Hummus", 2)])
+
+    assert gestor_recetas_db.listar_por_calorias(conn.cursor(), factor=2.0)[0][2:] == pytest.approx((820.0, 2 * (656 + 14.9)))
+    with pytest.raises(ValueError):
+        gestor_recetas_db.listar_por_calorias(conn.cursor(), calorias_max=100, factor=0)
+
+
+# --- BÚSQUEDA POR INGREDIENTES ---
+
+# Se ordena por cobertura (y luego por ingredientes que faltan), el filtro de tiempo descarta recetas y los nombres se normalizan.
+def test_buscar_por_ingredientes(conn):
+    recetas = []
+    for nombre, tiempo, ingredientes in [("Hummus", 15, ["Garbanzos cocidos", "Ajo"]),
+                                         ("Ensalada", 10, ["Tomate", "Cebolla", "Espinacas", "Ajo"]),
+                                         ("Guiso lento", 200, ["Garbanzos Cocidos", "Tomate"]),
+                                         ("Sopa", 30, ["Tomate", "Champiñones"])]:
+        receta = Receta(nombre, tiempo)
+        for ingrediente in ingredientes:
+            receta.agregar_ingrediente(Ingrediente(ingrediente, 100.0, "g"))
+        recetas.append(receta)
+    Receta.guardar_muchas_db(conn, recetas)
+
+    despensa = ["  GARBANZOS   cocidos ", "ajo", "Tomate", "champinones"]
+    resultados = gestor_recetas_db.buscar_por_ingredientes(conn.cursor(), despensa, tiempo_max=60)
+
+    assert [(nombre, disponibles, total) for _, nombre, _, disponibles, total, _ in resultados] == [
+        ("Hummus", 2, 2), ("Sopa", 2, 2), ("Ensalada", 2, 4)]
+    assert resultados[2][5] == pytest.approx(0.5)
+    # Sin límite de tiempo aparece también el guiso, empatado en cobertura y detrás por tiempo de preparación.
+    assert [fila[1] for fila in gestor_recetas_db.buscar_por_ingredientes(conn.cursor(), despensa)] == [
+        "Hummus", "Sopa", "Guiso lento", "Ensalada"]
+    assert gestor_recetas_db.buscar_por_ingredientes(conn.cursor(), []) == []
+
+
+# --- CARGA DE RECETAS ---
+
+# Datos comparables de una receta: (id, nombre, tiempo, [(ingrediente, cantidad, unidad)]).
+def datos_receta(receta: Receta):
+    return (receta.id, receta.nombre, receta.tiempo_prep,
+            [(ing.nombre, ing.cantidad, ing.unidad) for ing in receta.ingredientes])
+
+
+# Recetas 1..5 con 0, 1, 2, 0 y 2 ingredientes (las vacías deben cargarse igual).
+@pytest.fixture
+def recetas_guardadas(conn):
+    recetas = [receta_prueba(f"Receta {i}", num) for i, num in enumerate([0, 1, 2, 0, 2], start=1)]
+    Receta.guardar_muchas_db(conn, recetas)
+    return recetas
+
+
+# El JOIN por bloques respeta el orden pedido, omite los IDs que no existen y conserva las recetas sin ingredientes.
+def test_cargar_muchas_por_bloques(conn, recetas_guardadas, monkeypatch):
+    monkeypatch.setattr(gestor_recetas_db, "TAMANO_BLOQUE_IDS", 2)
+
+    cargadas = Receta.cargar_muchas(conn.cursor(), [5, 99, 1, 4, 2, 3])
+
+    assert [datos_receta(r) for r in cargadas] == [datos_receta(recetas_guardadas[i - 1]) for i in [5, 1, 4, 2, 3]]
+    assert cargadas[1].ingredientes == [] and cargadas[2].ingredientes == []
+
+
+# En la carga perezosa los ingredientes se consultan al usarlos por primera vez (y se ven los cambios hechos hasta entonces).
+def test_carga_perezosa_lee_ingredientes_al_usarlos(conn, recetas_guardadas):
+    receta = Receta.cargar_por_id(conn.cursor(), 2, perezoso=True)
+    assert receta._ingredientes is None
+
+    with conn:
+        conn.execute("INSERT INTO INGREDIENTES (receta_id, nombre, cantidad, unidad) VALUES (2, 'Tomate', 1.0, 'g')")
+
+    assert [ing.nombre for ing in receta.ingredientes] == ["Garbanzos cocidos", "Tomate"]
+    assert receta._cargar_ingredientes is None
+
+
+# Recorrer todas las recetas (completas o perezosas, con lotes más pequeños que el total) da lo mismo que cargarlas por ID.
+def test_iterar_todas_igual_que_cargar_muchas(conn, recetas_guardadas):
+    esperadas = [datos_receta(r) for r in Receta.cargar_muchas(conn.cursor(), range(1, 6))]
+
+    for perezoso in (False, True):
+        recorridas = [datos_receta(r) for r in Receta.iterar_todas(conn, tamano_lote=2, perezoso=perezoso)]
+        assert recorridas == esperadas
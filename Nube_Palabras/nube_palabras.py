@@ -1,16 +1,53 @@
 # Módulos y dependencias de Python (Necesitarán instalación local: pip install wordcloud matplotlib)
 import collections
-import string
+import functools
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
 # Importamos la clase WordCloud directamente para generar la nube.
 from wordcloud import WordCloud
 # Importamos Matplotlib para mostrar la imagen generada (solo necesario para plt.show() localmente).
 import matplotlib.pyplot as plt
 # Módulo para el sistema operativo
 import os
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple
 
 # --- CONSTANTES ---
 
+# Tamaño (en bytes) de cada bloque leído de un archivo, el texto nunca se carga entero en memoria.
+TAMANO_BLOQUE_LECTURA = 1 << 20
+
+# Palabra: letras/dígitos, con guiones o apóstrofos internos (ej: "auto-estima"), sin la puntuación de los bordes.
+PATRON_PALABRA = re.compile(r"\w+(?:[-'’]\w+)*")
+
+# Bytes de espacio en blanco donde se puede cortar un bloque sin partir una palabra (en UTF-8 nunca forman parte de otro carácter).
+ESPACIOS_BYTES = (b" ", b"\n", b"\t", b"\r", b"\f", b"\v")
+
+# A partir de este tamaño (bytes) un archivo se cuenta en paralelo, repartido en FRAGMENTOS_POR_PROCESO fragmentos por proceso (para equilibrar la carga).
+UMBRAL_PARALELO = 64 << 20
+FRAGMENTOS_POR_PROCESO = 4
+
+# Modo corpus: extensiones que se analizan y caché SQLite (dentro de la carpeta del corpus) con el conteo de cada archivo.
+EXTENSIONES_CORPUS = (".txt",)
+NOMBRE_CACHE = ".cache_nube_palabras.db"
+# Formato de la caché (2: total del corpus en la tabla TOTAL, una fila por palabra), forma parte de la firma guardada.
+VERSION_CACHE = 2
+
+# Modos de análisis del menú: palabras sueltas, n-gramas (n palabras relevantes seguidas), raíces (stemming) y TF-IDF (solo con un corpus).
+MODOS_ANALISIS = ["palabras", "bigramas", "trigramas", "raices", "tfidf"]
+NGRAMAS = {"bigramas": 2, "trigramas": 3}
+
+# Sufijos derivativos del español (sin tildes) que quita el stemming, se prueban de más largo a más corto.
+SUFIJOS_ESPANOL = sorted([
+    "amientos", "imientos", "amiento", "imiento", "aciones", "uciones", "acion", "ucion",
+    "adoras", "adores", "adora", "ador", "amente", "mente", "idades", "idad", "ismos", "ismo",
+    "istas", "ista", "ables", "ibles", "able", "ible", "ancias", "ancia", "encias", "encia",
+], key=len, reverse=True)
+SIN_TILDES = str.maketrans("áéíóúü", "aeiouu")
 
 # Lista de palabras comunes que no aportan valor significativo (stopwords) en español.
 STOPWORDS_ESPANOL = {
@@ -22,13 +59,206 @@ STOPWORDS_ESPANOL = {
 }
 
 
-# Lee el contenido de un archivo de texto de forma segura manejando errores, ruta_archivo: La ruta completa del archivo a leer, :return: El contenido del archivo como una cadena, o None si hay error.
-def leer_archivo(ruta_archivo: str) -> Optional[str]:
+# Lee un archivo (o solo los bytes [inicio, fin)) en bloques de 'tamano' bytes cortados en un espacio en blanco, para no partir palabras entre dos bloques.
+def leer_bloques(ruta_archivo: str, tamano: int = TAMANO_BLOQUE_LECTURA,
+                 inicio: int = 0, fin: Optional[int] = None) -> Iterator[str]:
+    with open(ruta_archivo, mode='rb') as archivo:
+        archivo.seek(inicio)
+        restantes = fin - inicio if fin is not None else None
+        pendiente = b""
+        while True:
+            bloque = archivo.read(
+                tamano if restantes is None else min(tamano, restantes))
+            if not bloque:
+                break
+            if restantes is not None:
+                restantes -= len(bloque)
+            bloque = pendiente + bloque
+
+            # El trozo tras el último espacio puede ser el principio de una palabra: se guarda para el siguiente bloque.
+            corte = max(bloque.rfind(espacio) for espacio in ESPACIOS_BYTES)
+            if corte < 0:
+                pendiente = bloque
+                continue
+            pendiente = bloque[corte + 1:]
+            yield bloque[:corte + 1].decode('utf-8', errors='replace')
+
+        if pendiente:
+            yield pendiente.decode('utf-8', errors='replace')
+
+
+# Tokeniza y cuenta las palabras de una secuencia de bloques de texto, actualizando el Counter bloque a bloque (la memoria depende del vocabulario, no del tamaño del texto).
+def contar_palabras(bloques: Iterable[str]) -> collections.Counter:
+    return limpiar_formas(contar_formas(bloques))
+
+
+# 1. CONTEO: minúsculas y división por espacios, bloque a bloque (.split() y Counter trabajan en C).
+def contar_formas(bloques: Iterable[str]) -> collections.Counter:
+    formas: collections.Counter = collections.Counter()
+    for bloque in bloques:
+        formas.update(bloque.lower().split())
+    return formas
+
+
+# 2. LIMPIEZA Y FILTRADO una sola vez por forma distinta: la expresión regular quita la puntuación (ej: "¿qué?" -> "qué"),
+#    y se descartan stopwords y palabras muy cortas (ej: letras sueltas).
+def limpiar_formas(formas: collections.Counter) -> collections.Counter:
+    contador_palabras: collections.Counter = collections.Counter()
+    for forma, veces in formas.items():
+        for palabra in PATRON_PALABRA.findall(forma):
+            if len(palabra) > 2 and palabra not in STOPWORDS_ESPANOL:
+                contador_palabras[palabra] += veces
+
+    return contador_palabras
+
+
+# Palabras relevantes de una forma (trozo entre espacios) ya en minúsculas, ej: "¿qué-tal?" -> ("qué-tal",).
+# Memorizado por forma distinta (con límite, por si el texto tiene muchas formas únicas), la expresión regular no se repite en cada aparición.
+@functools.lru_cache(maxsize=1 << 18)
+def palabras_de_forma(forma: str) -> Tuple[str, ...]:
+    return tuple(palabra for palabra in PATRON_PALABRA.findall(forma)
+                 if len(palabra) > 2 and palabra not in STOPWORDS_ESPANOL)
+
+
+# Cuenta n-gramas: grupos de 'n' palabras relevantes seguidas (tras quitar stopwords y palabras cortas), ej: "nube palabras".
+# Las últimas n-1 palabras de cada bloque se arrastran al siguiente para no perder los n-gramas que cruzan el corte.
+def contar_ngramas(bloques: Iterable[str], n: int = 2) -> collections.Counter:
+    contador_ngramas: collections.Counter = collections.Counter()
+    previas: List[str] = []
+    for bloque in bloques:
+        palabras = previas + [palabra for forma in bloque.lower().split()
+                              for palabra in palabras_de_forma(forma)]
+        contador_ngramas.update(" ".join(palabras[i:i + n])
+                                for i in range(len(palabras) - n + 1))
+        previas = palabras[-(n - 1):] if n > 1 else []
+    return contador_ngramas
+
+
+# Stemming ligero del español: sin tildes, quita el sufijo derivativo más largo o, si no hay, el plural y la vocal final (ej: "niñas" -> "niñ").
+# Memorizado por palabra distinta (con el mismo límite que palabras_de_forma, el vocabulario de un corpus grande no tiene tope).
+@functools.lru_cache(maxsize=1 << 18)
+def raiz_espanol(palabra: str) -> str:
+    raiz = palabra.translate(SIN_TILDES)
+    for sufijo in SUFIJOS_ESPANOL:
+        if raiz.endswith(sufijo) and len(raiz) - len(sufijo) >= 3:
+            return raiz[:-len(sufijo)]
+
+    if raiz.endswith("es") and len(raiz) > 5:
+        raiz = raiz[:-2]
+    elif raiz.endswith("s") and len(raiz) > 4:
+        raiz = raiz[:-1]
+    if raiz[-1] in "aeo" and len(raiz) > 3:
+        raiz = raiz[:-1]
+    return raiz
+
+
+# Suma las frecuencias de las palabras con la misma raíz, cada grupo se muestra con su forma más frecuente (ej: "niño" agrupa "niños", "niña"...).
+def agrupar_por_raiz(contador_palabras: collections.Counter) -> collections.Counter:
+    formas_por_raiz: Dict[str, collections.Counter] = collections.defaultdict(
+        collections.Counter)
+    for palabra, veces in contador_palabras.items():
+        formas_por_raiz[raiz_espanol(palabra)][palabra] += veces
+    return collections.Counter({formas.most_common(1)[0][0]: sum(formas.values())
+                                for formas in formas_por_raiz.values()})
+
+
+# idf suavizado de cada palabra = log((1 + N) / (1 + df)) + 1, con N documentos y df documentos que contienen la palabra.
+def calcular_idf(df: collections.Counter, num_documentos: int) -> Dict[str, float]:
+    return {palabra: math.log((1 + num_documentos) / (1 + documentos)) + 1
+            for palabra, documentos in df.items()}
+
+
+# TF-IDF disperso (diccionario con solo las palabras presentes) de UN documento: frecuencia relativa en el documento x idf.
+def tfidf_documento(conteo: Dict[str, int], idf: Dict[str, float]) -> Dict[str, float]:
+    total = sum(conteo.values())
+    if not total:
+        return {}
+    return {palabra: veces / total * idf[palabra] for palabra, veces in conteo.items()}
+
+
+# Peso TF-IDF de cada palabra en un conjunto de documentos (suma de sus pesos por documento), en dos pasadas sobre los conteos:
+# la primera calcula df y N, la segunda los pesos. 'conteos' es una función que devuelve un iterable nuevo en cada llamada (ej: CacheFrecuencias.conteos).
+def pesos_tfidf(conteos: Callable[[], Iterable[Dict[str, int]]]) -> collections.Counter:
+    df: collections.Counter = collections.Counter()
+    num_documentos = 0
+    for conteo in conteos():
+        df.update(conteo.keys())
+        num_documentos += 1
+    idf = calcular_idf(df, num_documentos)
+
+    pesos: Dict[str, float] = collections.defaultdict(float)
+    for conteo in conteos():
+        for palabra, peso in tfidf_documento(conteo, idf).items():
+            pesos[palabra] += peso
+    return collections.Counter(pesos)
+
+
+# Divide un archivo en 'num_fragmentos' rangos de bytes [inicio, fin) de tamaño parecido, cada corte desplazado hasta el siguiente espacio en blanco.
+def dividir_en_fragmentos(ruta_archivo: str, num_fragmentos: int) -> List[Tuple[int, int]]:
+    tamano_total = os.path.getsize(ruta_archivo)
+    cortes = [0]
+    with open(ruta_archivo, mode='rb') as archivo:
+        for n in range(1, num_fragmentos):
+            posicion = max(tamano_total * n // num_fragmentos, cortes[-1])
+            archivo.seek(posicion)
+            # Avanza hasta el primer espacio (o el final del archivo).
+            while True:
+                bloque = archivo.read(1 << 16)
+                if not bloque:
+                    posicion = tamano_total
+                    break
+                indices = [i for i in (bloque.find(espacio)
+                                       for espacio in ESPACIOS_BYTES) if i >= 0]
+                if indices:
+                    posicion += min(indices)
+                    break
+                posicion += len(bloque)
+            cortes.append(posicion)
+    cortes.append(tamano_total)
+
+    # Los fragmentos vacíos (cortes repetidos) se descartan.
+    return [(inicio, fin) for inicio, fin in zip(cortes, cortes[1:]) if fin > inicio]
+
+
+# MAP: cuenta un fragmento del archivo en un proceso aparte, devuelve sus palabras limpias y el número de tokens leídos.
+def contar_fragmento(ruta_archivo: str, inicio: int, fin: int) -> Tuple[collections.Counter, int]:
+    formas = contar_formas(leer_bloques(
+        ruta_archivo, inicio=inicio, fin=fin))
+    return limpiar_formas(formas), sum(formas.values())
+
+
+# Cuenta un archivo grande repartiéndolo entre 'procesos' procesos (map) y sumando sus Counter (reduce), informa de los tokens por segundo.
+def contar_archivo_paralelo(ruta_archivo: str, procesos: Optional[int] = None) -> collections.Counter:
+    procesos = procesos or os.cpu_count() or 1
+    inicio_tiempo = time.perf_counter()
+    fragmentos = dividir_en_fragmentos(
+        ruta_archivo, procesos * FRAGMENTOS_POR_PROCESO)
+
+    contador_palabras: collections.Counter = collections.Counter()
+    total_tokens = 0
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        parciales = ejecutor.map(contar_fragmento, [ruta_archivo] * len(fragmentos),
+                                 [inicio for inicio, _ in fragmentos], [fin for _, fin in fragmentos])
+        for contador_parcial, tokens in parciales:
+            contador_palabras.update(contador_parcial)
+            total_tokens += tokens
+
+    segundos = time.perf_counter() - inicio_tiempo
+    print(f"⚡ {total_tokens:,} tokens contados en {segundos:.2f} s con {procesos} procesos "
+          f"({total_tokens / segundos:,.0f} tokens/s).")
+    return contador_palabras
+
+
+# Cuenta las palabras (o n-gramas, o raíces, según 'modo') de un archivo leyéndolo por bloques (en paralelo si es grande), devuelve None si hay error.
+def contar_archivo(ruta_archivo: str, modo: str = "palabras") -> Optional[collections.Counter]:
     try:
-        # Usamos 'with open' para asegurar que el archivo se cierre automáticamente. es crucial especificar la codificación 'utf-8' para manejar tildes y caracteres especiales.
-        with open(ruta_archivo, mode='r', encoding='utf-8') as archivo:
-            contenido = archivo.read()
-            return contenido
+        if modo in NGRAMAS:
+            return contar_ngramas(leer_bloques(ruta_archivo), NGRAMAS[modo])
+        if os.path.getsize(ruta_archivo) >= UMBRAL_PARALELO and (os.cpu_count() or 1) > 1:
+            contador_palabras = contar_archivo_paralelo(ruta_archivo)
+        else:
+            contador_palabras = contar_palabras(leer_bloques(ruta_archivo))
+        return agrupar_por_raiz(contador_palabras) if modo == "raices" else contador_palabras
 
     except FileNotFoundError:
         print(f"❌ Error: El archivo '{ruta_archivo}' no fue encontrado.")
@@ -38,37 +268,194 @@ def leer_archivo(ruta_archivo: str) -> Optional[str]:
         return None
 
 
-# Limpia, analiza el texto, muestra las estadísticas y genera la Nube de Palabras
-def analizar_texto(texto: str):
-
-    # 1. LIMPIEZA INICIAL: Convierte a minúsculas y elimina la puntuación de los bordes, usamos .split() sin argumentos para dividir por cualquier espacio en blanco (incluyendo saltos de línea).
-    palabras_divididas = texto.lower().split()
+# Firma de la forma de contar (stopwords y expresión regular): si cambia, los conteos guardados en la caché ya no valen.
+def firma_conteo() -> str:
+    datos = PATRON_PALABRA.pattern + "\n" + "\n".join(sorted(STOPWORDS_ESPANOL))
+    return hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+
+# Caché SQLite de frecuencias por archivo de un corpus: (ruta, tamaño, mtime) -> conteo, más el total del corpus ya sumado (una fila por palabra).
+# Así, tras editar un archivo solo se vuelve a contar ese archivo y en el total solo se corrigen las palabras cuya frecuencia cambió.
+class CacheFrecuencias:
+
+    def __init__(self, directorio: str):
+        self.conn = sqlite3.connect(os.path.join(directorio, NOMBRE_CACHE))
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS META (
+            clave TEXT PRIMARY KEY,
+            valor TEXT
+        );
+        -- Conteo (JSON) de cada archivo, con el tamaño y mtime que tenía al contarlo.
+        CREATE TABLE IF NOT EXISTS ARCHIVOS (
+            ruta TEXT PRIMARY KEY,
+            tamano INTEGER,
+            mtime_ns INTEGER,
+            conteo TEXT
+        );
+        -- Frecuencia total de cada palabra en el corpus.
+        CREATE TABLE IF NOT EXISTS TOTAL (
+            palabra TEXT PRIMARY KEY,
+            frecuencia INTEGER NOT NULL
+        );
+        """)
+
+    def cerrar(self):
+        self.conn.close()
+
+    # Devuelve {ruta: (tamaño, mtime)} de los archivos guardados, si la firma cambió se vacía la caché para forzar un recuento completo.
+    def cargar_estados(self, firma: str) -> Dict[str, Tuple[int, int]]:
+        firma = f"{VERSION_CACHE}:{firma}"
+        fila = self.conn.execute(
+            "SELECT valor FROM META WHERE clave = 'firma'").fetchone()
+        if not fila or fila[0] != firma:
+            with self.conn:
+                self.conn.execute("DELETE FROM ARCHIVOS")
+                self.conn.execute("DELETE FROM TOTAL")
+                self.conn.execute("DELETE FROM META")
+                self.conn.execute(
+                    "INSERT INTO META (clave, valor) VALUES ('firma', ?)", (firma,))
+            return {}
+        return {ruta: (tamano, mtime_ns)
+                for ruta, tamano, mtime_ns in self.conn.execute("SELECT ruta, tamano, mtime_ns FROM ARCHIVOS")}
+
+    def conteo(self, ruta: str) -> collections.Counter:
+        fila = self.conn.execute(
+            "SELECT conteo FROM ARCHIVOS WHERE ruta = ?", (ruta,)).fetchone()
+        return collections.Counter(json.loads(fila[0]) if fila else {})
+
+    # Recorre los conteos de todos los archivos guardados (uno a uno, sin cargarlos todos en memoria).
+    def conteos(self) -> Iterator[Dict[str, int]]:
+        for (conteo,) in self.conn.execute("SELECT conteo FROM ARCHIVOS"):
+            yield json.loads(conteo)
+
+    def total(self) -> collections.Counter:
+        return collections.Counter(dict(self.conn.execute("SELECT palabra, frecuencia FROM TOTAL")))
+
+    # Guarda en UNA transacción los archivos recontados, quita los borrados y suma al total 'diferencias' (solo las palabras que cambiaron).
+    def guardar(self, contados: Dict[str, Tuple[int, int, collections.Counter]], borrados: Iterable[str],
+                diferencias: Dict[str, int]):
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO ARCHIVOS (ruta, tamano, mtime_ns, conteo) VALUES (?, ?, ?, ?)",
+                                  ((ruta, tamano, mtime_ns, json.dumps(conteo, ensure_ascii=False))
+                                   for ruta, (tamano, mtime_ns, conteo) in contados.items()))
+            self.conn.executemany(
+                "DELETE FROM ARCHIVOS WHERE ruta = ?", ((ruta,) for ruta in borrados))
+            self.conn.executemany("INSERT INTO TOTAL (palabra, frecuencia) VALUES (?, ?) "
+                                  "ON CONFLICT(palabra) DO UPDATE SET frecuencia = frecuencia + excluded.frecuencia",
+                                  diferencias.items())
+            # Las palabras que bajan pueden quedar a cero (ya no aparecen en el corpus).
+            self.conn.executemany("DELETE FROM TOTAL WHERE palabra = ? AND frecuencia <= 0",
+                                  ((palabra,) for palabra, diferencia in diferencias.items() if diferencia < 0))
+
+
+# Cuenta las palabras de todos los archivos de texto de una carpeta (y sus subcarpetas), recontando solo los nuevos o modificados desde la última vez.
+# 'modo' puede agrupar el total por raíces o ponderarlo por TF-IDF (con los conteos por archivo de la caché), los n-gramas se cuentan siempre de nuevo.
+def contar_corpus(directorio: str, modo: str = "palabras") -> Optional[collections.Counter]:
+    if not os.path.isdir(directorio):
+        print(f"❌ Error: La carpeta '{directorio}' no existe.")
+        return None
+    inicio_tiempo = time.perf_counter()
 
-    # Lista para almacenar las palabras limpias y relevantes
-    texto_final: List[str] = []
+    try:
+        # 1. Estado actual de los archivos del corpus (rutas relativas a la carpeta).
+        actuales: Dict[str, Tuple[int, int]] = {}
+        for raiz, _, archivos in os.walk(directorio):
+            for nombre in archivos:
+                if nombre.lower().endswith(EXTENSIONES_CORPUS):
+                    ruta = os.path.join(raiz, nombre)
+                    try:
+                        estado = os.stat(ruta)
+                    except OSError:
+                        continue
+                    actuales[os.path.relpath(ruta, directorio)] = (
+                        estado.st_size, estado.st_mtime_ns)
+
+        # N-gramas: la caché solo guarda palabras sueltas, así que se cuentan todos los archivos.
+        if modo in NGRAMAS:
+            total_ngramas: collections.Counter = collections.Counter()
+            for ruta in actuales:
+                total_ngramas.update(contar_ngramas(leer_bloques(
+                    os.path.join(directorio, ruta)), NGRAMAS[modo]))
+            print(f"📚 Corpus de {len(actuales)} archivos: {modo} contados en {time.perf_counter() - inicio_tiempo:.2f} s.")
+            return total_ngramas
+
+        cache = CacheFrecuencias(directorio)
+        try:
+            # 2. Comparación con la caché: archivos nuevos o cambiados (tamaño o mtime) y archivos borrados.
+            conocidos = cache.cargar_estados(firma_conteo())
+            pendientes = [ruta for ruta, estado in actuales.items()
+                          if conocidos.get(ruta) != estado]
+            borrados = [ruta for ruta in conocidos if ruta not in actuales]
+
+            # 3. Solo se cuentan los pendientes (en paralelo si hay varios procesadores).
+            rutas = [os.path.join(directorio, ruta) for ruta in pendientes]
+            if len(rutas) > 1 and (os.cpu_count() or 1) > 1:
+                with ProcessPoolExecutor() as ejecutor:
+                    conteos = [conteo for conteo, _ in ejecutor.map(
+                        contar_fragmento, rutas, [0] * len(rutas), [actuales[ruta][0] for ruta in pendientes], chunksize=16)]
+            else:
+                conteos = [contar_fragmento(ruta_completa, 0, actuales[ruta][0])[0]
+                           for ruta_completa, ruta in zip(rutas, pendientes)]
+
+            # 4. Cambios del total: se resta el conteo anterior de cada archivo cambiado o borrado y se suma el nuevo.
+            diferencias: collections.Counter = collections.Counter()
+            contados: Dict[str, Tuple[int, int, collections.Counter]] = {}
+            for ruta, conteo in zip(pendientes, conteos):
+                if ruta in conocidos:
+                    diferencias.subtract(cache.conteo(ruta))
+                diferencias.update(conteo)
+                contados[ruta] = (*actuales[ruta], conteo)
+            for ruta in borrados:
+                diferencias.subtract(cache.conteo(ruta))
+
+            # Solo se escriben las palabras cuya frecuencia cambió.
+            cache.guardar(contados, borrados, {palabra: diferencia for palabra, diferencia in diferencias.items() if diferencia})
+            total = cache.total()
+            if modo == "tfidf":
+                total = pesos_tfidf(cache.conteos)
+        finally:
+            cache.cerrar()
+
+        segundos = time.perf_counter() - inicio_tiempo
+        print(f"📚 Corpus de {len(actuales)} archivos: {len(pendientes)} contados, {len(actuales) - len(pendientes)} de la caché "
+              f"y {len(borrados)} borrados, en {segundos:.2f} s.")
+        return agrupar_por_raiz(total) if modo == "raices" else total
+
+    # Carpeta sin permiso de escritura para la caché, archivo ilegible... (igual que contar_archivo).
+    except sqlite3.Error as e:
+        print(f"❌ Error en la caché del corpus '{directorio}': {e}")
+        return None
+    except Exception as e:
+        print(f"❌ Error al leer el corpus '{directorio}': {e}")
+        return None
 
-    # 2. PROCESAMIENTO, FILTRADO Y REFINAMIENTO
-    for palabra in palabras_divididas:
-        # Elimina la puntuación de los bordes (ej: "palabra." -> "palabra")
-        palabra_limpia = palabra.strip(string.punctuation)
 
-        # Filtra palabras vacías (que eran solo puntuación), stopwords y palabras muy cortas (ej: letras sueltas)
-        if palabra_limpia and palabra_limpia not in STOPWORDS_ESPANOL and len(palabra_limpia) > 2:
-            texto_final.append(palabra_limpia)
+# Limpia, analiza el texto, muestra las estadísticas y genera la Nube de Palabras
+def analizar_texto(texto: str, modo: str = "palabras"):
+    if modo in NGRAMAS:
+        analizar_frecuencias(contar_ngramas([texto], NGRAMAS[modo]))
+    elif modo == "raices":
+        analizar_frecuencias(agrupar_por_raiz(contar_palabras([texto])))
+    else:
+        analizar_frecuencias(contar_palabras([texto]))
 
-    # 3. CONTEO DE FRECUENCIAS
 
-    # collections.Counter es ideal para este propósito.
-    contador_palabras = collections.Counter(texto_final)
+# Muestra las estadísticas de un Counter de palabras ya limpias y filtradas y genera la Nube de Palabras
+def analizar_frecuencias(contador_palabras: collections.Counter):
 
-    # 4. CÁLCULO DE ESTADÍSTICAS
-    total_palabras = len(texto_final)
+    # 4. CÁLCULO DE ESTADÍSTICAS (con TF-IDF los valores son pesos, no recuentos)
+    total_palabras = sum(contador_palabras.values())
     palabras_unicas = len(contador_palabras)
+    son_pesos = any(isinstance(valor, float)
+                    for valor in contador_palabras.values())
 
     # --- SALIDA DE ESTADÍSTICAS EN CONSOLA ---
     print("\n" + "="*40)
     print("--- ✅ ESTADÍSTICAS DEL TEXTO ANALIZADO ---")
-    print(f"Total de palabras (relevantes y limpias): {total_palabras}")
+    if son_pesos:
+        print(f"Peso TF-IDF total: {total_palabras:.3f}")
+    else:
+        print(f"Total de palabras (relevantes y limpias): {total_palabras}")
     print(f"Palabras únicas (tamaño del vocabulario): {palabras_unicas}")
     print("="*40)
 
@@ -76,7 +463,10 @@ def analizar_texto(texto: str):
     if contador_palabras:
         # .most_common(10) devuelve las 10 tuplas (palabra, frecuencia) más frecuentes.
         for palabra, frecuencia in contador_palabras.most_common(10):
-            print(f"'{palabra}': {frecuencia} veces")
+            if son_pesos:
+                print(f"'{palabra}': peso {frecuencia:.4f}")
+            else:
+                print(f"'{palabra}': {frecuencia} veces")
     else:
         print("No se encontraron palabras relevantes después del filtrado.")
 
@@ -89,7 +479,7 @@ def analizar_texto(texto: str):
             height=400,
             # Asegura el uso de la lista de stopwords de Python
             stopwords=STOPWORDS_ESPANOL,
-            # Evita contar frases, solo palabras individuales
+            # Evita que WordCloud cuente frases por su cuenta, los n-gramas ya llegan contados en las frecuencias
             collocations=False
         )
 
@@ -131,19 +521,37 @@ def analizar_texto(texto: str):
 
 # Función principal para gestionar el menú y la entrada de texto.
 def main():
+    modo = "palabras"
     # Bucle infinito para permitir múltiples análisis.
     while True:
         print("\n--- ANALIZADOR DE TEXTO Y NUBE DE PALABRAS (PYTHON) ---")
         print("1. Ingresar texto directamente")
         print("2. Leer texto desde un archivo (.txt)")
-        print("3. Salir")
+        print("3. Analizar una carpeta de textos (corpus)")
+        print(f"4. Cambiar el modo de análisis (actual: {modo})")
+        print("5. Salir")
 
-        opcion = input("Elige una opción (1, 2, 3): ").strip()
+        opcion = input("Elige una opción (1, 2, 3, 4, 5): ").strip()
 
-        if opcion == '3':
+        if opcion == '5':
             print("👋 ¡Hasta pronto!")
             break
 
+        if opcion == '4':
+            # Opción 4: elige entre palabras, bigramas, trigramas, raíces o TF-IDF.
+            for numero, nombre_modo in enumerate(MODOS_ANALISIS, start=1):
+                print(f"   {numero}. {nombre_modo}")
+            eleccion = input("Elige un modo: ").strip()
+            if eleccion.isdigit() and 1 <= int(eleccion) <= len(MODOS_ANALISIS):
+                modo = MODOS_ANALISIS[int(eleccion) - 1]
+                print(f"✅ Modo de análisis: {modo}")
+            else:
+                print("❌ Modo no válido.")
+            continue
+
+        if modo == "tfidf" and opcion in ('1', '2'):
+            print("ℹ️ TF-IDF necesita varios documentos (opción 3), se analizan las palabras sueltas.")
+
         texto = None
         if opcion == '1':
             # Opción 1: lee la entrada del usuario directamente.
@@ -151,10 +559,22 @@ def main():
             texto = input()
 
         elif opcion == '2':
-            # Opción 2: pide la ruta y usa la función de lectura segura.
+            # Opción 2: pide la ruta y cuenta las palabras leyendo el archivo por bloques (sirve para archivos de varios GB).
             ruta = input(
                 "Ingresa la ruta completa del archivo .txt (ej: archivo.txt): ").strip()
-            texto = leer_archivo(ruta)
+            contador_palabras = contar_archivo(ruta, modo)
+            if contador_palabras is not None:
+                analizar_frecuencias(contador_palabras)
+            continue
+
+        elif opcion == '3':
+            # Opción 3: todos los .txt de la carpeta y sus subcarpetas, la caché evita recontar los que no cambiaron.
+            directorio = input(
+                "Ingresa la ruta de la carpeta del corpus: ").strip()
+            contador_palabras = contar_corpus(directorio, modo)
+            if contador_palabras is not None:
+                analizar_frecuencias(contador_palabras)
+            continue
 
         else:
             print("❌ Opción no válida.")
@@ -162,7 +582,7 @@ def main():
 
         # Solo procede al análisis si la variable 'texto' tiene contenido.
         if texto and texto.strip():
-            analizar_texto(texto)
+            analizar_texto(texto, modo)
         elif texto is not None:
             print("❌ El texto ingresado o leído está vacío. Inténtalo de nuevo.")
 
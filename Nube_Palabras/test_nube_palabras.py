@@ -0,0 +1,150 @@
+# Pruebas de la nube de palabras (se ejecutan con: python -m pytest), se omiten si faltan wordcloud o matplotlib.
+import pytest
+
+pytest.importorskip("wordcloud")
+pytest.importorskip("matplotlib")
+
+import nube_palabras
+
+
+TEXTO_PRUEBA = ("El gato come pescado y el perro come carne.\n"
+                "Ñandú, acción y canción: el gato-montés duerme.\t") * 500
+
+
+# --- LECTURA POR BLOQUES ---
+
+# Con bloques diminutos ninguna palabra (ni carácter de varios bytes) se parte: el texto se recupera igual y el conteo no cambia.
+def test_bloques_no_parten_palabras(tmp_path):
+    ruta = tmp_path / "texto.txt"
+    ruta.write_text(TEXTO_PRUEBA, encoding="utf-8")
+
+    for tamano in (1, 3, 7, 64):
+        bloques = list(nube_palabras.leer_bloques(str(ruta), tamano=tamano))
+        assert "".join(bloques) == TEXTO_PRUEBA
+        assert all(bloque[-1].isspace() for bloque in bloques[:-1])
+        assert nube_palabras.contar_palabras(bloques) == nube_palabras.contar_palabras([TEXTO_PRUEBA])
+
+
+# Un rango [inicio, fin) solo lee esos bytes.
+def test_bloques_de_un_rango(tmp_path):
+    ruta = tmp_path / "texto.txt"
+    ruta.write_bytes("uno dos canción cuatro".encode("utf-8"))
+
+    assert "".join(nube_palabras.leer_bloques(str(ruta), tamano=2, inicio=4, fin=16)) == "dos canción"
+
+
+# --- CONTEO EN PARALELO ---
+
+# Repartir el archivo en fragmentos (cortados en espacios) entre varios procesos da exactamente el mismo conteo que leerlo entero.
+def test_conteo_paralelo_igual_que_serie(tmp_path):
+    ruta = tmp_path / "texto.txt"
+    ruta.write_text(TEXTO_PRUEBA, encoding="utf-8")
+
+    serie = nube_palabras.contar_palabras(nube_palabras.leer_bloques(str(ruta)))
+    paralelo = nube_palabras.contar_archivo_paralelo(str(ruta), procesos=3)
+
+    assert serie and paralelo == serie
+    assert paralelo["gato"] == 500 and paralelo["gato-montés"] == 500
+
+
+# Los fragmentos cubren todo el archivo, sin huecos ni solapes, y cada corte cae en un espacio en blanco.
+def test_fragmentos_cortan_en_espacios(tmp_path):
+    ruta = tmp_path / "texto.txt"
+    ruta.write_text(TEXTO_PRUEBA, encoding="utf-8")
+    datos = ruta.read_bytes()
+
+    fragmentos = nube_palabras.dividir_en_fragmentos(str(ruta), 7)
+
+    assert fragmentos[0][0] == 0 and fragmentos[-1][1] == len(datos)
+    assert all(fin == siguiente for (_, fin), (siguiente, _) in zip(fragmentos, fragmentos[1:]))
+    assert all(datos[inicio:inicio + 1] in nube_palabras.ESPACIOS_BYTES for inicio, _ in fragmentos[1:])
+
+
+# --- CACHÉ DEL CORPUS ---
+
+# Solo se recuentan los archivos cambiados (tamaño o mtime), y el total descuenta lo que cambió o se borró.
+def test_cache_invalida_archivos_cambiados(tmp_path):
+    (tmp_path / "a.txt").write_text("gato perro", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("gato", encoding="utf-8")
+    assert nube_palabras.contar_corpus(str(tmp_path)) == {"gato": 2, "perro": 1}
+
+    (tmp_path / "a.txt").write_text("perro perro pez", encoding="utf-8")
+    (tmp_path / "b.txt").unlink()
+    assert nube_palabras.contar_corpus(str(tmp_path)) == {"perro": 2, "pez": 1}
+
+    cache = nube_palabras.CacheFrecuencias(str(tmp_path))
+    try:
+        assert list(cache.cargar_estados(nube_palabras.firma_conteo())) == ["a.txt"]
+    finally:
+        cache.cerrar()
+
+
+# Si cambia la firma del conteo (stopwords o expresión regular), la caché se vacía y todo se vuelve a contar.
+def test_cache_invalida_con_otra_firma(tmp_path):
+    (tmp_path / "a.txt").write_text("gato perro", encoding="utf-8")
+    nube_palabras.contar_corpus(str(tmp_path))
+
+    cache = nube_palabras.CacheFrecuencias(str(tmp_path))
+    try:
+        assert cache.cargar_estados("otra firma") == {}
+        assert cache.total() == {} and cache.conteo("a.txt") == {}
+    finally:
+        cache.cerrar()
+    assert nube_palabras.contar_corpus(str(tmp_path)) == {"gato": 1, "perro": 1}
+
+
+# Sin poder abrir la caché o leer un archivo, contar_corpus avisa y devuelve None (como contar_archivo) en lugar de lanzar la excepción.
+def test_corpus_con_errores_devuelve_none(tmp_path, monkeypatch, capsys):
+    (tmp_path / "a.txt").write_text("gato perro", encoding="utf-8")
+    (tmp_path / nube_palabras.NOMBRE_CACHE).mkdir()
+    assert nube_palabras.contar_corpus(str(tmp_path)) is None
+
+    (tmp_path / nube_palabras.NOMBRE_CACHE).rmdir()
+
+    def fragmento_ilegible(ruta_archivo, inicio, fin):
+        raise PermissionError(13, "Permission denied", ruta_archivo)
+    monkeypatch.setattr(nube_palabras, "contar_fragmento", fragmento_ilegible)
+    assert nube_palabras.contar_corpus(str(tmp_path)) is None
+    assert capsys.readouterr().out.count("❌") == 2
+
+
+# --- MODOS DE ANÁLISIS ---
+
+# Los n-gramas que cruzan el corte entre dos bloques se cuentan igual que con el texto entero.
+def test_ngramas_entre_bloques():
+    texto = "nube palabras grande nube palabras pequeña nube palabras grande"
+    bloques = ["nube palabras grande nube ", "palabras pequeña ", "nube ", "palabras grande"]
+
+    for n in (2, 3):
+        assert nube_palabras.contar_ngramas(bloques, n) == nube_palabras.contar_ngramas([texto], n)
+    assert nube_palabras.contar_ngramas(bloques, 2)["nube palabras"] == 3
+    assert nube_palabras.contar_ngramas(bloques, 3)["palabras grande nube"] == 1
+
+
+# Las variantes de género, número y tildes comparten raíz, y cada grupo se muestra con su forma más frecuente.
+def test_raiz_espanol_agrupa_variantes():
+    assert {nube_palabras.raiz_espanol(palabra) for palabra in ("niño", "niños", "niña", "niñas")} == {"niñ"}
+    assert nube_palabras.raiz_espanol("canción") == nube_palabras.raiz_espanol("canciones")
+    assert nube_palabras.raiz_espanol("sol") == "sol"
+    assert nube_palabras.agrupar_por_raiz({"niño": 3, "niños": 2, "niña": 1, "gato": 1}) == {"niño": 6, "gato": 1}
+
+
+# Dentro de un documento, una palabra que está en todos pesa menos que otra igual de frecuente que solo está en él (idf),
+# el peso total suma los de cada documento y los conteos se recorren dos veces.
+def test_pesos_tfidf():
+    documentos = [{"comun": 2, "rara": 2}, {"comun": 2, "otra": 2}, {"comun": 4}]
+    llamadas = []
+
+    def conteos():
+        llamadas.append(1)
+        return iter(documentos)
+
+    pesos = nube_palabras.pesos_tfidf(conteos)
+
+    assert len(llamadas) == 2
+    assert pesos["rara"] == pytest.approx(pesos["otra"])
+    idf = nube_palabras.calcular_idf({"comun": 3, "rara": 1, "otra": 1}, 3)
+    documento = nube_palabras.tfidf_documento(documentos[0], idf)
+    assert documento["rara"] > documento["comun"]
+    # 'comun' tiene idf 1 (está en los 3 documentos): su peso es la suma de sus frecuencias relativas, 0.5 + 0.5 + 1.
+    assert pesos["comun"] == pytest.approx(2.0)